@@ -0,0 +1,204 @@
+"""Benchmark the test framework against the local stand-in site.
+
+Starts the stand-in site, points the test catalog at it and runs the real
+catalog tests a few times, then reports throughput (tests per minute), per-test
+latency (p50/p95), HAR bytes transferred by the proxy per test and the peak
+memory of the browser and the proxy. Nothing leaves the machine, so runs are
+repeatable and comparable across changes to the framework.
+
+Usage:
+    python -m benchmarks.run [--runs 3] [--pages 5] [--workers 1] [--policy analytics]
+        [--backend browsermob] [--browsers chrome,firefox] [--passive] [--json result.json]
+        [-- extra pytest args]
+
+--pages copies the catalog page that many times (each copy with its own URL),
+so one run executes that many catalog tests. --passive drops the events that
+interact with the page, so the copies are loaded together in tabs (MAX_TABS).
+With several --browsers every page runs once per engine, and the startup and
+per-page timings of the engines are reported side by side.
+"""
+import argparse
+import copy
+import glob
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from .stand_in import StandInSite
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG_TEST = os.path.join(REPO_DIR, "tests", "test_catalog.py")
+DEFAULT_CATALOG = os.path.join(REPO_DIR, "tests", "catalog.json")
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def write_catalog(path, pages, source=DEFAULT_CATALOG, passive=False):
+    """Write a catalog holding each page of source `pages` times, every copy under its own URL.
+
+    With passive, events driven by an action are left out.
+    """
+    with open(source) as catalog_file:
+        catalog = json.load(catalog_file)
+    copies = []
+    for page in catalog['pages']:
+        for index in range(pages):
+            page_copy = copy.deepcopy(page)
+            page_copy['name'] = f"{page['name']}_{index}"
+            page_copy['url'] = f"{page['url']}{'&' if '?' in page['url'] else '?'}bench={index}"
+            if passive:
+                page_copy['events'] = [event for event in page_copy.get('events', []) if not event.get('action')]
+            copies.append(page_copy)
+    catalog['pages'] = copies
+    with open(path, "w") as catalog_file:
+        json.dump(catalog, catalog_file, indent=2)
+
+
+def run_suite(site, work_dir, pages, workers, policy, backend, pytest_args=(), passive=False, browsers="chrome"):
+    """Run the catalog tests once against site. Returns (exit code, wall time, per-test profiles)."""
+    catalog_path = os.path.join(work_dir, "catalog.json")
+    profile_dir = os.path.join(work_dir, "profiles")
+    write_catalog(catalog_path, pages, passive=passive)
+    env = dict(
+        os.environ,
+        SITE_BASE_URL=site.base_url,
+        CATALOG_PATH=catalog_path,
+        PROFILE_TESTS="1",
+        PROFILE_DIR=profile_dir,
+        CAPTURE_POLICY=policy,
+        CAPTURE_BACKEND=backend,
+        BROWSERS=browsers,
+        UPLOAD_LOGS="0",
+    )
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", CATALOG_TEST, *pytest_args]
+    if workers > 1:
+        command += ["-n", str(workers), "--dist", "load"]
+
+    start_time = time.perf_counter()
+    # Logs and pid files of the run stay in the work directory
+    exit_code = subprocess.run(command, cwd=work_dir, env=env, check=False).returncode
+    wall_time = time.perf_counter() - start_time
+
+    tests = []
+    for profile_file in glob.glob(os.path.join(profile_dir, "*.json")):
+        with open(profile_file) as profile:
+            tests.extend(json.load(profile)['tests'])
+    return exit_code, wall_time, tests
+
+
+def summarize(runs):
+    """Aggregate (exit code, wall time, tests) runs into the benchmark report dict."""
+    tests = [test for _, _, run_tests in runs for test in run_tests]
+    latencies = [test['wall_time'] for test in tests]
+    wall_time = sum(run_wall_time for _, run_wall_time, _ in runs)
+
+    def metric(name):
+        return [test.get('metrics', {}).get(name, 0) for test in tests]
+
+    har_bytes = metric('har_bytes')
+    startups = [value for value in metric('browser_startup') if value]
+    return {
+        'runs': len(runs),
+        'failed_runs': sum(1 for exit_code, _, _ in runs if exit_code != 0),
+        'tests': len(tests),
+        'wall_time': round(wall_time, 3),
+        'tests_per_minute': round(60 * len(tests) / wall_time, 2) if wall_time else 0.0,
+        'latency_p50': round(percentile(latencies, 50), 3),
+        'latency_p95': round(percentile(latencies, 95), 3),
+        'startup_mean': round(sum(startups) / len(startups), 3) if startups else 0.0,
+        'har_bytes_per_test': round(sum(har_bytes) / len(tests)) if tests else 0,
+        'har_entries_per_test': round(sum(metric('har_entries')) / len(tests), 1) if tests else 0,
+        'browser_rss_peak_mb': round(max(metric('browser_rss'), default=0) / 2**20, 1),
+        'proxy_rss_peak_mb': round(max(metric('proxy_rss'), default=0) / 2**20, 1),
+    }
+
+
+def summarize_by_browser(runs):
+    """summarize() for the tests of each browser engine, keyed by engine. Wall time is the runs' total."""
+    browsers = sorted({test.get('browser') or "chrome" for _, _, tests in runs for test in tests})
+    return {
+        browser: summarize([
+            (exit_code, wall_time, [test for test in tests if (test.get('browser') or "chrome") == browser])
+            for exit_code, wall_time, tests in runs
+        ])
+        for browser in browsers
+    }
+
+
+def format_report(report, settings):
+    lines = [
+        f"Benchmark: {settings}",
+        f"  {report['tests']} tests in {report['runs']} runs ({report['failed_runs']} failed) over {report['wall_time']:.1f}s",
+        f"  throughput      {report['tests_per_minute']:.2f} tests/min",
+        f"  latency         p50 {report['latency_p50']:.2f}s  p95 {report['latency_p95']:.2f}s",
+        f"  browser startup {report['startup_mean']:.2f}s",
+        f"  HAR per test    {report['har_bytes_per_test'] / 1024:.1f} KiB, {report['har_entries_per_test']} entries",
+        f"  peak memory     browser {report['browser_rss_peak_mb']} MiB, proxy {report['proxy_rss_peak_mb']} MiB",
+    ]
+    return "\n".join(lines)
+
+
+def format_comparison(reports):
+    """The per-engine reports of summarize_by_browser as a table, one column per engine."""
+    rows = [
+        ("tests", "{tests}"),
+        ("browser startup", "{startup_mean:.2f}s"),
+        ("latency p50", "{latency_p50:.2f}s"),
+        ("latency p95", "{latency_p95:.2f}s"),
+        ("HAR per test", "{har_entries_per_test} entries"),
+        ("peak memory", "{browser_rss_peak_mb} MiB"),
+    ]
+    browsers = list(reports)
+    lines = ["  " + " " * 16 + "".join(f"{browser:>16}" for browser in browsers)]
+    for label, template in rows:
+        lines.append(f"  {label:<16}" + "".join(f"{template.format(**reports[browser]):>16}" for browser in browsers))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the framework against the local stand-in site.")
+    parser.add_argument("--runs", type=int, default=3, help="Number of suite runs")
+    parser.add_argument("--pages", type=int, default=5, help="Copies of each catalog page per run")
+    parser.add_argument("--workers", type=int, default=1, help="pytest-xdist workers")
+    parser.add_argument("--policy", default=os.environ.get("CAPTURE_POLICY", "analytics"), help="Capture policy")
+    parser.add_argument("--backend", default=os.environ.get("CAPTURE_BACKEND", "browsermob"), help="Capture backend")
+    parser.add_argument("--browsers", default=os.environ.get("BROWSERS", "chrome"), help="Comma separated browser engines")
+    parser.add_argument("--passive", action="store_true", help="Leave out events with actions (tab loading)")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    parser.add_argument("pytest_args", nargs="*", help="Extra pytest arguments (after --)")
+    args = parser.parse_args(argv)
+
+    settings = f"{args.runs} runs x {args.pages} pages, {args.workers} worker(s), policy {args.policy}, backend {args.backend}, browsers {args.browsers}"
+    if args.passive:
+        settings += ", passive"
+    runs = []
+    with StandInSite() as site, tempfile.TemporaryDirectory(prefix="benchmark_") as work_dir:
+        for index in range(args.runs):
+            run_dir = os.path.join(work_dir, f"run_{index}")
+            os.makedirs(run_dir)
+            runs.append(run_suite(site, run_dir, args.pages, args.workers, args.policy, args.backend, args.pytest_args, args.passive, args.browsers))
+
+    report = summarize(runs)
+    print(format_report(report, settings))
+    browsers = summarize_by_browser(runs)
+    if len(browsers) > 1:
+        print(format_comparison(browsers))
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(dict(report, browsers=browsers, settings=vars(args)), json_file, indent=2)
+    return 1 if report['failed_runs'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
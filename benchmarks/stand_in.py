@@ -0,0 +1,113 @@
+"""Local stand-in for the hire page and the endpoints it talks to.
+
+Serves benchmarks/site/hire.html at the same path as the real page, with some
+heavy assets (images, a font and an ad pixel) to make capture policies
+measurable, and sinks for the GA4 hits and the lead-processing call.
+
+Run it on its own with ``python -m benchmarks.stand_in [port]``.
+"""
+import logging
+import os
+import sys
+import threading
+
+from flask import Flask, Response, jsonify, request, send_from_directory
+from werkzeug.serving import make_server
+
+SITE_DIR = os.path.join(os.path.dirname(__file__), "site")
+
+# Sizes of the generated assets, roughly those of the real page's hero images and web font
+ASSET_SIZES = {'.png': 400_000, '.jpg': 250_000, '.woff2': 60_000}
+ASSET_TYPES = {'.png': 'image/png', '.jpg': 'image/jpeg', '.woff2': 'font/woff2'}
+PIXEL_GIF = bytes.fromhex("47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b")
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config['hits'] = []
+    app.config['leads'] = []
+    lock = threading.Lock()
+
+    @app.route("/us/en/c/hire")
+    def hire_page():
+        return send_from_directory(SITE_DIR, "hire.html")
+
+    @app.route("/assets/<name>")
+    def asset(name):
+        extension = os.path.splitext(name)[1]
+        if extension not in ASSET_SIZES:
+            return Response(status=404)
+        return Response(b"\0" * ASSET_SIZES[extension], mimetype=ASSET_TYPES[extension])
+
+    @app.route("/ads/<path:path>")
+    def ad_pixel(path):
+        return Response(PIXEL_GIF, mimetype="image/gif")
+
+    @app.route("/g/collect", methods=["GET", "POST"])
+    def ga4_collect():
+        with lock:
+            app.config['hits'].append(request.full_path)
+        return Response(status=204)
+
+    @app.route("/proxy-lead-processing/send", methods=["POST"])
+    def lead_processing():
+        with lock:
+            app.config['leads'].append(request.get_json(silent=True))
+        return jsonify({'status': 'success', 'leadId': len(app.config['leads'])})
+
+    @app.route("/api/stats")
+    def stats():
+        return jsonify({'hits': len(app.config['hits']), 'leads': len(app.config['leads'])})
+
+    return app
+
+
+class StandInSite:
+    """The stand-in site served from a background thread.
+
+    Args:
+        port: Port to listen on; 0 picks a free one
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.app = create_app()
+        self._server = make_server(host, port, self.app, threaded=True)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self._server.host}:{self._server.port}"
+
+    @property
+    def hits(self):
+        return self.app.config['hits']
+
+    @property
+    def leads(self):
+        return self.app.config['leads']
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        # Per-request access logs would drown the benchmark output
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stand-in-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    site = StandInSite(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
+    print(f"Stand-in hire page at {site.base_url}/us/en/c/hire")
+    site.serve_forever()
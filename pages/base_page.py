@@ -1,24 +1,142 @@
+import weakref
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-# from selenium.webdriver.common.by import By
-# import logging
+
+# Separates the steps of a deep locator; each step after the first is looked up
+# in the shadow root of the element matched by the previous one
+SHADOW_SEPARATOR = ">>>"
+
+# Resolves any number of deep locators in one round trip. For each path returns
+# the matched element, or null and the index of the step that matched nothing.
+DEEP_QUERY_SCRIPT = """
+    return arguments[0].map(path => {
+        let element = null;
+        for (let depth = 0; depth < path.length; depth++) {
+            const root = depth === 0 ? document : element.shadowRoot;
+            element = root ? root.querySelector(path[depth]) : null;
+            if (!element) return {element: null, failed_step: depth};
+        }
+        return {element: element, failed_step: null};
+    });
+"""
+
+
+def parse_locator(locator):
+    """Split a deep locator ('host-tag >>> inner-tag >>> a') into its CSS selectors."""
+    steps = tuple(step.strip() for step in locator.split(SHADOW_SEPARATOR))
+    if not all(steps):
+        raise ValueError(f"Empty step in locator '{locator}'")
+    return steps
+
+
+class ElementCache:
+    """Elements resolved from deep locators on the page currently open in a driver.
+
+    Nothing is cached until start_page() is called for a freshly loaded page,
+    and everything is dropped on the next start_page() or clear(). Whoever
+    navigates (tests/page_cache.py for the test framework) calls them.
+    """
+
+    # One cache per WebDriver
+    _driver_caches = weakref.WeakKeyDictionary()
+
+    def __init__(self):
+        self.elements = None  # None while no page is known to be stable
+        self.hits = 0
+
+    @classmethod
+    def for_driver(cls, driver):
+        cache = cls._driver_caches.get(driver)
+        if cache is None:
+            cache = cls._driver_caches[driver] = cls()
+        return cache
+
+    def start_page(self):
+        self.elements = {}
+
+    def clear(self):
+        self.elements = None
+
+    def get(self, locator):
+        element = self.elements.get(locator) if self.elements is not None else None
+        if element is not None:
+            self.hits += 1
+        return element
+
+    def put(self, locator, element):
+        if self.elements is not None and element is not None:
+            self.elements[locator] = element
+
+    def forget(self, locator):
+        if self.elements is not None:
+            self.elements.pop(locator, None)
+
 
 class BasePage:
+    """Base of the page objects.
+
+    Locators are either Selenium (By, value) tuples, looked up in the light DOM,
+    or deep locator strings: CSS selectors separated by '>>>', each step after
+    the first being looked up in the shadow root of the previous match, e.g.
+    "rhcl-block-hero-form >>> rhcl-button >>> a". A deep locator is resolved in
+    a single script call, and the element is kept in the driver's ElementCache
+    until the page changes.
+    """
+
     def __init__(self, driver):
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
+        self.element_cache = ElementCache.for_driver(driver)
 
-    # def open_url(self, url):
-    #     self.driver.get(url)
-
-    def find_element(self, locator):
-        element = self.wait.until(EC.visibility_of_element_located(locator))
+    def find_element(self, locator, timeout=10):
+        """Wait up to timeout seconds for the element: visible for a (By, value) tuple, present for a deep locator."""
+        if isinstance(locator, str):
+            return self.find_deep(locator, timeout)
+        wait = self.wait if timeout == 10 else WebDriverWait(self.driver, timeout)
+        element = wait.until(EC.visibility_of_element_located(locator))
         return element
 
+    def find_deep(self, locator, timeout=10):
+        last_result = {}
+
+        def resolve(driver):
+            last_result.update(self._resolve([locator])[0])
+            return last_result['element']
+
+        try:
+            return WebDriverWait(self.driver, timeout).until(resolve)
+        except TimeoutException:
+            failed_step = last_result.get('failed_step')
+            step = parse_locator(locator)[failed_step] if failed_step is not None else locator
+            raise TimeoutException(f"No element for '{locator}' after {timeout}s: nothing matched '{step}'")
+
+    def find_all(self, *locators):
+        """Resolve deep locators without waiting, in one round trip for the ones not cached. Returns an element or None per locator."""
+        return [result['element'] for result in self._resolve(locators)]
+
+    def _resolve(self, locators):
+        results = [{'element': self.element_cache.get(locator), 'failed_step': None} for locator in locators]
+        missing = [index for index, result in enumerate(results) if result['element'] is None]
+        if missing:
+            paths = [list(parse_locator(locators[index])) for index in missing]
+            for index, result in zip(missing, self.driver.execute_script(DEEP_QUERY_SCRIPT, paths)):
+                results[index] = result
+                self.element_cache.put(locators[index], result['element'])
+        return results
+
+    def has_shadow_root(self, locator):
+        return bool(self.driver.execute_script("return arguments[0].shadowRoot !== null;", self.find_element(locator)))
+
     def fill_input(self, locator, text):
         element = self.find_element(locator)
         element.clear()
         element.send_keys(text)
 
     def click(self, locator):
-        self.find_element(locator).click()
\ No newline at end of file
+        try:
+            self.find_element(locator).click()
+        except StaleElementReferenceException:
+            # The cached element was re-rendered; look it up again
+            self.element_cache.forget(locator)
+            self.find_element(locator).click()
@@ -0,0 +1,53 @@
+from pages.base_page import BasePage
+
+VALIDATION_ERRORS_SCRIPT = """
+    // Select all relevant form field elements
+    const formFields = document.querySelectorAll('rhcl-text-field, rhcl-checkbox, rhcl-typeahead, rhcl-textarea, rhcl-dropdown');
+    let errors = [];
+
+    for (const field of formFields) {
+        if (field.shadowRoot) {
+            const shadowErrors = field.shadowRoot.querySelectorAll('rhcl-form-field-error');
+            for (const error of shadowErrors) {
+                errors.push({
+                    field: field.getAttribute('name'),
+                    tagName: field.tagName.toLowerCase(),
+                    outerHTML: error.outerHTML,
+                    innerHTML: error.innerHTML,
+                    textContent: error.textContent,
+                    shadowContent: error.shadowRoot ? error.shadowRoot.innerHTML : null
+                });
+            }
+        }
+    }
+
+    return errors;
+"""
+
+
+class HireFormPage(BasePage):
+    """The hero form of the hire page (rhcl-block-hero-form and the form slotted into it)."""
+
+    FORM_ROOT = "rhcl-block-hero-form"
+    PHONE_BUTTON = "rhcl-block-hero-form >>> rhcl-button.rhcl-block-hero-form__form--heading-container--button"
+    PHONE_LINK = PHONE_BUTTON + " >>> a"
+    FORM = "form"
+    SUBMIT_BUTTON = "rhcl-button[component-title='Submit']"
+    THANK_YOU = "rhcl-typography#thankYouCopy"
+
+    def click_phone_link(self):
+        self.click(self.PHONE_LINK)
+
+    def form_action(self):
+        return self.find_element(self.FORM).get_attribute("action")
+
+    def scroll_to_submit(self):
+        self.driver.execute_script("arguments[0].scrollIntoView(true);", self.find_element(self.SUBMIT_BUTTON))
+
+    def validation_errors(self):
+        """Errors shown by the form fields, as dicts with the field name and the error markup."""
+        return self.driver.execute_script(VALIDATION_ERRORS_SCRIPT)
+
+    def wait_for_thank_you(self, timeout=30):
+        """Wait for the confirmation shown once the form is submitted and return its text."""
+        return self.find_element(self.THANK_YOU, timeout).text
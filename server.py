@@ -1,22 +1,249 @@
-from flask import Flask
+"""Live results service for test runs.
+
+Test runs post start/finish events for each test to /api/events (see
+tests/results_reporter.py, enabled with RESULTS_SERVER_URL). The service keeps
+the most recent results in a bounded ring buffer and exposes them as JSON, as
+server-sent events and as Prometheus metrics:
+
+    GET  /                 live page of the running and latest tests
+    GET  /api/results      latest finished tests (?limit=n)
+    GET  /api/status       running tests and pass/fail counts
+    GET  /api/stream       server-sent events, one per posted event
+    GET  /metrics          Prometheus text format
+    POST /api/events       one event or a list of events
+"""
+import json
+import os
+import queue
 import threading
 import time
+from collections import Counter, deque
+
+from flask import Flask, Response, jsonify, request
+
+# Finished tests kept for /api/results; older ones are only reflected in the counters
+MAX_RESULTS = int(os.environ.get("MAX_RESULTS", "1000"))
+# Seconds after which a started test whose finish event never arrived (a killed worker) no longer counts as running
+RUNNING_TTL = float(os.environ.get("RUNNING_TTL", "3600"))
+# Events buffered per SSE client; a client that falls further behind misses events
+SUBSCRIBER_QUEUE_SIZE = 100
+# Seconds between keep-alive comments on idle SSE streams
+KEEPALIVE_INTERVAL = 15
+DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, float("inf"))
+OUTCOMES = ("passed", "failed", "error", "skipped")
+
+
+def validate_event(event):
+    """Raise ValueError unless event is a 'start' or 'finish' event of a test."""
+    if not isinstance(event, dict) or event.get('type') not in ('start', 'finish') or not event.get('test'):
+        raise ValueError(f"Invalid event: {event}")
+
+
+class ResultsStore:
+    """Running tests, the latest results and aggregate counters, safe to share between request threads."""
+
+    def __init__(self, max_results=MAX_RESULTS, running_ttl=RUNNING_TTL):
+        self.results = deque(maxlen=max_results)
+        self.running = {}  # (worker, test) -> start event
+        self.running_ttl = running_ttl
+        self._started = {}  # (worker, test) -> time.monotonic() the start event arrived
+        self.counts = Counter()
+        self.duration_buckets = [0] * len(DURATION_BUCKETS)
+        self.duration_sum = 0.0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def add(self, event):
+        """Record a 'start' or 'finish' event and forward it to the live streams."""
+        validate_event(event)
+        event.setdefault('worker', "master")
+        event.setdefault('timestamp', time.time())
+        key = (event['worker'], event['test'])
+
+        with self._lock:
+            self._expire_running()
+            if event['type'] == 'start':
+                self.running[key] = event
+                self._started[key] = time.monotonic()
+            else:
+                self.running.pop(key, None)
+                self._started.pop(key, None)
+                self.results.append(event)
+                self.counts[event.get('outcome', "error")] += 1
+                duration = float(event.get('duration') or 0.0)
+                self.duration_sum += duration
+                for index, bound in enumerate(DURATION_BUCKETS):
+                    if duration <= bound:
+                        self.duration_buckets[index] += 1
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                pass  # slow client; it will catch up from /api/status
+
+    def _expire_running(self):
+        """Forget started tests older than running_ttl. Called with the lock held."""
+        deadline = time.monotonic() - self.running_ttl
+        for key in [key for key, started in self._started.items() if started < deadline]:
+            del self.running[key], self._started[key]
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def latest(self, limit=None):
+        with self._lock:
+            results = list(self.results)
+        return results[-limit:] if limit else results
+
+    def status(self):
+        with self._lock:
+            self._expire_running()
+            return {
+                'running': sorted(self.running.values(), key=lambda event: event['timestamp']),
+                'counts': {outcome: self.counts[outcome] for outcome in OUTCOMES},
+                'finished': sum(self.counts.values()),
+            }
+
+    def metrics(self):
+        """The counters in Prometheus text exposition format."""
+        with self._lock:
+            self._expire_running()
+            counts = dict(self.counts)
+            running = len(self.running)
+            buckets = list(self.duration_buckets)
+            duration_sum = self.duration_sum
+        lines = [
+            "# HELP selenium_tests_total Finished tests by outcome.",
+            "# TYPE selenium_tests_total counter",
+        ]
+        lines += [f'selenium_tests_total{{outcome="{outcome}"}} {counts.get(outcome, 0)}' for outcome in OUTCOMES]
+        lines += [
+            "# HELP selenium_tests_running Tests currently running.",
+            "# TYPE selenium_tests_running gauge",
+            f"selenium_tests_running {running}",
+            "# HELP selenium_test_duration_seconds Test duration (setup, call and teardown).",
+            "# TYPE selenium_test_duration_seconds histogram",
+        ]
+        for bound, count in zip(DURATION_BUCKETS, buckets):
+            le = "+Inf" if bound == float("inf") else str(bound)
+            lines.append(f'selenium_test_duration_seconds_bucket{{le="{le}"}} {count}')
+        lines += [
+            f"selenium_test_duration_seconds_sum {duration_sum:.3f}",
+            f"selenium_test_duration_seconds_count {buckets[-1]}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+LIVE_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Test results</title>
+<style>body { font-family: monospace; } .failed, .error { color: #b00; } .passed { color: #070; }</style></head>
+<body>
+<h3 id="counts"></h3>
+<h4>Running</h4><ul id="running"></ul>
+<h4>Latest results</h4><ul id="results"></ul>
+<script>
+function item(event) {
+    var li = document.createElement('li');
+    li.className = event.outcome || '';
+    li.textContent = '[' + event.worker + '] ' + event.test +
+        (event.outcome ? ' ' + event.outcome + ' in ' + Number(event.duration || 0).toFixed(1) + 's' : '');
+    return li;
+}
+function refresh() {
+    fetch('/api/status').then(function (r) { return r.json(); }).then(function (status) {
+        var counts = status.counts;
+        document.getElementById('counts').textContent = status.finished + ' finished: ' +
+            counts.passed + ' passed, ' + counts.failed + ' failed, ' + counts.error + ' errors, ' + counts.skipped + ' skipped';
+        document.getElementById('running').replaceChildren.apply(document.getElementById('running'), status.running.map(item));
+    });
+}
+fetch('/api/results?limit=50').then(function (r) { return r.json(); }).then(function (results) {
+    var list = document.getElementById('results');
+    results.reverse().forEach(function (event) { list.appendChild(item(event)); });
+});
+new EventSource('/api/stream').onmessage = function (message) {
+    var event = JSON.parse(message.data);
+    if (event.type === 'finish') {
+        var list = document.getElementById('results');
+        list.insertBefore(item(event), list.firstChild);
+        while (list.children.length > 50) list.removeChild(list.lastChild);
+    }
+    refresh();
+};
+refresh();
+</script>
+</body></html>
+"""
+
+
+def create_app(store=None):
+    app = Flask(__name__)
+    store = store if store is not None else ResultsStore()
+    app.config['store'] = store
+
+    @app.route('/')
+    def live_page():
+        return LIVE_PAGE
+
+    @app.route('/api/events', methods=['POST'])
+    def post_events():
+        payload = request.get_json(silent=True)
+        events = payload if isinstance(payload, list) else [payload]
+        # A batch is applied as a whole or not at all, so a client retrying it never double counts
+        try:
+            for event in events:
+                validate_event(event)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        for event in events:
+            store.add(event)
+        return jsonify({'accepted': len(events)})
+
+    @app.route('/api/results')
+    def get_results():
+        return jsonify(store.latest(request.args.get('limit', type=int)))
+
+    @app.route('/api/status')
+    def get_status():
+        return jsonify(store.status())
+
+    @app.route('/api/stream')
+    def stream():
+        subscriber = store.subscribe()
+
+        def events():
+            try:
+                # Headers only go out with the first chunk; send one so clients connect at once
+                yield ": connected\n\n"
+                while True:
+                    try:
+                        event = subscriber.get(timeout=KEEPALIVE_INTERVAL)
+                    except queue.Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"data: {json.dumps(event)}\n\n"
+            finally:
+                store.unsubscribe(subscriber)
+
+        return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
-app = Flask(__name__)
-log_messages = []
+    @app.route('/metrics')
+    def metrics():
+        return Response(store.metrics(), mimetype='text/plain; version=0.0.4')
 
-def generate_logs():
-    global log_messages
-    while True:
-        log_messages.append(f"[LOG] Selenium test running at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-        time.sleep(5)
+    return app
 
-@app.route('/')
-def view_logs():
-    return "<br>".join(log_messages[-50:]) 
 
-log_thread = threading.Thread(target=generate_logs, daemon=True)
-log_thread.start()
+app = create_app()
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    app.run(host="0.0.0.0", port=5000, threaded=True)
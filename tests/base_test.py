@@ -1,84 +1,141 @@
+import os
 import pytest
-import psutil
 import datetime
 import uuid
+import time
 import logging
-import urllib.parse
 from browsermobproxy import Server
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.proxy import Proxy, ProxyType
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from google.cloud import storage
-import time
+from pages.base_page import ElementCache
+from .har_stream import HarStream, is_complete, response_body
+from .capture_policy import get_capture_policy
+from .ga4_hits import Ga4HitIndex, check_hit_params
+from .waits import wait_until
+from .datalayer_recorder import DataLayerRecorder
+from .browser_pool import BrowserSession
+from .drivers import BROWSERS, capture_backend_for, start_browser
+from .page_cache import PageCache
+from .failure_artifacts import FailureArtifacts
+from .profile_snapshot import PROFILE_SNAPSHOT, ProfileClone, forget_cookies, is_seeded
+from .smart_scheduler import note_failed_assert
+from .profiler import get_profiler, profiled, step
+from .structured_log import get_log_writer
+from .log_uploader import get_log_uploader
 
 # Common constants
-CHROMEDRIVER_PATH = "/usr/local/bin/chromedriver-linux64/chromedriver"
-CHROME_BINARY_PATH = "/opt/google/chrome/chrome-linux64/chrome"
-
-@pytest.fixture(scope="module", autouse=True)
-def setup_browsermob():
-    """Start BrowserMob Proxy before tests and stop after."""
-    logging.info("Killing all browsermob-proxy processes...")
-    for proc in psutil.process_iter():
-        if 'proxy' in proc.name() or 'browser' in proc.name():
-            proc.kill()
-
-    logging.info("Starting BrowserMob Proxy...")
-    server = Server(path="/drivers/browsermob-proxy-2.1.4/bin/browsermob-proxy")
+BROWSERMOB_PATH = "/drivers/browsermob-proxy-2.1.4/bin/browsermob-proxy"
+
+# Each pytest-xdist worker gets its own block of ports so that every Chrome
+# instance talks to its own BrowserMob server/proxy and records its own HAR.
+BROWSERMOB_BASE_PORT = 8080
+PORTS_PER_WORKER = 10
+
+def get_worker_id():
+    """Return the pytest-xdist worker id ('gw0', 'gw1', ...) or 'master' when running serially."""
+    return os.environ.get("PYTEST_XDIST_WORKER", "master")
+
+def get_worker_ports(browser=None):
+    """Return the (server_port, proxy_port) pair reserved for the current worker and browser engine."""
+    worker_id = get_worker_id()
+    index = int(worker_id[2:]) if worker_id.startswith("gw") else 0
+    # Every engine of the worker gets its own proxy, two ports apart
+    engine_index = BROWSERS.index(browser) if browser in BROWSERS else 0
+    server_port = BROWSERMOB_BASE_PORT + index * PORTS_PER_WORKER + engine_index * 2
+    return server_port, server_port + 1
+
+def start_browsermob(browser=None):
+    """Start this worker's BrowserMob Proxy (for browser, with several engines). Returns (server, proxy)."""
+    server_port, proxy_port = get_worker_ports(browser)
+    worker_id = get_worker_id() if browser is None else f"{get_worker_id()}_{browser}"
+    start_time = time.monotonic()
+
+    logging.info(f"Starting BrowserMob Proxy for worker {worker_id} on port {server_port}...")
+    server = Server(path=BROWSERMOB_PATH, options={'port': server_port})
     try:
-        server.start()
-        time.sleep(5)
+        server.start(options={'log_file': f"browsermob_{worker_id}.log"})
     except Exception as e:
         logging.error(f"Failed to start BrowserMob Proxy: {e}")
         pytest.fail("BrowserMob Proxy failed to start.")
 
-    proxy = server.create_proxy()
-    # Configure proxy to capture all content types
-    proxy.new_har(options={
-        'captureHeaders': True,
-        'captureContent': True,
-        'captureBinaryContent': True
-    })
-    
-    yield server, proxy
-    logging.info("Stopping BrowserMob Proxy...")
-    server.stop()
-
-@pytest.fixture(scope="module")
-def setup_driver(setup_browsermob):
-    """Initialize Chrome WebDriver with proxy."""
-    server, proxy = setup_browsermob
-    logging.info("Starting a Chrome instance...")
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--enable-javascript")
-    options.add_argument("--enable-cookies")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--window-size=1980,1024")
-    options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36")
-    
-    options.accept_insecure_certs = True
-    options.binary_location = CHROME_BINARY_PATH
-
-    proxy_config = Proxy({
-        "proxyType": ProxyType.MANUAL,
-        "httpProxy": proxy.proxy,
-        "sslProxy": proxy.proxy
-    })
-    options.proxy = proxy_config
-    service = Service(CHROMEDRIVER_PATH)
-    driver = webdriver.Chrome(service=service, options=options)
-
-    yield driver, proxy
-    logging.info("Closing WebDriver...")
-    driver.quit()
+    # Wrap the proxy so validators read the HAR incrementally instead of re-downloading it,
+    # keeping only what the capture policy (CAPTURE_POLICY env var) asks for
+    policy = get_capture_policy()
+    proxy = HarStream(server.create_proxy(params={'port': proxy_port}), policy=policy)
+    policy.apply_to_proxy(proxy)
+    proxy.new_har(options=policy.har_options())
+    logging.info(f"Using capture policy {policy.name}")
+    logging.info(f"BrowserMob Proxy ready in {time.monotonic() - start_time:.2f}s")
+    return server, proxy
+
+def launch_browser_session(browser=BROWSERS[0]):
+    """Start a browser engine and, with the browsermob backend, its proxy. Used by the browser_pool fixture.
+
+    With PROFILE_SNAPSHOT set, Chrome starts from a private clone of the seeded profile.
+    """
+    start_time = time.monotonic()
+    capture_backend = capture_backend_for(browser)
+    profile = None
+    if PROFILE_SNAPSHOT and browser == "chrome":
+        profile = ProfileClone(PROFILE_SNAPSHOT, prefix=f"chrome_profile_{get_worker_id()}_")
+    server, proxy = start_browsermob(browser) if capture_backend == "browsermob" else (None, None)
+    try:
+        driver, proxy = start_browser(browser, proxy, capture_backend, user_data_dir=profile.path if profile else None)
+    except Exception:
+        if server is not None:
+            server.stop()
+        if profile is not None:
+            profile.remove()
+        raise
+    if profile is not None:
+        profile.attach(driver)
+    return BrowserSession(driver, proxy, server, browser=browser, startup_time=time.monotonic() - start_time, profile=profile)
+
+# Fills every rhcl-* form component in one round trip. Values are read back on
+# the next task so that component updates triggered by the events are applied.
+FILL_FORM_SCRIPT = """
+    const [fields, dropdowns, checkboxes, done] = arguments;
+    const results = {};
+    const apply = (specs, setValue, readValue) => {
+        for (const [selector, value, label] of specs) {
+            const el = document.querySelector(selector);
+            if (!el || !el.interactionRef) {
+                results[label] = {expected: value, actual: null, error: label + ' interactionRef not found'};
+                continue;
+            }
+            try {
+                setValue(el.interactionRef, value);
+                results[label] = {expected: value, read: () => readValue(el.interactionRef), error: null};
+            } catch (e) {
+                results[label] = {expected: value, actual: null, error: e.message};
+            }
+        }
+    };
+    apply(fields, (input, value) => {
+        input.scrollIntoView();
+        input.focus();
+        input.value = value;
+        input.dispatchEvent(new Event('input', { bubbles: true }));
+        input.dispatchEvent(new Event('change', { bubbles: true }));
+    }, input => input.value);
+    apply(dropdowns, (input, value) => {
+        input.value = value;
+        input.dispatchEvent(new Event('change', { bubbles: true }));
+    }, input => input.value);
+    apply(checkboxes, (input, checked) => {
+        if (input.checked !== checked) input.click();
+    }, input => input.checked);
+    setTimeout(() => {
+        for (const result of Object.values(results)) {
+            if (result.read) {
+                result.actual = result.read();
+                delete result.read;
+            }
+        }
+        done(results);
+    }, 0);
+"""
 
 class BaseTest:    
     def setup_method(self, method):
@@ -88,49 +145,135 @@ class BaseTest:
         self.test_result = "success"
         self.test_error_description = ""
         self.run_id = uuid.uuid4()
-        self.logs_file_name = f"{self.start_timestamp}_logs_automationqa.txt"
+        # xdist workers start tests in the same second; each appends to its own file
+        self.logs_file_name = f"{self.start_timestamp}_{get_worker_id()}_logs_automationqa.jsonl"
+        self.wait_timings = []
+        # time.monotonic() when the wait for the next log_assert started, see log_assert
+        self.check_started_at = None
+        self.artifacts = None
 
     def get_metadata_string(self, test_suite, test_suite_version, test_case_name, test_case_version):
         return f'{test_suite}|{test_suite_version}|{test_case_name}|{test_case_version}'
 
-    def log_info(self, message):
+    def write_log_record(self, level, message, title=None, **fields):
+        """Queue a JSON-lines record for the log file; the background writer does the disk I/O."""
+        record = {
+            'timestamp': datetime.datetime.now().isoformat(),
+            'start_timestamp': self.start_timestamp,
+            'run_id': str(self.run_id),
+            'test': getattr(self, 'test_name', None),
+            'level': level,
+            'metadata': getattr(self, 'metadata_string', None),
+            'title': title,
+            'message': message,
+        }
+        record.update(fields)
+        get_log_writer().write(self.logs_file_name, record)
+
+    def log_info(self, message, title=None, **fields):
         logging.info(message)
-        with open(self.logs_file_name, "a") as log_file:
-            log_file.write(f"{self.start_timestamp}\t{self.test_name}\tinfo\t{message}\n")
+        self.write_log_record("info", message, title, **fields)
 
-    def log_error(self, message):
+    def log_error(self, message, title=None, **fields):
         logging.error(message)
-        with open(self.logs_file_name, "a") as log_file:
-            log_file.write(f"{self.start_timestamp}\t{self.test_name}\terror\t{message}\n")
+        self.write_log_record("error", message, title, **fields)
+
+    def flush_logs(self):
+        """Wait until every queued log record is on disk. Called at test teardown."""
+        get_log_writer().flush()
 
-    def log_assert(self, title, condition, message):
+    def log_assert(self, title, condition, message, capture=True):
+        """Assert condition and log the outcome.
+
+        A failure writes the failure artifacts and counts towards the test's
+        failure (for retries of known-flaky asserts) unless capture is False,
+        for checks whose failure does not fail the test.
+
+        The record's duration is the time the check took: from the start of
+        the wait_for calls that led up to it, or 0 for a condition that was
+        evaluated without waiting.
+        """
+        started_at, self.check_started_at = self.check_started_at, None
+        duration = round(time.monotonic() - started_at, 3) if started_at is not None else 0.0
         try:
             assert condition, message
             log_message = f"{self.metadata_string}|'{title}'|success"
-            self.log_info(log_message)
+            self.log_info(log_message, title=title, result="success", duration=duration)
         except AssertionError as e:
-            failure_reason = f"{title} failed: {str(e)}"
+            failure_reason = f"{title} failed: {e!s}"
             log_message = f"{self.metadata_string}|'{title}'|FAILED: {failure_reason}"
-            self.log_error(log_message)
+            self.log_error(log_message, title=title, result="failed", duration=duration)
+            if capture:
+                note_failed_assert(self.metadata_string, title)
+                self.capture_failure(failure_reason)
             raise
 
+    def attach_artifacts(self, driver, proxy, name=None):
+        """Keep a rolling window of the test's network and dataLayer activity for capture_failure."""
+        self.artifacts = FailureArtifacts(driver, proxy, test_name=name or getattr(self, 'test_name', None) or "test")
+        return self.artifacts
+
+    def capture_failure(self, reason):
+        """Write the failure bundle (HAR window, screenshot, DOM, profile, ...) once per test; no-op without attach_artifacts."""
+        if self.artifacts is None:
+            return None
+        try:
+            path = self.artifacts.capture(reason)
+        except Exception as e:
+            logging.warning(f"Could not write failure artifacts: {e}")
+            return None
+        if path:
+            self.log_error(f"{self.metadata_string}|'Failure artifacts'|{path}", title="Failure artifacts", artifact=path)
+        return path
+
     def upload_logs_to_gcs(self, file_name):
-        """Upload logs to Google Cloud Storage"""
-        bucket_name = 'automation-qa-logs'
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(file_name)
-        blob.upload_from_filename(file_name)
-        self.log_info(f"File {file_name} uploaded to {bucket_name}.")
+        """Queue logs for upload to Google Cloud Storage. Returns immediately, the upload runs in the background."""
+        uploader = get_log_uploader()
+        if uploader is None:
+            return
+        self.flush_logs()
+        uploader.submit(file_name)
+        logging.info(f"File {file_name} queued for upload to {uploader.bucket_name}.")
+
+    def wait_for(self, description, condition, timeout=15, **kwargs):
+        """Wait until condition returns a truthy value, returning as soon as it does.
+
+        Polls with exponential backoff (see waits.wait_until) and records how long
+        the wait actually took in self.wait_timings so timeouts can be tuned from data.
+
+        Returns:
+            WaitResult with the condition's value, elapsed time and number of polls
+        """
+        if self.check_started_at is None:
+            self.check_started_at = time.monotonic()
+        with step(f"wait:{description}"):
+            result = wait_until(condition, timeout=timeout, description=description, **kwargs)
+        self.wait_timings.append(result.as_dict())
+        if self.artifacts is not None:
+            self.artifacts.observe()
+        status = "satisfied" if result.satisfied else "timed out"
+        self.log_info(f"Wait for {description} {status} after {result.elapsed:.2f}s ({result.polls} polls)")
+        return result
+
+    @property
+    def profiler(self):
+        """The profile of the running test (see profiler.py), or None outside of one."""
+        return get_profiler()
+
+    def profile_step(self, name):
+        """Context manager timing a block as a step of the test profile."""
+        return step(name)
+
+    def get_data_layer_recorder(self, driver):
+        """Return the DataLayerRecorder for driver; pass it to validate_datalayer_event."""
+        return DataLayerRecorder.for_driver(driver)
 
     def wait_for_data_layer(self, driver, timeout=10):
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            data_layer = driver.execute_script("return window.dataLayer || []")
-            if data_layer and len(data_layer) > 0:
-                return data_layer
-            time.sleep(0.5)
-        raise TimeoutError("Timed out waiting for dataLayer to be populated")
+        recorder = self.get_data_layer_recorder(driver)
+        result = self.wait_for("dataLayer to be populated", lambda: recorder.fetch_new() or recorder.events, timeout)
+        if not result.satisfied:
+            raise TimeoutError("Timed out waiting for dataLayer to be populated")
+        return recorder.data_layer
 
     def get_data_layer(self, driver):
         try:
@@ -139,176 +282,227 @@ class BaseTest:
             self.log_error(f"DataLayer not available: {str(e)}")
             return []
 
+    def get_page_cache(self, driver):
+        return PageCache.for_driver(driver)
+
+    @profiled()
+    def open_page(self, driver, url, refresh=True, dismiss_cookie=True, first_visit=False):
+        """Load url and prepare it like load_dataLayer_and_dismiss_cookie, unless it already is.
+
+        The prepared page is reused when the browser is still on it, it meets the
+        requested preconditions and no earlier test changed it. Tests that change
+        the page must call get_page_cache(driver).mark_dirty() before doing so.
+        Tests of first-visit behaviour pass first_visit so that a browser started
+        from a profile snapshot loads the page without its seeded cookies.
+        Returns the PageState of the page.
+        """
+        cache = self.get_page_cache(driver)
+        state = cache.lookup(url, refresh, dismiss_cookie, first_visit)
+        if state is not None:
+            self.log_info(f"{self.metadata_string}|'Reuse page'|{url}|Page already loaded and prepared")
+            return state
+
+        self.log_info(f"{self.metadata_string}|'Navigate to URL'|{url}|Navigating to {url}")
+        state = cache.start_load(url)
+        if first_visit and is_seeded(driver):
+            forget_cookies(driver)
+        driver.get(url)
+        self.prepare_page(driver, state, refresh, dismiss_cookie, first_visit)
+        return state
+
+    @profiled()
     def load_dataLayer_and_dismiss_cookie(self, driver):
         """Wait for page load, refresh for dataLayer, and dismiss cookie banner if present."""
+        state = self.get_page_cache(driver).start_load(driver.current_url)
+        self.prepare_page(driver, state)
+
+    @profiled()
+    def prepare_page(self, driver, state, refresh=True, dismiss_cookie=True, first_visit=False):
+        """Bring a freshly loaded page to the state tests expect, recording each step in state.
+
+        A browser started from a profile snapshot already has the cookies the
+        refresh and the banner would set, so both are skipped unless first_visit.
+        """
         WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.TAG_NAME, "rhcl-dropdown"))
         )
-  
-        #refresh the page to ensure all dataLayer events are loaded. user_id_ga is set on second visit.
-        driver.refresh()
-        
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "rhcl-dropdown"))
-        )
+        state.loaded = True
+
+        if not first_visit and is_seeded(driver):
+            self.log_info(f"{self.metadata_string}|Seeded profile, skipping the refresh and the cookie banner")
+            state.seeded = state.refreshed = state.cookie_dismissed = True
+            refresh = dismiss_cookie = False
+
+        if refresh:
+            with step("refresh"):
+                #refresh the page to ensure all dataLayer events are loaded. user_id_ga is set on second visit.
+                driver.refresh()
+                ElementCache.for_driver(driver).start_page()
+
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "rhcl-dropdown"))
+                )
+            state.refreshed = True
         self.log_info(f"{self.metadata_string}|Form Loaded, form elements detected")
 
-        # Handle OneTrust cookie consent if present
-        try:
-            WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.ID, "onetrust-close-btn-container"))
-            ).click()
-            self.log_info(f"{self.metadata_string}|Cookie banner dismissed")
-        except:
-            self.log_info(f"{self.metadata_string}|No cookie banner detected")
-
-    def validate_datalayer_event(self, data_layer, event_name, expected_properties, check_user_ids=True, max_retries=3):
+        if dismiss_cookie:
+            # Handle OneTrust cookie consent if present
+            with step("cookie_banner"):
+                try:
+                    WebDriverWait(driver, 5).until(
+                        EC.element_to_be_clickable((By.ID, "onetrust-close-btn-container"))
+                    ).click()
+                    self.log_info(f"{self.metadata_string}|Cookie banner dismissed")
+                except:
+                    self.log_info(f"{self.metadata_string}|No cookie banner detected")
+            state.cookie_dismissed = True
+        state.loaded_url = driver.current_url
+
+    @profiled()
+    def fill_form(self, driver, form_fields, dropdowns=(), checkboxes=()):
+        """Fill rhcl-* form components in a single WebDriver round trip
+        Args:
+            driver: The WebDriver instance
+            form_fields: (selector, value, label) tuples for text inputs, typeaheads and textareas
+            dropdowns: (selector, value, label) tuples for rhcl-dropdown components
+            checkboxes: (selector, checked, label) tuples for rhcl-checkbox components
+
+        Returns:
+            dict: label -> {'expected': ..., 'actual': ..., 'error': None or error message}
+        """
+        self.log_info(f"Filling {len(form_fields) + len(dropdowns) + len(checkboxes)} form fields...")
+        return driver.execute_async_script(FILL_FORM_SCRIPT, [list(f) for f in form_fields], [list(d) for d in dropdowns], [list(c) for c in checkboxes])
+
+    @profiled()
+    def validate_datalayer_event(self, data_layer, event_name, expected_properties, check_user_ids=True, timeout=10):
         """Generic method to validate datalayer events
         Args:
-            data_layer: The dataLayer from the page
+            data_layer: A DataLayerRecorder (preferred, sees pushes made while waiting), the dataLayer
+                from the page, or a callable returning the current dataLayer
             event_name: Name of the GA4 event to validate (e.g. 'page_view', 'phone_click')
             expected_properties: Dictionary of expected key-value pairs in the event
             check_user_ids: Boolean indicating whether to check for user_id_ga and user_id_tealium
-            max_retries: Number of retries for checking dataLayer
+            timeout: Seconds to wait for the event to show up in the dataLayer
         """
-        for attempt in range(max_retries):
-            self.log_info(f"Validating datalayer {event_name} event (Attempt {attempt+1}/{max_retries})...")
-            if not data_layer:
+        if isinstance(data_layer, DataLayerRecorder):
+            def find_event():
+                return data_layer.find_event(event_name)
+        else:
+            if not callable(data_layer) and not data_layer:
                 assert False, "DataLayer is empty"
-                
-            for entry in data_layer:
-                if isinstance(entry, list) and entry[0] == "event" and entry[1] == event_name:
-                    data = entry[2]
-                    passed = True
-                    for k, v in expected_properties.items():
-                        self.log_assert(f"Checking dataLayer for {k}", k in data, f"Key '{k}' not found in dataLayer")
-                        self.log_assert(f"Checking dataLayer for {k}=={v}", data[k] == v, f"Value for '{k}' does not match expected value. Expected: {v}, Found: {data[k]}")
-
-                    # Check user IDs if required
-                    if check_user_ids:
-                        self.log_assert("Checking user_id_ga", data.get('user_id_ga') is not None, "user_id_ga not found in dataLayer.")
-                        self.log_assert("Checking user_id_tealium", data.get('user_id_tealium') is not None, "user_id_tealium not found in dataLayer.")
-                    
-                    return passed
-
-            if attempt < max_retries - 1:
-                self.log_info(f"GA4 {event_name} event not found, retrying...")
-                time.sleep(5)
-            
-        assert False, f"GA4 {event_name} event not found in dataLayer after {max_retries} attempts"
 
-    def validate_ga4_collect_event(self, proxy, event_name, expected_properties, max_retries=3):
+            def find_event():
+                entries = data_layer() if callable(data_layer) else data_layer
+                for entry in entries or []:
+                    if isinstance(entry, list) and len(entry) > 2 and entry[0] == "event" and entry[1] == event_name:
+                        return entry
+                return None
+
+        self.log_info(f"Validating datalayer {event_name} event...")
+        result = self.wait_for(f"dataLayer {event_name} event", find_event, timeout)
+        assert result.satisfied, f"GA4 {event_name} event not found in dataLayer after {timeout}s"
+
+        entry = result.value
+        # gtag pushes ['event', name, params]; GTM style pushes carry the params in the object itself
+        data = entry[2] if isinstance(entry, list) else entry
+        for k, v in expected_properties.items():
+            self.log_assert(f"Checking dataLayer for {k}", k in data, f"Key '{k}' not found in dataLayer")
+            self.log_assert(f"Checking dataLayer for {k}=={v}", data[k] == v, f"Value for '{k}' does not match expected value. Expected: {v}, Found: {data[k]}")
+
+        # Check user IDs if required
+        if check_user_ids:
+            self.log_assert("Checking user_id_ga", data.get('user_id_ga') is not None, "user_id_ga not found in dataLayer.")
+            self.log_assert("Checking user_id_tealium", data.get('user_id_tealium') is not None, "user_id_tealium not found in dataLayer.")
+
+        return True
+
+    @profiled()
+    def validate_ga4_collect_event(self, proxy, event_name, expected_properties, timeout=15, filters=None):
         """Generic method to validate GA4 collect network requests in HAR logs
         Args:
-            proxy: The proxy instance from setup_driver
+            proxy: The HarStream instance from setup_driver
             event_name: Name of the GA4 event to validate (e.g. 'page_view', 'phone_click')            
             expected_properties: Dictionary of expected key-value pairs in the request URL
-            max_retries: Number of retries for checking HAR logs
+            timeout: Seconds to wait for the request to show up in the HAR logs
+            filters: Hit parameters the request must also match, e.g. {'dl': url} when several tabs share the capture
         """
         target_url = "https://www.google-analytics.com/g/collect"
-        request_found = False
-        actual_request_url = None
-        all_requests = []
-
-        for attempt in range(max_retries):
-            self.log_info(f"Checking HAR logs (Attempt {attempt+1}/{max_retries})...")
-            har_dict = proxy.har  # Get the latest network logs
-            all_requests = []  # Reset all_requests for each attempt
-
-            for entry in har_dict['log']['entries']:
-                request = entry['request']
-                all_requests.append(request['url'])
-
-                if target_url in request['url'] and f"en={event_name}" in request['url']:
-                    actual_request_url = request['url']
-                    self.log_info(f"Request sent to: {actual_request_url}")
-                    request_found = True
-                    break
-
-            if request_found:
-                break  # Exit loop if request is found
-            self.log_info("GA4 collect request not found, retrying...")
-            time.sleep(5)  # Wait before retrying
+        hit_index = Ga4HitIndex.for_stream(proxy)
+
+        def find_hit():
+            proxy.poll()  # Fetch only the network logs added since the last poll
+            hit_index.sync(proxy)  # Parse and index the new GA4 hits
+            return hit_index.first(event_name, **(filters or {}))
+
+        self.log_info(f"Checking HAR logs for GA4 {event_name} request...")
+        hit = self.wait_for(f"GA4 {event_name} collect request", find_hit, timeout).value
+        if hit:
+            self.log_info(f"Request sent to: {hit.url}")
 
         # If no match found, show the requests we were searching through
-        if not request_found:
+        if not hit:
             self.log_info("=== No matching GA4 request found. All captured requests: ===")
-            for url in all_requests:
-                self.log_info(f"URL: {url}")
+            for entry in proxy.entries:
+                self.log_info(f"URL: {entry['request']['url']}")
 
-        self.log_assert(f"GA4 request found in HAR logs: {actual_request_url}", request_found, f"GA4 collect confirmation: no request found to {target_url}")
+        self.log_assert(f"GA4 request found in HAR logs: {hit.url if hit else None}", hit is not None, f"GA4 collect confirmation: no request found to {target_url}")
         
-        # Validate expected parameters in the request URL
-        for param, expected_value in expected_properties.items():
-            param_exists = f"{param}=" in actual_request_url
-            self.log_assert(
-                f"Checking GA4 request for {param}",
-                param_exists,
-                f"Parameter '{param}' not found in GA4 request URL"
-            )
-            # Extract the actual value from the URL
-            actual_value = urllib.parse.parse_qs(urllib.parse.urlparse(actual_request_url).query).get(param, [None])[0]
-            self.log_assert(
-                f"Checking GA4 request for {param}=={expected_value}",
-                actual_value == expected_value,
-                f"Value for '{param}' does not match expected value. Expected: {expected_value}, Found: {actual_value}"
-            )
-
-    def get_request_response_payload(self, proxy, url_path, max_retries=3):
+        # Validate expected parameters in the parsed hit (same checks as the offline replay in ga4_replay.py)
+        for title, passed, message in check_hit_params(hit, expected_properties):
+            self.log_assert(title, passed, message)
+
+    @profiled()
+    def get_request_response_payload(self, proxy, url_path, timeout=15):
         """
         Collect request and response payloads from HAR logs for a specific URL path.
         
         Args:
-            proxy: The BrowserMob proxy instance
+            proxy: The HarStream instance from setup_driver
             url_path: The URL path to search for in the HAR logs
-            max_retries: Number of times to retry checking the HAR logs
+            timeout: Seconds to wait for the request to show up in the HAR logs
             
         Returns:
             tuple: (request_payload, response_payload) if found, (None, None) if not found
         """
-        for attempt in range(max_retries):
-            har = proxy.har
-            
-            if not har or 'log' not in har or 'entries' not in har['log']:
-                self.log_info(f"No HAR entries found, attempt {attempt + 1}/{max_retries}")
-                time.sleep(5)
-                continue
-                
-            for entry in har['log']['entries']:
-                request = entry.get('request', {})
-                response = entry.get('response', {})
-                
-                # Check if this is the request we're looking for
-                if url_path in request.get('url', ''):
-                    self.log_info(f"Found matching request to {url_path}")
-                    
-                    # Get request payload
-                    request_payload = None
-                    if 'postData' in request:
-                        request_payload = request['postData'].get('text') or request['postData'].get('params')
-                        self.log_info(f"Request payload for {url_path}: {request_payload}")
-                    
-                    # Get response payload
-                    response_payload = None
-                    if 'content' in response:
-                        response_payload = response['content'].get('text')
-                        if response_payload:
-                            import base64
-                            try:
-                                decoded = base64.b64decode(response_payload).decode('utf-8')
-                                self.log_info(f"Response payload for {url_path}: {decoded}")
-                            except Exception as e:
-                                self.log_info(f"Could not decode response payload: {e}")
-                                decoded = response_payload
-                        else:
-                            decoded = None
-                            self.log_info(f"No response payload content for {url_path}")
-                    
-                    return request_payload, decoded
-            
-            if attempt < max_retries - 1:
-                self.log_info(f"Request to {url_path} not found in HAR logs, retrying...")
-                time.sleep(5)
-        
-        self.log_info(f"No matching request found for {url_path} after {max_retries} attempts")
-        return None, None
+        har_cursor = 0  # Position in the local HAR store; only entries after it are scanned
+        entry = None
+
+        def find_completed_entry():
+            nonlocal har_cursor, entry
+            proxy.poll()
+            if entry is None:
+                new_entries, har_cursor = proxy.since(har_cursor)
+                entry = next((e for e in new_entries if url_path in e.get('request', {}).get('url', '')), None)
+            # Both capture backends complete an in-flight entry in place once its response arrives or it fails
+            return entry if entry and is_complete(entry) else None
+
+        self.wait_for(f"response from {url_path}", find_completed_entry, timeout)
+        if not entry:
+            self.log_info(f"No matching request found for {url_path} after {timeout}s")
+            return None, None
+
+        request = entry.get('request', {})
+        response = entry.get('response', {})
+        self.log_info(f"Found matching request to {url_path}")
+        if response.get('_error'):
+            self.log_info(f"Request to {url_path} failed: {response['_error']}")
+
+        # Get request payload
+        request_payload = None
+        if 'postData' in request:
+            request_payload = request['postData'].get('text') or request['postData'].get('params')
+            self.log_info(f"Request payload for {url_path}: {request_payload}")
+
+        # Get response payload; only this entry's body is decoded
+        decoded = None
+        try:
+            decoded = response_body(entry)
+        except Exception as e:
+            self.log_info(f"Could not decode response payload: {e}")
+            decoded = response.get('content', {}).get('text')
+        if decoded:
+            self.log_info(f"Response payload for {url_path}: {decoded}")
+        else:
+            self.log_info(f"No response payload content for {url_path}")
+
+        return request_payload, decoded
@@ -0,0 +1,274 @@
+import json
+import logging
+import os
+
+import psutil
+import urllib3
+from selenium.common.exceptions import WebDriverException
+
+from .page_cache import PageCache
+from .profiler import profiled
+
+logger = logging.getLogger(__name__)
+
+# What Storage.clearDataForOrigin wipes on reset; cookies are cleared (and the seeded ones restored) separately
+CLEARED_STORAGE_TYPES = "local_storage,indexeddb,websql,cache_storage,service_workers,file_systems"
+# What a WebDriver call or proxy server raises once the browser, its driver or the proxy is gone
+SESSION_ERRORS = (WebDriverException, urllib3.exceptions.HTTPError, OSError)
+# What a DevTools command raises without DevTools: Firefox has no execute_cdp_cmd
+NO_DEVTOOLS_ERRORS = (AttributeError, WebDriverException)
+
+
+def process_tree(pid):
+    """Return psutil.Process objects for pid and all of its descendants (empty if it is gone)."""
+    try:
+        process = psutil.Process(pid)
+        return [process] + process.children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+def frame_origins(frame_tree):
+    """The web origins of a Page.getFrameTree frame and all of its child frames, without duplicates."""
+    origins = [frame_tree['frame'].get('securityOrigin', '')]
+    for child in frame_tree.get('childFrames', []):
+        origins.extend(frame_origins(child))
+    # about:blank and sandboxed frames have no web origin ("null", "://")
+    return [origin for origin in dict.fromkeys(origins) if origin.startswith(("http://", "https://"))]
+
+
+class BrowserSession:
+    """A WebDriver with its network capture, and the BrowserMob server behind it if any.
+
+    The session remembers every process it started (chromedriver or
+    geckodriver, the browser, the BrowserMob JVM) so that closing it only ever
+    kills its own processes.
+    """
+
+    def __init__(self, driver, proxy, server=None, browser="chrome", startup_time=None, profile=None):
+        self.driver = driver
+        self.proxy = proxy
+        self.server = server
+        self.profile = profile  # ProfileClone the browser started from, if any
+        self.browser = browser
+        self.startup_time = startup_time  # seconds, until the first test has recorded it
+        self.owned_processes = []
+        self.track_processes()
+
+    def track_processes(self):
+        """Record the process trees of the WebDriver service and the BrowserMob server."""
+        root_pids = []
+        service_process = getattr(getattr(self.driver, 'service', None), 'process', None)
+        if service_process:
+            root_pids.append(service_process.pid)
+        if self.server is not None and getattr(self.server, 'process', None):
+            root_pids.append(self.server.process.pid)
+        known = {(p.pid, p.create_time()) for p in self.owned_processes}
+        for pid in root_pids:
+            for process in process_tree(pid):
+                try:
+                    if (process.pid, process.create_time()) not in known:
+                        self.owned_processes.append(process)
+                except psutil.Error:
+                    pass
+
+    def memory_usage(self):
+        """Resident memory in bytes of the browser (its driver service and processes) and of the proxy (the BrowserMob JVM)."""
+        self.track_processes()  # Browsers start content processes as pages load
+        proxy_pids = set()
+        if self.server is not None and getattr(self.server, 'process', None):
+            proxy_pids = {process.pid for process in process_tree(self.server.process.pid)}
+        usage = {'browser_rss': 0, 'proxy_rss': 0}
+        for process in self.owned_processes:
+            try:
+                rss = process.memory_info().rss
+            except psutil.Error:
+                continue
+            usage['proxy_rss' if process.pid in proxy_pids else 'browser_rss'] += rss
+        return usage
+
+    def is_healthy(self):
+        """True if the browser answers WebDriver commands and the proxy server is still running."""
+        if self.server is not None and self.server.process.poll() is not None:
+            return False
+        try:
+            # Any cheap round trip will do; it raises if the browser or its driver is gone
+            _ = self.driver.current_url
+            return True
+        except SESSION_ERRORS as e:
+            logger.warning(f"Browser session is unhealthy: {e}")
+            return False
+
+    def reset(self, keep_page=False):
+        """Return the browser to a clean state without relaunching it.
+
+        Closes extra tabs, clears the storage of the origins in the current page
+        (see clear_storage), opens a blank tab, clears all cookies (restoring the
+        seeded ones of a profile snapshot) and starts a new HAR. With keep_page
+        only the extra tabs are closed, leaving the prepared page and its capture
+        for the next test.
+        """
+        driver = self.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        if keep_page:
+            return
+
+        PageCache.for_driver(driver).invalidate()
+
+        self.clear_storage()
+        driver.get("about:blank")
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except NO_DEVTOOLS_ERRORS:
+            driver.delete_all_cookies()
+        if self.profile is not None:
+            self.profile.restore_cookies(driver)
+        if self.proxy is not None:
+            self.proxy.new_har()
+
+    def clear_storage(self):
+        """Clear the web storage of the origins loaded in the current page.
+
+        With DevTools (Chrome) every frame's origin is cleared with
+        Storage.clearDataForOrigin, so third-party iframes are covered too;
+        otherwise only the top frame's local and session storage. Origins of
+        earlier pages that are not in the current one keep their storage.
+        """
+        driver = self.driver
+        driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+        try:
+            origins = frame_origins(driver.execute_cdp_cmd("Page.getFrameTree", {})['frameTree'])
+        except NO_DEVTOOLS_ERRORS:
+            return  # No DevTools (Firefox)
+        for origin in origins:
+            try:
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {'origin': origin, 'storageTypes': CLEARED_STORAGE_TYPES})
+            except WebDriverException as e:
+                logger.info(f"Could not clear the storage of {origin}: {e}")
+
+    def close(self):
+        """Quit the browser, stop the proxy server, kill whatever is left of the processes we started and drop the profile clone."""
+        self.track_processes()
+        try:
+            self.driver.quit()
+        except SESSION_ERRORS as e:
+            logger.warning(f"Error closing WebDriver: {e}")
+        if self.server is not None:
+            try:
+                self.server.stop()
+            except SESSION_ERRORS as e:
+                logger.warning(f"Error stopping BrowserMob Proxy: {e}")
+        for process in self.owned_processes:
+            try:
+                process.kill()
+            except psutil.Error:
+                pass
+        self.owned_processes = []
+        if self.profile is not None:
+            self.profile.remove()
+
+
+class BrowserPool:
+    """Session-wide pool of warm browser sessions.
+
+    Sessions are launched once and handed out again after a reset, instead of
+    relaunching Chrome and the proxy for every test module. Unhealthy sessions
+    are replaced on acquire. The pids of every process the pool owns are kept in
+    a pid file so that a later run can clean up after a crashed one without
+    touching processes started by anyone else.
+
+    Args:
+        launch: Callable returning a new BrowserSession
+        name: Name of the pool, used for the pid file (e.g. the xdist worker id)
+        size: Maximum number of sessions
+    """
+
+    def __init__(self, launch, name="master", size=1, pid_dir="."):
+        self.launch = launch
+        self.name = name
+        self.size = size
+        self.pid_file = os.path.join(pid_dir, f".browser_pool_{name}.pids")
+        self.sessions = []
+        self.idle = []
+        self.kill_stale_processes()
+
+    def kill_stale_processes(self):
+        """Kill processes recorded in the pid file by a previous run that did not shut down cleanly."""
+        if not os.path.exists(self.pid_file):
+            return
+        with open(self.pid_file) as pid_file:
+            stale = json.load(pid_file)
+        for pid, create_time in stale:
+            try:
+                process = psutil.Process(pid)
+                # A matching start time guarantees the pid was not reused by another process
+                if process.create_time() == create_time:
+                    logger.info(f"Killing stale process {pid} ({process.name()}) from a previous run")
+                    process.kill()
+            except psutil.Error:
+                pass
+        os.remove(self.pid_file)
+
+    def write_pid_file(self):
+        owned = []
+        for session in self.sessions:
+            for process in session.owned_processes:
+                try:
+                    owned.append([process.pid, process.create_time()])
+                except psutil.Error:
+                    pass
+        with open(self.pid_file, "w") as pid_file:
+            json.dump(owned, pid_file)
+
+    def start_session(self):
+        session = self.launch()
+        self.sessions.append(session)
+        self.write_pid_file()
+        return session
+
+    def replace_session(self, session):
+        logger.info("Replacing unhealthy browser session...")
+        self.sessions.remove(session)
+        session.close()
+        return self.start_session()
+
+    def warm(self):
+        """Launch sessions up front so the first test does not pay for startup."""
+        while len(self.sessions) < self.size:
+            self.idle.append(self.start_session())
+
+    @profiled("browser_pool:acquire")
+    def acquire(self):
+        """Return a healthy session in a clean state, launching one if none is idle."""
+        if self.idle:
+            session = self.idle.pop()
+        elif len(self.sessions) < self.size:
+            session = self.start_session()
+        else:
+            raise RuntimeError(f"All {self.size} browser sessions of pool {self.name} are in use")
+
+        if not session.is_healthy():
+            session = self.replace_session(session)
+        try:
+            session.reset(keep_page=PageCache.for_driver(session.driver).reusable)
+        except SESSION_ERRORS as e:
+            logger.warning(f"Could not reset browser session: {e}")
+            session = self.replace_session(session)
+            session.reset()
+        return session
+
+    def release(self, session):
+        if session in self.sessions:
+            self.idle.append(session)
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+        self.sessions = []
+        self.idle = []
+        if os.path.exists(self.pid_file):
+            os.remove(self.pid_file)
@@ -0,0 +1,147 @@
+import logging
+import os
+import re
+
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+# URL patterns use '*' as a wildcard and must match the whole URL, like Chrome's
+# Network.setBlockedURLs patterns. They are turned into regexes for BrowserMob.
+GA4_COLLECT_URLS = ("*/g/collect*",)
+LEAD_PROCESSING_URLS = ("*/proxy-lead-processing/*",)
+
+# Heavy resources no test looks at: images, video, fonts and ad/marketing pixels.
+# Analytics (google-analytics.com, googletagmanager.com) and Tealium are never blocked,
+# the dataLayer and GA4 checks depend on them.
+HEAVY_RESOURCE_EXTENSIONS = (
+    "jpg", "jpeg", "png", "gif", "webp", "avif", "ico",
+    "mp4", "webm", "m3u8",
+    "woff", "woff2", "ttf", "otf",
+)
+# The extension must end the URL's path, so a GA4 hit whose dl= parameter names a .png is not
+# blocked (wildcards cannot tell a query ending in .png apart; the proxy also spares recorded URLs)
+HEAVY_RESOURCE_URLS = tuple(
+    pattern for extension in HEAVY_RESOURCE_EXTENSIONS for pattern in (f"*.{extension}", f"*.{extension}?*")
+) + (
+    "*doubleclick.net/*", "*googleadservices.com/*", "*googlesyndication.com/*",
+    "*facebook.net/*", "*facebook.com/tr*", "*bat.bing.com/*", "*px.ads.linkedin.com/*",
+    "*analytics.tiktok.com/*", "*ads-twitter.com/*",
+)
+
+# Status BrowserMob answers blocked requests with
+BLOCKED_STATUS_CODE = 204
+
+
+def pattern_to_regex(pattern):
+    """Translate a '*' wildcard URL pattern into an equivalent regex (valid in Python and Java)."""
+    return ".*".join(re.escape(part) for part in pattern.split("*"))
+
+
+class CapturePolicy:
+    """Which requests the network capture keeps, which response bodies it keeps, and what it blocks.
+
+    Args:
+        record: URL patterns to keep in the HAR; None keeps every request
+        ignore: URL patterns dropped even if they match record
+        capture_bodies: URL patterns whose response bodies are kept; None keeps all of them
+        block: URL patterns the browser is not allowed to load at all (the proxy never blocks recorded URLs)
+        capture_binary: Ask BrowserMob to record binary bodies (images, fonts, ...) too
+    """
+
+    def __init__(self, name, record=None, ignore=(), capture_bodies=None, block=(), capture_binary=False):
+        self.name = name
+        self.record = record
+        self.ignore = tuple(ignore)
+        self.capture_bodies = capture_bodies
+        self.block = tuple(block)
+        self.capture_binary = capture_binary
+        self._record_re = self._compile(record)
+        self._ignore_re = self._compile(self.ignore)
+        self._bodies_re = self._compile(capture_bodies)
+
+    @staticmethod
+    def _compile(patterns):
+        if patterns is None:
+            return None
+        if not patterns:
+            return re.compile(r"(?!)")  # matches nothing
+        return re.compile("|".join(f"(?:{pattern_to_regex(pattern)})" for pattern in patterns))
+
+    def records(self, url):
+        if self._ignore_re.fullmatch(url):
+            return False
+        return self._record_re is None or bool(self._record_re.fullmatch(url))
+
+    def captures_body(self, url):
+        return self._bodies_re is None or bool(self._bodies_re.fullmatch(url))
+
+    def har_options(self):
+        """Options for proxy.new_har(). Content capture is only switched on if some body is kept."""
+        return {
+            'captureHeaders': True,
+            'captureContent': self.capture_bodies is None or bool(self.capture_bodies),
+            'captureBinaryContent': self.capture_binary,
+        }
+
+    def filter_entry(self, entry):
+        """Return entry without the response body unless this policy keeps it, or None if it is not recorded."""
+        url = entry.get('request', {}).get('url', '')
+        if not self.records(url):
+            return None
+        if not self.captures_body(url):
+            entry.get('response', {}).get('content', {}).pop('text', None)
+        return entry
+
+    def filter_entries(self, entries):
+        """Drop the entries this policy does not record and the response bodies it does not keep."""
+        return [entry for entry in entries if self.filter_entry(entry) is not None]
+
+    def block_regexes(self):
+        """The block patterns as BrowserMob blacklist regexes, which never match a URL this policy records."""
+        keep = "" if self.record is None else f"(?!(?:{'|'.join(pattern_to_regex(pattern) for pattern in self.record)})$)"
+        return [keep + pattern_to_regex(pattern) for pattern in self.block]
+
+    def apply_to_proxy(self, proxy):
+        """Block this policy's URLs on a BrowserMob proxy."""
+        for regexp in self.block_regexes():
+            proxy.blacklist(regexp, BLOCKED_STATUS_CODE)
+
+    def apply_to_driver(self, driver):
+        """Block this policy's URLs in Chrome itself (used with the cdp capture backend).
+
+        Chrome's blocklist has no exceptions, so unlike on the proxy a recorded URL
+        that also matches a block pattern (e.g. one whose query ends in .png) is blocked.
+        """
+        if not self.block:
+            return
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {'urls': list(self.block)})
+        except (AttributeError, WebDriverException) as e:
+            logger.warning(f"Could not block URLs for capture policy {self.name}: {e}")
+
+    def __repr__(self):
+        return f"CapturePolicy({self.name!r})"
+
+
+POLICIES = {
+    # Everything the proxy sees, with every body: the behaviour before capture policies
+    'full': CapturePolicy('full', capture_binary=True),
+    # Only what the tests assert on: GA4 hits and the lead-processing call (with its response)
+    'analytics': CapturePolicy('analytics', record=GA4_COLLECT_URLS + LEAD_PROCESSING_URLS, capture_bodies=LEAD_PROCESSING_URLS),
+    # Same, and the browser does not even download images, video, fonts and ad pixels
+    'lean': CapturePolicy('lean', record=GA4_COLLECT_URLS + LEAD_PROCESSING_URLS, capture_bodies=LEAD_PROCESSING_URLS,
+                          block=HEAVY_RESOURCE_URLS),
+}
+
+# 'full' unless asked otherwise: the other policies drop requests (and bodies) a test may look for
+CAPTURE_POLICY = os.environ.get("CAPTURE_POLICY", "full")
+
+
+def get_capture_policy(name=None):
+    """Return the named policy, by default the one selected with the CAPTURE_POLICY env var."""
+    name = name or CAPTURE_POLICY
+    if name not in POLICIES:
+        raise ValueError(f"Unknown capture policy {name!r}, expected one of {', '.join(POLICIES)}")
+    return POLICIES[name]
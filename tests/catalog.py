@@ -0,0 +1,147 @@
+import json
+import os
+import urllib.parse
+
+CATALOG_PATH = os.environ.get("CATALOG_PATH", os.path.join(os.path.dirname(__file__), "catalog.json"))
+
+# Points every URL of the catalog (pages and action parameters like the form
+# action) at another origin, e.g. the local stand-in site of the benchmarks
+SITE_BASE_URL = os.environ.get("SITE_BASE_URL")
+
+
+class PlanStep:
+    """One test case to run on an already loaded page: an optional action followed by its checks.
+
+    Attributes:
+        test_case: Test case name used in the metadata string (e.g. 'test_page_view')
+        event: GA4 event name validated in the dataLayer and the GA4 collect hits, if any
+        action: Name of a function in catalog_actions.ACTIONS to run before the checks, if any
+        action_params: Keyword arguments for the action
+        mutates_page: True if the action changes the page so that no other step can run after it
+        datalayer_properties: Expected key-value pairs of the dataLayer event
+        ga4_properties: Expected parameters of the GA4 collect hit
+        check_user_ids: Whether the dataLayer event must carry user_id_ga and user_id_tealium
+        title_contains: Text the page title must contain
+        element_ids: Ids of elements that must be on the page
+    """
+
+    def __init__(self, test_case, test_case_version="1.0.0", event=None, action=None, action_params=None,
+                 mutates_page=False, datalayer_properties=None, ga4_properties=None, check_user_ids=True,
+                 title_contains=None, element_ids=None):
+        self.test_case = test_case
+        self.test_case_version = test_case_version
+        self.event = event
+        self.action = action
+        self.action_params = action_params or {}
+        self.mutates_page = mutates_page
+        self.datalayer_properties = datalayer_properties or {}
+        self.ga4_properties = ga4_properties or {}
+        self.check_user_ids = check_user_ids
+        self.title_contains = title_contains
+        self.element_ids = element_ids or []
+
+    @classmethod
+    def from_check(cls, check):
+        return cls(check['test_case'], check.get('test_case_version', "1.0.0"),
+                   title_contains=check.get('title_contains'), element_ids=check.get('element_ids'))
+
+    @classmethod
+    def from_event(cls, event):
+        # One set of properties drives both checks: 'key' in the dataLayer and 'ep.key' in the GA4 hit
+        properties = event.get('properties', {})
+        return cls(
+            event['test_case'], event.get('test_case_version', "1.0.0"),
+            event=event['event'],
+            action=event.get('action'),
+            action_params=event.get('action_params'),
+            mutates_page=event.get('mutates_page', False),
+            datalayer_properties=event.get('datalayer', properties),
+            ga4_properties=event.get('ga4', {f"ep.{key}": value for key, value in properties.items()}),
+            check_user_ids=event.get('check_user_ids', True),
+        )
+
+    def __repr__(self):
+        return f"PlanStep({self.test_case!r}, event={self.event!r}, action={self.action!r})"
+
+
+class PagePlan:
+    """Every step to run against one URL, from a single navigation and HAR capture.
+
+    first_visit pages test what a new visitor sees, so they are never loaded
+    with the seeded cookies of a profile snapshot (see profile_snapshot.py).
+    """
+
+    def __init__(self, name, url, steps, first_visit=False):
+        self.name = name
+        self.url = url
+        self.steps = steps
+        self.first_visit = first_visit
+
+    def __repr__(self):
+        return f"PagePlan({self.name!r}, {len(self.steps)} steps)"
+
+
+def rebase_urls(value, base_url):
+    """Return value with the scheme and host of every http(s) URL in it replaced by those of base_url."""
+    if isinstance(value, dict):
+        return {key: rebase_urls(item, base_url) for key, item in value.items()}
+    if isinstance(value, list):
+        return [rebase_urls(item, base_url) for item in value]
+    if isinstance(value, str) and value.startswith(("http://", "https://")):
+        base = urllib.parse.urlsplit(base_url)
+        return urllib.parse.urlsplit(value)._replace(scheme=base.scheme, netloc=base.netloc).geturl()
+    return value
+
+
+def load_catalog(path=None, base_url=None):
+    """Load the catalog (CATALOG_PATH by default), rebased on base_url or SITE_BASE_URL if set."""
+    with open(path or CATALOG_PATH) as catalog_file:
+        catalog = json.load(catalog_file)
+    base_url = base_url or SITE_BASE_URL
+    return rebase_urls(catalog, base_url) if base_url else catalog
+
+
+def compile_plan(catalog):
+    """Turn the catalog into one PagePlan per page.
+
+    Steps are ordered so a single page load serves all of them: page checks
+    first, then events that need no interaction, then actions, and an action
+    that mutates the page (like submitting the form) last. Pages listed more
+    than once are merged. Only a page with several mutating steps gets more
+    than one plan, since each of those needs a fresh load.
+    """
+    pages = {}
+    first_visit_urls = set()
+    for page in catalog['pages']:
+        name, steps = pages.setdefault(page['url'], (page['name'], []))
+        steps.extend(PlanStep.from_check(check) for check in page.get('checks', []))
+        steps.extend(PlanStep.from_event(event) for event in page.get('events', []))
+        if page.get('first_visit'):
+            first_visit_urls.add(page['url'])
+
+    plans = []
+    for url, (name, steps) in pages.items():
+        first_visit = url in first_visit_urls
+        # sorted() is stable, so steps keep their catalog order within each group
+        steps = sorted(steps, key=lambda step: (step.event is not None, step.action is not None))
+        shared = [step for step in steps if not step.mutates_page]
+        mutating = [step for step in steps if step.mutates_page]
+        plans.append(PagePlan(name, url, shared + mutating[:1], first_visit))
+        for step in mutating[1:]:
+            plans.append(PagePlan(f"{name}:{step.test_case}", url, [step], first_visit))
+    return plans
+
+
+def ga4_expectations(catalog):
+    """The GA4 expectations of the catalog as dicts for ga4_replay (one per event, filtered by page location)."""
+    expectations = []
+    for plan in compile_plan(catalog):
+        for step in plan.steps:
+            if step.event:
+                expectations.append({
+                    'name': f"{plan.name}:{step.test_case}",
+                    'event': step.event,
+                    'params': step.ga4_properties,
+                    'filters': {'dl': plan.url},
+                })
+    return expectations
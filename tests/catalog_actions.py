@@ -0,0 +1,111 @@
+"""Page interactions referenced by name from the catalog ('action' of an event).
+
+Each action takes the running test instance, the driver and the proxy, plus the
+event's 'action_params' as keyword arguments, and logs its own asserts.
+"""
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from pages.hire_form_page import HireFormPage
+
+from .profiler import profiled
+
+
+class CatalogActionError(Exception):
+    """A catalog action could not interact with the page (e.g. fill_form could not set a field)."""
+
+
+def check_form_root(test, page):
+    form_root, = page.find_all(page.FORM_ROOT)
+    test.log_assert("Form element <rhcl-block-hero-form> detected", form_root is not None, "Form root not found")
+    test.log_assert("Shadow root detected", page.has_shadow_root(page.FORM_ROOT), "Shadow root not found")
+
+
+def check_filled_field(test, result, label):
+    """Log whether a field returned by fill_form got its value. A mismatch is logged but does not fail the test."""
+    try:
+        if result['error']:
+            raise CatalogActionError(result['error'])
+        test.log_assert(f"'{label}' field filled correctly", result['actual'] == result['expected'], f"Expected '{result['expected']}', but got '{result['actual']}'", capture=False)
+    except (AssertionError, CatalogActionError, KeyError) as e:
+        test.log_error(f"Error filling field '{label}': {e}")
+
+
+@profiled()
+def click_phone_link(test, driver, proxy):
+    """Click the phone number link in the hero form heading."""
+    page = HireFormPage(driver)
+    # The whole shadow path is resolved in one round trip and the elements are kept for the asserts and the click
+    _, phone_button, phone_link = page.find_all(page.FORM_ROOT, page.PHONE_BUTTON, page.PHONE_LINK)
+    check_form_root(test, page)
+    test.log_assert("Phone button detected", phone_button is not None, "Phone button not found")
+    test.log_assert("Phone button shadow root detected", page.has_shadow_root(page.PHONE_BUTTON), "Phone button shadow root not found")
+    test.log_assert("Phone link detected", phone_link is not None, "Phone link not found")
+    page.click_phone_link()
+    test.log_info(f"{test.metadata_string}| Phone link clicked")
+
+
+@profiled()
+def submit_hire_form(test, driver, proxy, form_fields, dropdowns, checkboxes, form_action_url):
+    """Fill in and submit the hire form, then wait for the thank you message and the form submission request."""
+    page = HireFormPage(driver)
+    check_form_root(test, page)
+
+    # Fill everything in a single script call
+    fill_results = test.fill_form(driver, form_fields, dropdowns, checkboxes)
+
+    for selector, value, label in form_fields:
+        check_filled_field(test, fill_results[label], label)
+
+    for selector, value, label in dropdowns:
+        dropdown = fill_results[label]
+        if dropdown['error']:
+            raise CatalogActionError(f"Could not fill the {label} drop down: {dropdown['error']}")
+        test.log_assert(f"{label} drop down filled correctly?", dropdown['actual'] == value, f"Expected '{value}', but got '{dropdown['actual']}'")
+
+    for selector, checked, label in checkboxes:
+        checkbox = fill_results[label]
+        if checkbox['error']:
+            raise CatalogActionError(f"Could not set the {label} checkbox: {checkbox['error']}")
+        test.log_assert(f"{label} checkbox checked?", checkbox['actual'] == checked, "Checkbox not checked" if checked else "Checkbox checked")
+
+    submit_button, page_form = page.find_all(page.SUBMIT_BUTTON, page.FORM)
+    test.log_assert("Submit button exists?", submit_button is not None, "Submit button not found")
+    test.log_assert("Form element <form> detected", page_form is not None, "Form element not found")
+
+    # Validate the form action
+    form_action = page.form_action()
+    test.log_assert("Form action URL is correct", form_action == form_action_url, f"Form action URL incorrect. Found: {form_action}")
+
+    # Scroll the submit button into view and wait for any animations to complete
+    page.scroll_to_submit()
+    WebDriverWait(driver, 5).until(EC.element_to_be_clickable(submit_button))
+    page.click(page.SUBMIT_BUTTON)
+
+    # Check for validation errors
+    test.log_info("Checking for validation errors...")
+    validation_errors = page.validation_errors()
+    test.log_info(f"Found {len(validation_errors)} validation errors")
+    for error in validation_errors:
+        test.log_info("Validation Error Details:")
+        test.log_info(f"Field: {error['field']}")
+        test.log_info(f"Full HTML: {error['outerHTML']}")
+        test.log_info(f"Inner HTML: {error['innerHTML']}")
+        test.log_info(f"Text Content: {error['textContent']}")
+        test.log_info(f"Shadow Content: {error['shadowContent']}")
+        test.log_info("---")
+    test.log_assert("No validation errors", len(validation_errors) == 0, "Validation errors found")
+
+    # Wait for the form to be submitted and check for success message
+    test.log_info("Waiting for thank you message...")
+    success_message = page.wait_for_thank_you(timeout=30)
+    test.log_assert("Success message displayed?", "Thank You" in success_message, f"Success message incorrect. Found: {success_message}")
+
+    # Waits for the form submission request to show up in the HAR logs
+    test.get_request_response_payload(proxy, form_action_url)
+
+
+ACTIONS = {
+    'click_phone_link': click_phone_link,
+    'submit_hire_form': submit_hire_form,
+}
@@ -0,0 +1,124 @@
+import datetime
+import json
+import logging
+
+from selenium.common.exceptions import WebDriverException
+
+from .har_stream import HarStream
+
+logger = logging.getLogger(__name__)
+
+# Bodies are only fetched for these resource types (the lead-processing call is an
+# XHR/fetch); scripts, images, documents and GA beacons are never downloaded twice.
+BODY_RESOURCE_TYPES = ('XHR', 'Fetch')
+
+
+def _headers_list(headers):
+    return [{'name': name, 'value': value} for name, value in (headers or {}).items()]
+
+
+class CdpNetworkCapture(HarStream):
+    """HarStream backed by Chrome's DevTools network events instead of BrowserMob Proxy.
+
+    Chrome must be started with the 'performance' log enabled (see setup_driver).
+    ``driver.get_log('performance')`` only returns the events logged since the
+    previous call, so every poll is incremental by construction. Requests are
+    turned into HAR-shaped entries when they are sent and completed in place as
+    their responses arrive, so validators consume them exactly like BrowserMob
+    entries.
+    """
+
+    def __init__(self, driver, body_resource_types=BODY_RESOURCE_TYPES, policy=None):
+        super().__init__(None, policy=policy)
+        self.driver = driver
+        self.body_resource_types = body_resource_types
+        self._pending = {}  # requestId -> entry still waiting for its response
+
+    @property
+    def proxy(self):
+        # No proxy in the loop; Chrome reports its own traffic
+        return None
+
+    def new_har(self, ref=None, options=None):
+        """Discard everything captured so far and start a new recording."""
+        self.driver.get_log('performance')
+        self._pending = {}
+        self._entries = []
+        self._offset = 0
+        self.generation += 1
+
+    def _drain(self):
+        new_entries = []
+        for log_entry in self.driver.get_log('performance'):
+            message = json.loads(log_entry['message'])['message']
+            method = message.get('method', '')
+            if not method.startswith('Network.'):
+                continue
+            params = message.get('params', {})
+            request_id = params.get('requestId')
+
+            if method == 'Network.requestWillBeSent':
+                previous = self._pending.pop(request_id, None)
+                if previous is not None and 'redirectResponse' in params:
+                    # Same requestId is reused for the next hop of a redirect
+                    self._set_response(previous, params['redirectResponse'])
+                if self.policy is not None and not self.policy.records(params['request'].get('url', '')):
+                    continue
+                entry = self._new_entry(params)
+                self._pending[request_id] = entry
+                new_entries.append(entry)
+            elif method == 'Network.responseReceived' and request_id in self._pending:
+                self._set_response(self._pending[request_id], params['response'])
+                self._pending[request_id]['_resourceType'] = params.get('type')
+            elif method == 'Network.loadingFinished' and request_id in self._pending:
+                self._finish_entry(request_id, self._pending.pop(request_id))
+            elif method == 'Network.loadingFailed' and request_id in self._pending:
+                self._pending.pop(request_id)['response']['_error'] = params.get('errorText')
+        return new_entries
+
+    def _new_entry(self, params):
+        request = params['request']
+        entry = {
+            'startedDateTime': datetime.datetime.fromtimestamp(params.get('wallTime', 0), datetime.UTC).isoformat(),
+            'request': {
+                'method': request.get('method'),
+                'url': request.get('url', ''),
+                'headers': _headers_list(request.get('headers')),
+            },
+            'response': {'status': 0, 'headers': [], 'content': {}},
+            '_requestId': params.get('requestId'),
+            '_resourceType': params.get('type'),
+        }
+        if request.get('hasPostData'):
+            post_data = request.get('postData')
+            if post_data is None:
+                post_data = self._cdp('Network.getRequestPostData', params['requestId']).get('postData')
+            entry['request']['postData'] = {'text': post_data}
+        return entry
+
+    def _set_response(self, entry, response):
+        entry['response'].update({
+            'status': response.get('status', 0),
+            'statusText': response.get('statusText', ''),
+            'headers': _headers_list(response.get('headers')),
+        })
+        entry['response']['content']['mimeType'] = response.get('mimeType')
+
+    def _finish_entry(self, request_id, entry):
+        if entry.get('_resourceType') not in self.body_resource_types:
+            return
+        if self.policy is not None and not self.policy.captures_body(entry['request']['url']):
+            return
+        body = self._cdp('Network.getResponseBody', request_id)
+        if 'body' in body:
+            # Like BrowserMob's captured content: text as it is, binary bodies base64 encoded
+            entry['response']['content']['text'] = body['body']
+            if body.get('base64Encoded'):
+                entry['response']['content']['encoding'] = 'base64'
+
+    def _cdp(self, command, request_id):
+        try:
+            return self.driver.execute_cdp_cmd(command, {'requestId': request_id})
+        except WebDriverException as e:
+            logger.info(f"{command} failed for request {request_id}: {e}")
+            return {}
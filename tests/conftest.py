@@ -0,0 +1,189 @@
+import functools
+import logging
+import os
+
+import pytest
+
+from .base_test import get_worker_id, launch_browser_session
+from .browser_pool import BrowserPool
+from .drivers import BROWSERS
+from .log_uploader import get_log_uploader
+from .profiler import (
+    PROFILE_TESTS,
+    RunProfile,
+    get_profiler,
+    record,
+    start_profile,
+    stop_profile,
+)
+from .results_reporter import ResultsPlugin, get_results_reporter
+from .results_store import RESULTS_DB, get_results_database
+from .smart_scheduler import SMART_SCHEDULER, SmartSchedulerPlugin, TestHistory
+from .structured_log import get_log_writer
+
+logger = logging.getLogger(__name__)
+
+
+def pytest_configure(config):
+    """Stream test results to the results service (server.py) when RESULTS_SERVER_URL is set, and
+    order and retry tests from the results store (smart_scheduler.py) when RESULTS_DB is set and
+    SMART_SCHEDULER=1."""
+    reporter = get_results_reporter()
+    # With pytest-xdist the workers report their own tests; the controller only relays them
+    is_xdist_controller = getattr(config.option, "numprocesses", None) and not os.environ.get("PYTEST_XDIST_WORKER")
+    if reporter is not None and not is_xdist_controller:
+        config.pluginmanager.register(ResultsPlugin(reporter, worker=get_worker_id()), "results_reporter")
+
+    # Order and retry tests from their history in the results store, only when asked to
+    database = get_results_database()
+    if database is not None and SMART_SCHEDULER:
+        history = TestHistory.from_database(database)
+        database.close()
+        config.pluginmanager.register(SmartSchedulerPlugin(history), "smart_scheduler")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Keep each phase's report on the item so fixtures can see the test's outcome."""
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
+
+
+def pytest_generate_tests(metafunc):
+    """Run the browser tests once per engine of BROWSERS. With a single engine the test ids stay unchanged."""
+    if "browser" in metafunc.fixturenames and len(BROWSERS) > 1:
+        metafunc.parametrize("browser", BROWSERS, indirect=True, scope="module")
+
+
+@pytest.fixture(scope="module")
+def browser(request):
+    """The browser engine of the test (see drivers.py)."""
+    return getattr(request, "param", BROWSERS[0])
+
+
+@pytest.fixture(scope="session")
+def browser_pools():
+    """Session-wide pools of warm browser sessions for this worker, one per engine, created on first use.
+
+    With pytest-xdist every worker process gets its own pools, and therefore its
+    own browsers and BrowserMob port block. Tests of different engines are
+    spread over the workers like any others, so the engines run side by side.
+    """
+    pools = {}
+    yield pools
+    for pool in pools.values():
+        pool.close()
+
+
+@pytest.fixture(scope="module")
+def browser_pool(browser_pools, browser):
+    """The pool of sessions of the module's browser engine."""
+    if browser not in browser_pools:
+        name = get_worker_id() if browser == BROWSERS[0] else f"{get_worker_id()}_{browser}"
+        browser_pools[browser] = BrowserPool(functools.partial(launch_browser_session, browser), name=name)
+    return browser_pools[browser]
+
+
+@pytest.fixture(scope="module")
+def setup_browsermob(browser_pool):
+    """Make sure this worker's browser session (and BrowserMob Proxy) is running before the module's tests.
+
+    Browser test modules use it with ``pytestmark = pytest.mark.usefixtures("setup_browsermob")``.
+
+    Yields (server, proxy); server is None with the cdp capture backend.
+    """
+    browser_pool.warm()
+    session = browser_pool.sessions[0]
+    yield session.server, session.proxy
+
+
+@pytest.fixture
+def setup_driver(browser_pool):
+    """Hand out a pooled WebDriver of the test's engine, reset to a blank tab with no cookies or storage and a new HAR.
+
+    If the previous test left a prepared page that nothing changed, the session
+    keeps it (and its HAR) so BaseTest.open_page can hand it to this test.
+    """
+    session = browser_pool.acquire()
+    yield session.driver, session.proxy
+    profiler = get_profiler()
+    if profiler is not None:
+        profiler.browser = session.browser
+        for name, value in session.memory_usage().items():
+            record(name, value)
+        # The first test on a session carries its startup time
+        if session.startup_time is not None:
+            record('browser_startup', session.startup_time)
+            session.startup_time = None
+    browser_pool.release(session)
+
+
+@pytest.fixture(autouse=True)
+def flush_logs():
+    """Write out the log records buffered during the test once it is over."""
+    yield
+    get_log_writer().flush()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def upload_logs():
+    """Upload this worker's log files once, when the session is over (UPLOAD_LOGS=1).
+
+    The log files grow with every test, so they are not uploaded per test.
+    """
+    yield
+    uploader = get_log_uploader()
+    if uploader is None:
+        return
+    get_log_writer().flush()
+    for file_name in get_log_writer().file_names:
+        uploader.submit(file_name)
+        logger.info(f"File {file_name} queued for upload to {uploader.bucket_name}.")
+    uploader.close()
+
+
+@pytest.fixture(scope="session")
+def run_profile():
+    """Profiles of every test of this worker, written to PROFILE_DIR when the session ends.
+
+    None unless PROFILE_TESTS=1 or RESULTS_DB is set: the test history of the
+    results store (results_store.py) is read from the profiles.
+    """
+    profile = RunProfile(worker=get_worker_id()) if PROFILE_TESTS or RESULTS_DB else None
+    yield profile
+    profile_file = profile.write() if profile is not None else None
+    if profile_file:
+        logger.info(f"Run profile written to {profile_file}")
+    database = get_results_database()
+    if database is not None:
+        # Keep the history queried by tests/results_store.py up to date
+        get_log_writer().flush()
+        log_files = [name for name in get_log_writer().file_names if name.endswith(".jsonl")]
+        database.ingest(log_files + ([profile_file] if profile_file else []))
+        database.close()
+
+
+def item_outcome(item):
+    """passed, failed, skipped or error (setup failed) from the reports made so far."""
+    setup, call = getattr(item, "rep_setup", None), getattr(item, "rep_call", None)
+    if setup is not None and setup.failed:
+        return "error"
+    if setup is not None and setup.skipped:
+        return "skipped"
+    return call.outcome if call is not None else None
+
+
+@pytest.fixture(autouse=True)
+def profile_test(request, run_profile):
+    """Time the steps of each test (see profiler.py) and log its summary when it is over."""
+    if run_profile is None:
+        yield
+        return
+    start_profile(request.node.nodeid)
+    yield
+    profiler = stop_profile()
+    if profiler is not None:  # None if the test managed the active profile itself
+        profiler.outcome = item_outcome(request.node)
+        logger.info(profiler.summary())
+        run_profile.add(profiler)
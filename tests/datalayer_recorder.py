@@ -0,0 +1,162 @@
+import logging
+import weakref
+
+from selenium.common.exceptions import WebDriverException
+
+from .waits import wait_until
+
+logger = logging.getLogger(__name__)
+
+# Installed at document start so it sees every push, including the ones made
+# before GTM loads. Each push is snapshotted at push time (later mutations of
+# the pushed object do not leak in) and buffered with a timestamp.
+RECORDER_SCRIPT = """
+(function () {
+    if (window.__dataLayerRecorder) return;
+    var recorder = window.__dataLayerRecorder = {
+        id: Date.now().toString(36) + Math.random().toString(36).slice(2),
+        events: []
+    };
+
+    function snapshot(value, depth, seen) {
+        if (typeof value === 'function') return undefined;
+        if (value === null || typeof value !== 'object') return value;
+        if (value === window) return '[window]';
+        if (typeof Node !== 'undefined' && value instanceof Node) return '[' + value.nodeName + ']';
+        if (depth > 8 || seen.indexOf(value) !== -1) return null;
+        seen.push(value);
+        var out;
+        if (Array.isArray(value) || Object.prototype.toString.call(value) === '[object Arguments]') {
+            out = [];
+            for (var i = 0; i < value.length; i++) out.push(snapshot(value[i], depth + 1, seen));
+        } else {
+            out = {};
+            for (var key in value) {
+                if (Object.prototype.hasOwnProperty.call(value, key)) {
+                    var item = snapshot(value[key], depth + 1, seen);
+                    if (item !== undefined) out[key] = item;
+                }
+            }
+        }
+        seen.pop();
+        return out;
+    }
+
+    function record(item) {
+        recorder.events.push({seq: recorder.events.length, t: Date.now(), data: snapshot(item, 0, [])});
+    }
+
+    function hook(dataLayer) {
+        if (!Array.isArray(dataLayer) || dataLayer.__recorded) return dataLayer;
+        for (var i = 0; i < dataLayer.length; i++) record(dataLayer[i]);
+        var push = dataLayer.push;
+        Object.defineProperty(dataLayer, '__recorded', {value: true});
+        dataLayer.push = function () {
+            for (var i = 0; i < arguments.length; i++) record(arguments[i]);
+            return push.apply(this, arguments);
+        };
+        return dataLayer;
+    }
+
+    recorder.hook = hook;
+    var current = hook(window.dataLayer || []);
+    var descriptor = Object.getOwnPropertyDescriptor(window, 'dataLayer');
+    if (descriptor && !descriptor.configurable) {
+        // Injected after the page declared `var dataLayer`: the property cannot be redefined,
+        // but the wrapped push records and a reassigned dataLayer is hooked on the next fetch
+        window.dataLayer = current;
+        return;
+    }
+    recorder.accessor = true;
+    Object.defineProperty(window, 'dataLayer', {
+        configurable: true,
+        get: function () { return current; },
+        set: function (value) { current = hook(value); }
+    });
+})();
+"""
+
+# Returns only the events recorded after the cursor, in a single round trip.
+# The recorder is (re)installed first, so this also works without CDP: in that
+# case the pushes made before the first fetch are seeded from window.dataLayer.
+FETCH_SCRIPT = RECORDER_SCRIPT + """
+var recorder = window.__dataLayerRecorder;
+if (!recorder.accessor) recorder.hook(window.dataLayer);
+var start = recorder.id === arguments[0] ? arguments[1] : 0;
+return {id: recorder.id, start: start, events: recorder.events.slice(start)};
+"""
+
+
+def get_event_name(data):
+    """Event name of a dataLayer entry: gtag style ['event', name, params] or GTM style {'event': name}."""
+    if isinstance(data, list) and len(data) > 1 and data[0] == "event":
+        return data[1]
+    if isinstance(data, dict):
+        return data.get('event')
+    return None
+
+
+class DataLayerRecorder:
+    """Incremental reader for the dataLayer pushes buffered by RECORDER_SCRIPT.
+
+    Every fetch only transfers the pushes made since the previous one. When the
+    page changes (navigation or refresh) the recorder id changes and the local
+    buffer starts over with the new page's pushes.
+    """
+
+    # One recorder per WebDriver, installed when the driver is created
+    _driver_recorders = weakref.WeakKeyDictionary()
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.page_id = None
+        self.events = []
+        self._by_name = {}
+
+    @classmethod
+    def for_driver(cls, driver):
+        """Return the recorder for a driver, installing it on first use."""
+        recorder = cls._driver_recorders.get(driver)
+        if recorder is None:
+            recorder = cls._driver_recorders[driver] = cls(driver)
+            recorder.install()
+        return recorder
+
+    def install(self):
+        """Register the recorder to run at document start on every page the driver loads."""
+        try:
+            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': RECORDER_SCRIPT})
+        except (AttributeError, WebDriverException) as e:
+            # Without CDP (e.g. Firefox) the recorder is injected on the first fetch of each page instead
+            logger.info(f"DataLayer recorder not installed at document start: {e}")
+
+    def fetch_new(self):
+        """Fetch the pushes recorded since the last fetch and return them."""
+        result = self.driver.execute_script(FETCH_SCRIPT, self.page_id, len(self.events))
+        if result['id'] != self.page_id:
+            self.page_id = result['id']
+            self.events = []
+            self._by_name = {}
+
+        new_events = result['events']
+        for event in new_events:
+            self.events.append(event)
+            name = get_event_name(event['data'])
+            if name is not None:
+                self._by_name.setdefault(name, []).append(event)
+        return new_events
+
+    @property
+    def data_layer(self):
+        """The dataLayer entries recorded on the current page so far."""
+        return [event['data'] for event in self.events]
+
+    def find_event(self, event_name):
+        """Fetch new pushes and return the first entry for event_name on the current page, or None."""
+        self.fetch_new()
+        events = self._by_name.get(event_name)
+        return events[0]['data'] if events else None
+
+    def wait_for_event(self, event_name, timeout=10):
+        """Block until event_name has been pushed; returns the WaitResult."""
+        return wait_until(lambda: self.find_event(event_name), timeout=timeout, description=f"dataLayer {event_name} event")
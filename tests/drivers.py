@@ -0,0 +1,156 @@
+"""WebDriver factories for the browser engines the suite runs on.
+
+BROWSERS (default "chrome") is a comma separated list of engines; with more
+than one, the catalog tests run once per engine (see the conftest). Every
+engine is launched with the same network capture wiring: the BrowserMob proxy,
+or with CAPTURE_BACKEND=cdp the Chrome DevTools network events. Engines
+without DevTools (Firefox) always use the proxy.
+"""
+import logging
+import os
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.proxy import Proxy, ProxyType
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.firefox.service import Service as FirefoxService
+
+from .capture_policy import get_capture_policy
+from .cdp_capture import CdpNetworkCapture
+from .datalayer_recorder import DataLayerRecorder
+from .profiler import instrument_driver
+
+logger = logging.getLogger(__name__)
+
+CHROMEDRIVER_PATH = "/usr/local/bin/chromedriver-linux64/chromedriver"
+CHROME_BINARY_PATH = "/opt/google/chrome/chrome-linux64/chrome"
+GECKODRIVER_PATH = "/usr/local/bin/geckodriver"
+# firefox-esr from the image's PATH unless set
+FIREFOX_BINARY_PATH = os.environ.get("FIREFOX_BINARY_PATH")
+
+# Network capture backend: "browsermob" (HAR recorded by the Java proxy) or
+# "cdp" (Chrome DevTools network events, no proxy or JVM in the loop)
+CAPTURE_BACKEND = os.environ.get("CAPTURE_BACKEND", "browsermob")
+
+BROWSERS = [name.strip() for name in os.environ.get("BROWSERS", "chrome").split(",") if name.strip()]
+
+WINDOW_WIDTH, WINDOW_HEIGHT = 1980, 1024
+
+
+def proxy_settings(proxy):
+    return Proxy({
+        "proxyType": ProxyType.MANUAL,
+        "httpProxy": proxy.proxy,
+        "sslProxy": proxy.proxy
+    })
+
+
+def start_chrome(proxy, capture_backend=CAPTURE_BACKEND, user_data_dir=None):
+    """Initialize Chrome WebDriver with the given network capture backend. Returns (driver, proxy).
+
+    user_data_dir is the profile to start from (see profile_snapshot.py), a new empty one if None.
+    """
+    logger.info(f"Starting a Chrome instance with {capture_backend} network capture...")
+    start_time = time.monotonic()
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--enable-javascript")
+    options.add_argument("--enable-cookies")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument(f"--window-size={WINDOW_WIDTH},{WINDOW_HEIGHT}")
+    if user_data_dir:
+        options.add_argument(f"--user-data-dir={user_data_dir}")
+    # Pages loading in background tabs (TabScheduler) must not be throttled
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36")
+
+    options.accept_insecure_certs = True
+    options.binary_location = CHROME_BINARY_PATH
+
+    # Console messages go into the failure artifacts (see failure_artifacts.py)
+    logging_prefs = {"browser": "ALL"}
+    if capture_backend == "cdp":
+        # Network.* events are read back from the performance log by CdpNetworkCapture
+        logging_prefs["performance"] = "ALL"
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    else:
+        # Chrome never proxies loopback by default; the benchmark stand-in site runs on 127.0.0.1
+        options.add_argument("--proxy-bypass-list=<-loopback>")
+        options.proxy = proxy_settings(proxy)
+    options.set_capability("goog:loggingPrefs", logging_prefs)
+    service = Service(CHROMEDRIVER_PATH)
+    driver = webdriver.Chrome(service=service, options=options)
+    # Every WebDriver round trip shows up as a 'webdriver:<command>' step in the test profiles
+    instrument_driver(driver)
+    if capture_backend == "cdp":
+        policy = get_capture_policy()
+        policy.apply_to_driver(driver)
+        proxy = CdpNetworkCapture(driver, policy=policy)
+        proxy.new_har()
+    # Record dataLayer pushes from document start on every page this driver loads
+    DataLayerRecorder.for_driver(driver)
+    logger.info(f"Chrome ready in {time.monotonic() - start_time:.2f}s")
+    return driver, proxy
+
+
+def start_firefox(proxy, capture_backend="browsermob", user_data_dir=None):
+    """Initialize Firefox WebDriver behind the BrowserMob proxy. Returns (driver, proxy).
+
+    Firefox has no DevTools protocol in Selenium, so the proxy records the HAR,
+    the capture policy blocks URLs on the proxy and the dataLayer recorder is
+    injected on its first fetch of each page instead of at document start.
+    Profile snapshots are Chrome user-data-dirs, so user_data_dir is ignored.
+    """
+    logger.info("Starting a Firefox instance with browsermob network capture...")
+    start_time = time.monotonic()
+    options = FirefoxOptions()
+    options.add_argument("-headless")
+    options.add_argument(f"--width={WINDOW_WIDTH}")
+    options.add_argument(f"--height={WINDOW_HEIGHT}")
+    options.accept_insecure_certs = True
+    if FIREFOX_BINARY_PATH:
+        options.binary_location = FIREFOX_BINARY_PATH
+    # Background tabs (TabScheduler) keep their timers, like Chrome's --disable-background-timer-throttling
+    options.set_preference("dom.min_background_timeout_value", 4)
+    options.set_preference("dom.timeout.enable_budget_timer_throttling", False)
+    # Like --proxy-bypass-list=<-loopback>: the benchmark stand-in site runs on 127.0.0.1
+    options.set_preference("network.proxy.allow_hijacking_localhost", True)
+    options.set_preference("network.proxy.no_proxies_on", "")
+    options.proxy = proxy_settings(proxy)
+    service = FirefoxService(GECKODRIVER_PATH)
+    driver = webdriver.Firefox(service=service, options=options)
+    instrument_driver(driver)
+    DataLayerRecorder.for_driver(driver)
+    logger.info(f"Firefox ready in {time.monotonic() - start_time:.2f}s")
+    return driver, proxy
+
+
+# name: (factory, capture backends the engine supports)
+DRIVER_FACTORIES = {
+    'chrome': (start_chrome, ("browsermob", "cdp")),
+    'firefox': (start_firefox, ("browsermob",)),
+}
+
+
+def capture_backend_for(browser, capture_backend=CAPTURE_BACKEND):
+    """The capture backend browser runs with: CAPTURE_BACKEND if it supports it, the proxy otherwise."""
+    _, backends = DRIVER_FACTORIES[browser]
+    if capture_backend in backends:
+        return capture_backend
+    logger.info(f"{browser} does not support the {capture_backend} capture backend, using {backends[0]}")
+    return backends[0]
+
+
+def start_browser(browser, proxy, capture_backend=CAPTURE_BACKEND, **options):
+    """Start the named engine with capture_backend (see capture_backend_for). Returns (driver, proxy)."""
+    if browser not in DRIVER_FACTORIES:
+        raise ValueError(f"Unknown browser {browser!r}, expected one of {', '.join(DRIVER_FACTORIES)}")
+    factory, _ = DRIVER_FACTORIES[browser]
+    return factory(proxy, capture_backend, **options)
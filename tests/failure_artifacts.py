@@ -0,0 +1,165 @@
+"""Debugging artifacts written only when a test fails.
+
+While a test runs, FailureArtifacts keeps a rolling window of the most recent
+network entries and dataLayer pushes. Feeding it is local only (it reads the
+HarStream and DataLayerRecorder buffers that the validators fill anyway), so a
+passing test pays no extra WebDriver round trips and writes nothing.
+
+On the first failure of a test it writes one zip bundle to ARTIFACT_DIR:
+
+    failure.json      test, reason, URL and time of the failure
+    har.json          the network window as a HAR, bodies trimmed to MAX_BODY_CHARS
+    datalayer.json    the dataLayer window
+    console.json      the browser console messages logged during the test
+    screenshot.png
+    dom.html          the page source, trimmed to MAX_DOM_CHARS
+    profile.json      the test profile so far (see profiler.py)
+"""
+import datetime
+import json
+import logging
+import os
+import re
+import zipfile
+from collections import deque
+
+from selenium.common.exceptions import WebDriverException
+
+from .datalayer_recorder import DataLayerRecorder
+from .profiler import get_profiler
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR", "artifacts")
+# Network entries / dataLayer pushes / console messages kept in the window
+ARTIFACT_WINDOW = int(os.environ.get("ARTIFACT_WINDOW", "200"))
+# Bundles per test; later failures of the same test are only logged
+ARTIFACTS_PER_TEST = int(os.environ.get("ARTIFACTS_PER_TEST", "1"))
+MAX_BODY_CHARS = 4096
+MAX_DOM_CHARS = 2_000_000
+
+
+def trim(text, limit):
+    if not isinstance(text, str) or len(text) <= limit:
+        return text
+    return text[:limit] + f"...[{len(text) - limit} chars trimmed]"
+
+
+def trim_entry(entry, max_body_chars=MAX_BODY_CHARS):
+    """Copy of a HAR entry with its request and response bodies cut to max_body_chars."""
+    entry = dict(entry)
+    request = entry['request'] = dict(entry.get('request', {}))
+    if request.get('postData'):
+        request['postData'] = dict(request['postData'], text=trim(request['postData'].get('text'), max_body_chars))
+    response = entry['response'] = dict(entry.get('response', {}))
+    if response.get('content'):
+        response['content'] = dict(response['content'], text=trim(response['content'].get('text'), max_body_chars))
+    return entry
+
+
+class FailureArtifacts:
+    """Rolling window of one test's network and dataLayer activity, flushed to a bundle on failure.
+
+    Args:
+        driver: The WebDriver instance
+        proxy: The HarStream (or CdpNetworkCapture) of the session
+        test_name: Used in the bundle file name
+        artifact_dir: Where bundles are written; created on the first failure only
+    """
+
+    def __init__(self, driver, proxy, test_name="test", artifact_dir=ARTIFACT_DIR, window=ARTIFACT_WINDOW, max_bundles=ARTIFACTS_PER_TEST):
+        self.driver = driver
+        self.proxy = proxy
+        self.test_name = test_name
+        self.artifact_dir = artifact_dir
+        self.max_bundles = max_bundles
+        self.network = deque(maxlen=window)
+        self.data_layer = deque(maxlen=window)
+        self.console = deque(maxlen=window)
+        self.bundles = []
+        self._network_cursor = (None, 0)  # (stream generation, entries seen)
+        self._data_layer_cursor = (None, 0)  # (recorder page id, events seen)
+        # Console messages are buffered by the driver until read; drop the previous test's
+        self._read_console()
+        self.console.clear()
+
+    def observe(self):
+        """Move the network entries and dataLayer pushes captured since the last call into the window.
+
+        Only reads local buffers, so it is cheap enough to call after every wait.
+        Entries survive the HAR being reset and pushes survive page reloads,
+        which both clear the buffers they come from.
+        """
+        if self.proxy is not None:
+            generation, cursor = self._network_cursor
+            if generation != self.proxy.generation:
+                cursor = 0
+            new_entries, cursor = self.proxy.since(cursor)
+            self.network.extend(new_entries)
+            self._network_cursor = (self.proxy.generation, cursor)
+
+        recorder = DataLayerRecorder.for_driver(self.driver)
+        page_id, cursor = self._data_layer_cursor
+        if page_id != recorder.page_id:
+            cursor = 0
+        self.data_layer.extend(recorder.events[cursor:])
+        self._data_layer_cursor = (recorder.page_id, len(recorder.events))
+
+    def _read_console(self):
+        try:
+            self.console.extend(self.driver.get_log('browser'))
+        except (AttributeError, WebDriverException) as e:
+            # Not every driver exposes the browser log (Firefox has no get_log)
+            logger.debug(f"Could not read the browser console: {e}")
+
+    def capture(self, reason):
+        """Write the failure bundle. Returns its path, or None once the test has max_bundles bundles."""
+        if len(self.bundles) >= self.max_bundles:
+            return None
+        # The failure may have happened before anything was polled; take what the browser has now
+        if self.proxy is not None:
+            self._safely("network entries", self.proxy.poll)
+        self._safely("dataLayer pushes", DataLayerRecorder.for_driver(self.driver).fetch_new)
+        self.observe()
+        self._read_console()
+
+        timestamp = datetime.datetime.now()
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        safe_name = re.sub(r"[^\w.-]+", "_", self.test_name)[:100]
+        path = os.path.join(self.artifact_dir, f"{timestamp.strftime('%Y%m%d%H%M%S')}_{safe_name}_{len(self.bundles) + 1}.zip")
+
+        failure = {
+            'test': self.test_name,
+            'reason': reason,
+            'url': self._safely("current URL", lambda: self.driver.current_url),
+            'timestamp': timestamp.isoformat(),
+        }
+        har = {'log': {'version': "1.2", 'creator': {'name': "rh-selenium", 'version': "1.0"},
+                       'entries': [trim_entry(entry) for entry in self.network]}}
+        screenshot = self._safely("screenshot", self.driver.get_screenshot_as_png)
+        dom = self._safely("DOM snapshot", lambda: trim(self.driver.page_source, MAX_DOM_CHARS))
+        profiler = get_profiler()
+
+        with zipfile.ZipFile(path + ".tmp", "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+            bundle.writestr("failure.json", json.dumps(failure, indent=2, default=str))
+            bundle.writestr("har.json", json.dumps(har, default=str))
+            bundle.writestr("datalayer.json", json.dumps(list(self.data_layer), default=str))
+            bundle.writestr("console.json", json.dumps(list(self.console), default=str))
+            if screenshot:
+                # PNGs are already compressed
+                bundle.writestr("screenshot.png", screenshot, compress_type=zipfile.ZIP_STORED)
+            if dom:
+                bundle.writestr("dom.html", dom)
+            if profiler is not None:
+                bundle.writestr("profile.json", json.dumps(profiler.as_dict()))
+        os.replace(path + ".tmp", path)
+        self.bundles.append(path)
+        return path
+
+    def _safely(self, description, func):
+        # A failing test may have left the browser unusable; the bundle gets whatever can still be read
+        try:
+            return func()
+        except Exception as e:
+            logger.warning(f"Failure artifacts: could not get {description}: {e}", exc_info=True)
+            return None
@@ -0,0 +1,164 @@
+import urllib.parse
+import weakref
+
+GA4_COLLECT_PATH = "/g/collect"
+
+
+class Ga4Hit:
+    """A single GA4 event sent to /g/collect, with its parameters parsed once."""
+
+    __slots__ = ('params', 'url')
+
+    def __init__(self, url, params):
+        self.url = url
+        self.params = params
+
+    @property
+    def event_name(self):
+        return self.params.get('en')
+
+    def get(self, name, default=None):
+        return self.params.get(name, default)
+
+    def __repr__(self):
+        return f"Ga4Hit(en={self.event_name!r}, url={self.url!r})"
+
+
+def is_ga4_collect_url(url):
+    """True if url is a GA4 collect endpoint (any GA host, e.g. www. or region1.google-analytics.com)."""
+    return urllib.parse.urlsplit(url).path == GA4_COLLECT_PATH
+
+
+def parse_ga4_hits(url, body=None):
+    """Parse a /g/collect request into one Ga4Hit per event.
+
+    GET hits carry a single event in the query string. POST hits batch several
+    events, one per line of the body; each line holds the event-specific
+    parameters and inherits the shared parameters from the query string.
+    """
+    shared = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query, keep_blank_values=True))
+    lines = [line for line in body.splitlines() if line.strip()] if body else []
+    if not lines:
+        return [Ga4Hit(url, shared)]
+
+    hits = []
+    for line in lines:
+        params = dict(shared)
+        params.update(urllib.parse.parse_qsl(line, keep_blank_values=True))
+        hits.append(Ga4Hit(url, params))
+    return hits
+
+
+def check_hit_params(hit, expected_properties):
+    """Compare a hit with the expected parameters.
+
+    Returns (title, passed, failure_message) tuples in the order and wording
+    used by BaseTest.validate_ga4_collect_event: a presence check then a value
+    check for every parameter.
+    """
+    checks = []
+    for param, expected_value in expected_properties.items():
+        checks.append((
+            f"Checking GA4 request for {param}",
+            param in hit.params,
+            f"Parameter '{param}' not found in GA4 request URL"
+        ))
+        actual_value = hit.get(param)
+        checks.append((
+            f"Checking GA4 request for {param}=={expected_value}",
+            actual_value == expected_value,
+            f"Value for '{param}' does not match expected value. Expected: {expected_value}, Found: {actual_value}"
+        ))
+    return checks
+
+
+class Ga4HitIndex:
+    """GA4 collect hits indexed by event name, measurement id, session id, page location and page load id.
+
+    Hits are parsed once when they are added, so event lookups and parameter
+    checks are dict lookups instead of substring matches over raw URLs.
+    """
+
+    INDEXED_PARAMS = ('en', 'tid', 'sid', 'dl', '_p')
+
+    # One index per HarStream, so every test reading the same capture shares the parsed hits
+    _stream_indexes = weakref.WeakKeyDictionary()
+
+    def __init__(self):
+        self.hits = []
+        self._index = {param: {} for param in self.INDEXED_PARAMS}
+        self._cursor = 0
+        self._generation = None
+
+    @classmethod
+    def for_stream(cls, stream):
+        """Return the shared index for a HarStream, creating it on first use."""
+        index = cls._stream_indexes.get(stream)
+        if index is None:
+            index = cls._stream_indexes[stream] = cls()
+        return index
+
+    def clear(self):
+        self.hits = []
+        self._index = {param: {} for param in self.INDEXED_PARAMS}
+        self._cursor = 0
+
+    def add_hit(self, hit):
+        self.hits.append(hit)
+        for param in self.INDEXED_PARAMS:
+            value = hit.params.get(param)
+            if value is not None:
+                self._index[param].setdefault(value, []).append(hit)
+
+    def add_url(self, url, body=None):
+        """Parse and index a collect request. Returns the hits added."""
+        hits = parse_ga4_hits(url, body)
+        for hit in hits:
+            self.add_hit(hit)
+        return hits
+
+    def add_entry(self, entry):
+        """Index a HAR entry if it is a GA4 collect request. Returns the hits added."""
+        request = entry.get('request', {})
+        url = request.get('url', '')
+        if not is_ga4_collect_url(url):
+            return []
+        body = (request.get('postData') or {}).get('text')
+        return self.add_url(url, body)
+
+    def sync(self, stream):
+        """Index the entries added to a HarStream since the last sync."""
+        if stream.generation != self._generation:
+            # The stream was reset with new_har(); start over
+            self.clear()
+            self._generation = stream.generation
+        new_entries, self._cursor = stream.since(self._cursor)
+        for entry in new_entries:
+            self.add_entry(entry)
+
+    def find(self, event_name=None, **params):
+        """Return the hits matching the event name and every given parameter, in capture order.
+
+        Indexed parameters narrow the search by lookup; any other parameter is
+        compared on the (already small) candidate list.
+        """
+        if event_name is not None:
+            params['en'] = event_name
+
+        candidates = None
+        for param in self.INDEXED_PARAMS:
+            if param in params:
+                bucket = self._index[param].get(params[param], [])
+                if candidates is None or len(bucket) < len(candidates):
+                    candidates = bucket
+        if candidates is None:
+            candidates = self.hits
+
+        return [hit for hit in candidates if all(hit.params.get(k) == v for k, v in params.items())]
+
+    def first(self, event_name=None, **params):
+        hits = self.find(event_name, **params)
+        return hits[0] if hits else None
+
+    def __len__(self):
+        return len(self.hits)
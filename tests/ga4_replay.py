@@ -0,0 +1,124 @@
+"""Offline GA4 validation: replay captured /g/collect hits against the expectations the browser tests assert.
+
+Usage:
+    python -m tests.ga4_replay ga_collect_urls.txt [capture.har ...] [--expectations expectations.json]
+
+Without --expectations the GA4 expectations of the test catalog (tests/catalog.json)
+are used. The expectations file holds a list of {"event": ..., "params": {...}}
+objects, optionally with "filters" ({"dl": ..., "sid": ...}) to pick the hit to check.
+"""
+import argparse
+import json
+import sys
+import time
+
+from .catalog import ga4_expectations, load_catalog
+from .ga4_hits import Ga4HitIndex, check_hit_params
+
+
+class Ga4Expectation:
+    """Parameters a GA4 event must carry, as passed to validate_ga4_collect_event."""
+
+    def __init__(self, event_name, expected_properties, filters=None, name=None):
+        self.event_name = event_name
+        self.expected_properties = expected_properties
+        self.filters = filters or {}
+        self.name = name or event_name
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['event'], data.get('params', {}), data.get('filters'), data.get('name'))
+
+
+class ReplayResult:
+    """Outcome of one expectation: the hit that was checked and every (title, passed, message) check."""
+
+    def __init__(self, expectation, hit, checks):
+        self.expectation = expectation
+        self.hit = hit
+        self.checks = checks
+
+    @property
+    def passed(self):
+        return self.hit is not None and all(passed for _, passed, _ in self.checks)
+
+    @property
+    def failures(self):
+        if self.hit is None:
+            return [f"No GA4 {self.expectation.event_name} request found"]
+        return [message for _, passed, message in self.checks if not passed]
+
+
+def load_urls(path, index=None):
+    """Index the collect URLs listed one per line in path (blank lines and # comments are skipped)."""
+    index = index if index is not None else Ga4HitIndex()
+    with open(path) as urls_file:
+        for line in urls_file:
+            url = line.strip()
+            if url and not url.startswith('#'):
+                index.add_url(url)
+    return index
+
+
+def load_har(path, index=None):
+    """Index the GA4 collect requests of a HAR file (BrowserMob export or browser devtools 'Save as HAR')."""
+    index = index if index is not None else Ga4HitIndex()
+    with open(path) as har_file:
+        har = json.load(har_file)
+    for entry in har.get('log', {}).get('entries', []):
+        index.add_entry(entry)
+    return index
+
+
+def load_captures(paths, index=None):
+    """Index every capture in paths; .har/.json files are read as HAR, anything else as a URL list."""
+    index = index if index is not None else Ga4HitIndex()
+    for path in paths:
+        if path.endswith(('.har', '.json')):
+            load_har(path, index)
+        else:
+            load_urls(path, index)
+    return index
+
+
+def load_expectations(path):
+    with open(path) as expectations_file:
+        return [Ga4Expectation.from_dict(data) for data in json.load(expectations_file)]
+
+
+def replay(index, expectations):
+    """Check each expectation against the first matching hit, like the live validator does."""
+    results = []
+    for expectation in expectations:
+        hit = index.first(expectation.event_name, **expectation.filters)
+        checks = check_hit_params(hit, expectation.expected_properties) if hit else []
+        results.append(ReplayResult(expectation, hit, checks))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate captured GA4 hits without a browser.")
+    parser.add_argument("captures", nargs="+", help="HAR files (.har/.json) or text files with one collect URL per line")
+    parser.add_argument("--expectations", help="JSON list of {event, params, filters} expectations (default: the test catalog)")
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    index = load_captures(args.captures)
+    if args.expectations:
+        expectations = load_expectations(args.expectations)
+    else:
+        expectations = [Ga4Expectation.from_dict(data) for data in ga4_expectations(load_catalog())]
+    results = replay(index, expectations)
+    elapsed = time.perf_counter() - start_time
+
+    for result in results:
+        print(f"{'PASS' if result.passed else 'FAIL'}  {result.expectation.name}")
+        for failure in result.failures:
+            print(f"      {failure}")
+    failed = sum(not result.passed for result in results)
+    print(f"{len(index)} hits, {len(results)} expectations, {failed} failed in {elapsed * 1000:.1f}ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""Captured GA4 hits shipped with the repo and what the catalog expects of them, shared by the replay tests."""
+import os
+
+GA_COLLECT_URLS_FILE = os.path.join(os.path.dirname(__file__), '..', 'ga_collect_urls.txt')
+
+# Same expectations as the page_view event of the hire_now page in catalog.json
+PAGE_VIEW_PARAMS = {
+    "ep.page_topic": "lead form page",
+    "ep.page_section": "performance landing pages",
+    "ep.page_user_type": "client",
+    "ep.page_zone": "7i2dtn"
+}
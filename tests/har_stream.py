@@ -0,0 +1,362 @@
+import base64
+import codecs
+import json
+import logging
+import os
+import time
+
+import requests
+
+from .profiler import profiled, record
+
+# Entries kept in the local store; older ones are dropped so long sessions stay bounded
+MAX_HAR_ENTRIES = int(os.environ.get("MAX_HAR_ENTRIES", "5000"))
+# Bytes read from the proxy at a time while parsing a HAR
+HAR_CHUNK_SIZE = 64 * 1024
+HAR_READ_TIMEOUT = 30
+# The proxy's HAR is rotated once a read finds this many entries or bytes in it, and none of its
+# entries is still in flight; a single page load is usually over both
+HAR_ROTATE_AFTER = int(os.environ.get("HAR_ROTATE_AFTER", "50"))
+HAR_ROTATE_BYTES = int(os.environ.get("HAR_ROTATE_BYTES", str(256 * 1024)))
+# Past this size the HAR is rotated even with entries in flight; their responses are lost
+HAR_MAX_BYTES = int(os.environ.get("HAR_MAX_BYTES", str(4 * 1024 * 1024)))
+# Seconds a request may stay in flight before it no longer holds up the rotation (e.g. an aborted one)
+HAR_IN_FLIGHT_TIMEOUT = 10
+WHITESPACE = " \t\r\n"
+
+logger = logging.getLogger(__name__)
+
+
+class JsonChunkReader:
+    """Reads JSON values one at a time from an iterator of text chunks.
+
+    Only the value being parsed (plus at most one chunk) is held in memory,
+    which lets a HAR be consumed entry by entry while it is still downloading.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+
+    def _fill(self, min_size=1):
+        """Read chunks until at least min_size characters are unread. False once the input is exhausted."""
+        pending = [self.buffer[self.pos:]]
+        size = len(pending[0])
+        read = False
+        for chunk in self._chunks:
+            pending.append(chunk)
+            size += len(chunk)
+            read = True
+            if size >= min_size:
+                break
+        self.buffer = "".join(pending)
+        self.pos = 0
+        return read
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it (None at the end of the input)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed HAR: expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def skip(self, char):
+        """Consume char if it is next. Returns whether it was."""
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self):
+        """Parse and return the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Incomplete value: read at least as much again, so a large value is parsed a bounded number of times
+                if not self._fill(2 * (len(self.buffer) - self.pos)):
+                    raise
+                continue
+            if end == len(self.buffer) and self._fill():
+                continue  # a number at the end of the buffer may go on in the next chunk
+            self.pos = end
+            return value
+
+    def object_keys(self):
+        """Yield the keys of the object that comes next; the caller reads (or skips) each value."""
+        self.expect('{')
+        if self.skip('}'):
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if not self.skip(','):
+                self.expect('}')
+                return
+
+    def array_items(self):
+        """Yield the values of the array that comes next."""
+        self.expect('[')
+        if self.skip(']'):
+            return
+        while True:
+            yield self.value()
+            if not self.skip(','):
+                self.expect(']')
+                return
+
+
+def iter_har_entries(chunks):
+    """Yield the entries of a HAR document given as an iterator of text chunks, as they are parsed."""
+    reader = JsonChunkReader(chunks)
+    for key in reader.object_keys():
+        if key != 'log':
+            reader.value()
+            continue
+        for log_key in reader.object_keys():
+            if log_key == 'entries':
+                yield from reader.array_items()
+            else:
+                reader.value()  # version, creator, pages, ...
+
+
+def response_body(entry):
+    """The response body of a HAR entry as text, or None if it was not captured.
+
+    Bodies stay as captured (plain text, or base64 for binary content) until
+    an entry is actually inspected.
+    """
+    content = entry.get('response', {}).get('content', {})
+    text = content.get('text')
+    if text and content.get('encoding') == 'base64':
+        return base64.b64decode(text).decode('utf-8', errors='replace')
+    return text
+
+
+def is_complete(entry):
+    """True once the entry's response has arrived or its request failed.
+
+    In-flight entries have no status, or 0. A failed request keeps status 0, so
+    both backends mark it with the error text in response['_error'] instead.
+    """
+    response = entry.get('response', {})
+    return bool(response.get('status') or response.get('_error'))
+
+
+def entry_key(entry):
+    """Identifies an entry across reads of the same HAR."""
+    request = entry.get('request', {})
+    return request.get('method'), request.get('url'), entry.get('startedDateTime')
+
+
+class HarStream:
+    """Incremental view over the HAR recorded by a BrowserMob proxy.
+
+    BrowserMob only exposes the full HAR over REST, so every poll downloads
+    and parses the proxy's current HAR, including the entries read before.
+    To keep that from growing with the session, the entries read are appended
+    to a local store that the validators query, and the proxy's HAR is rotated
+    (``PUT /proxy/<port>/har`` starts a new HAR and returns the previous one)
+    once a read finds rotate_after entries or rotate_bytes bytes in it.
+
+    BrowserMob adds an entry when its request is sent and fills in the
+    response later, but only in the HAR it was added to. An entry still in
+    flight when that HAR is rotated would never be completed, so the HAR is
+    not rotated while any entry read from it is in flight. Such entries are
+    stored as they are and completed in place (matched by request and
+    startedDateTime) when a later read has their response, the way the CDP
+    backend completes its entries.
+
+    So a poll downloads what the proxy recorded since the last rotation:
+    about rotate_bytes (bodies included, under the 'full' capture policy),
+    plus whatever arrives while an entry is in flight. An entry that never
+    completes holds the rotation up for HAR_IN_FLIGHT_TIMEOUT seconds, and
+    past max_har_bytes the HAR is rotated anyway. A request sent between the
+    last read and a rotation is read without its response.
+
+    The HAR is parsed while it downloads (see iter_har_entries) and an
+    optional CapturePolicy decides, entry by entry, which entries (and which
+    response bodies) are kept in the local store. So a body the policy drops is
+    never held in memory together with the rest of the HAR. The store keeps at
+    most max_entries entries.
+    """
+
+    def __init__(self, proxy, har_options=None, policy=None, max_entries=MAX_HAR_ENTRIES, rotate_after=HAR_ROTATE_AFTER,
+                 rotate_bytes=HAR_ROTATE_BYTES, max_har_bytes=HAR_MAX_BYTES):
+        self._proxy = proxy
+        self.har_options = har_options or {}
+        self.policy = policy
+        self.max_entries = max_entries
+        self.rotate_after = rotate_after
+        self.rotate_bytes = rotate_bytes
+        self.max_har_bytes = max_har_bytes
+        self._entries = []
+        self._offset = 0  # entries dropped from the front of the store
+        self._read = 0  # entries of the proxy's current HAR already read
+        self._har_bytes = 0  # size of the proxy's current HAR at the last read
+        self._in_flight = {}  # entry_key -> (stored entry without a response yet, time it was read)
+        # Bumped on every new_har() so readers holding a cursor can detect a reset.
+        self.generation = 0
+
+    def __getattr__(self, name):
+        # Anything not handled here (blacklist, whitelist, close, ...) goes to the proxy client.
+        return getattr(self._proxy, name)
+
+    @property
+    def proxy(self):
+        """Address of the underlying proxy, as used in the WebDriver proxy config."""
+        return self._proxy.proxy
+
+    def new_har(self, ref=None, options=None):
+        """Start a new HAR on the proxy and clear the local entry store."""
+        if options is not None:
+            self.har_options = options
+        self._proxy.new_har(ref, options=self.har_options)
+        self._entries = []
+        self._offset = 0
+        self._read = 0
+        self._har_bytes = 0
+        self._in_flight = {}
+        self.generation += 1
+
+    def _drain(self):
+        """Read the proxy HAR and return the entries recorded since the previous read.
+
+        Entries read before whose response has arrived since are completed in place.
+        """
+        now = time.monotonic()
+        for key, (_, read_at) in list(self._in_flight.items()):
+            if now - read_at > HAR_IN_FLIGHT_TIMEOUT:
+                logger.warning(f"{key[0]} {key[1]} still in flight after {HAR_IN_FLIGHT_TIMEOUT}s, no longer waiting for it")
+                del self._in_flight[key]
+        over_budget = self._read >= self.rotate_after or self._har_bytes >= self.rotate_bytes
+        rotate = over_budget and (not self._in_flight or self._har_bytes >= self.max_har_bytes)
+        if rotate and self._in_flight:
+            logger.warning(f"HAR holds {self._har_bytes} bytes, rotating it with {len(self._in_flight)} requests still in flight")
+            self._in_flight = {}
+
+        kept = []
+        count = 0
+        for index, entry in enumerate(self._read_har(rotate)):
+            count = index + 1
+            if index < self._read:
+                # Read before; only a response that arrived since is news
+                if self._in_flight and is_complete(entry):
+                    self._complete(entry)
+                continue
+            if self.policy is not None:
+                entry = self.policy.filter_entry(entry)
+            if entry is None:
+                continue
+            if not is_complete(entry):
+                if rotate:
+                    # Sent between the last read and the rotation; its response goes to the discarded HAR
+                    logger.warning(f"{entry['request'].get('url')} was in flight when the HAR was rotated")
+                else:
+                    self._in_flight[entry_key(entry)] = (entry, now)
+            kept.append(entry)
+        if rotate:
+            self._read = self._har_bytes = 0
+        else:
+            self._read = count
+        return kept
+
+    def _complete(self, entry):
+        stored, _ = self._in_flight.pop(entry_key(entry), (None, None))
+        if stored is None:
+            return
+        if self.policy is not None:
+            entry = self.policy.filter_entry(entry)
+        # In place, so whoever holds the stored entry (e.g. a validator waiting for it) sees the response
+        stored.clear()
+        stored.update(entry)
+
+    def _read_har(self, rotate=False):
+        """Yield the entries of the proxy's current HAR, starting a new one on the proxy if rotate."""
+        host = getattr(self._proxy, 'host', None)
+        if host is None:
+            # Not a BrowserMob client; use its new_har() and har as they are
+            if rotate:
+                status_code, har = self._proxy.new_har(options=self.har_options)
+            else:
+                status_code, har = 200, self._proxy.har
+            if status_code != 200 or not har:
+                logger.warning(f"Could not read HAR from proxy (status {status_code})")
+                return
+            self._har_bytes = len(json.dumps(har))
+            record("har_bytes", self._har_bytes)
+            yield from har.get('log', {}).get('entries', [])
+            return
+
+        # Same requests as Client.har and Client.new_har(), but the response is parsed as it streams in
+        url = f"{host}/proxy/{self._proxy.port}/har"
+        if rotate:
+            response = requests.put(url, data=self.har_options, stream=True, timeout=HAR_READ_TIMEOUT)
+        else:
+            response = requests.get(url, stream=True, timeout=HAR_READ_TIMEOUT)
+        with response:
+            if response.status_code != 200:
+                logger.warning(f"Could not read HAR from proxy (status {response.status_code})")
+                return
+            har_bytes = 0
+            decoder = codecs.getincrementaldecoder("utf-8")()
+
+            def chunks():
+                nonlocal har_bytes
+                for chunk in response.iter_content(HAR_CHUNK_SIZE):
+                    har_bytes += len(chunk)
+                    yield decoder.decode(chunk)
+                yield decoder.decode(b"", final=True)
+
+            yield from iter_har_entries(chunks())
+            # Size of what the proxy handed over, before the capture policy drops anything
+            self._har_bytes = har_bytes
+            record("har_bytes", har_bytes)
+
+    @profiled("har:poll")
+    def poll(self):
+        """Fetch the entries added since the last poll and append them to the local store.
+
+        Entries still in flight are stored too; they get their response on a later poll.
+        """
+        new_entries = self._drain()
+        self._entries.extend(new_entries)
+        if len(self._entries) > self.max_entries:
+            dropped = len(self._entries) - self.max_entries
+            del self._entries[:dropped]
+            self._offset += dropped
+        record("har_entries", len(new_entries))
+        return new_entries
+
+    @property
+    def entries(self):
+        """The entries recorded since the last new_har() (at most max_entries), without polling the proxy."""
+        return self._entries
+
+    def since(self, cursor):
+        """Return (entries added after cursor, new cursor) from the local store.
+
+        Cursors count every entry since new_har(), including the ones dropped
+        from the front of the store.
+        """
+        start = max(cursor - self._offset, 0)
+        return self._entries[start:], self._offset + len(self._entries)
+
+    @property
+    def har(self):
+        """Poll the proxy and return the accumulated HAR in the usual ``{'log': {'entries': [...]}}`` shape."""
+        self.poll()
+        return {'log': {'entries': list(self._entries)}}
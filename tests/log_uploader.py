@@ -0,0 +1,184 @@
+import atexit
+import gzip
+import itertools
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Uploads are opt-in so local runs never touch the network
+UPLOAD_LOGS = os.environ.get("UPLOAD_LOGS") == "1"
+LOG_BUCKET_NAME = os.environ.get("LOG_BUCKET_NAME", "automation-qa-logs")
+LOG_SPOOL_DIR = os.environ.get("LOG_SPOOL_DIR", ".log_spool")
+# Holds the pid of the process a spooled run directory belongs to
+OWNER_FILE = ".owner"
+
+
+def make_storage_client():
+    """Create a GCS client; talks to a local emulator (e.g. fake-gcs-server) when STORAGE_EMULATOR_HOST is set."""
+    from google.cloud import storage
+    if os.environ.get("STORAGE_EMULATOR_HOST"):
+        from google.auth.credentials import AnonymousCredentials
+        return storage.Client(project="automation-qa", credentials=AnonymousCredentials())
+    return storage.Client()
+
+
+def object_name(spool_path):
+    """Name a spooled file is uploaded under: its spool name without the sequence number."""
+    return os.path.basename(spool_path).split('.', 1)[1]
+
+
+class LogUploader:
+    """Uploads log files to GCS from a background thread.
+
+    submit() gzips the file into a spool directory, grouped per run, and
+    returns; the upload itself happens on the uploader thread, which reuses a
+    single storage client and retries with exponential backoff. Every submit
+    gets its own spool file, '<sequence>.<file>.gz', so submitting the same
+    file again never overwrites a copy still waiting for upload; the object
+    name is the part after the sequence number. A spooled file
+    is only deleted once it is uploaded, so files left behind by a crashed run
+    are picked up again by the next one.
+
+    Args:
+        bucket_name: Destination bucket
+        spool_dir: Local directory holding compressed files until they are uploaded
+        run_id: Identifier of this run; objects are stored as <run_id>/<file>.gz
+        client_factory: Callable returning a google.cloud.storage.Client
+        max_attempts: Upload attempts per file before leaving it in the spool
+        retry_delay: Delay before the first retry, doubled after each failure
+    """
+
+    def __init__(self, bucket_name=LOG_BUCKET_NAME, spool_dir=LOG_SPOOL_DIR, run_id=None,
+                 client_factory=make_storage_client, max_attempts=5, retry_delay=1.0):
+        self.bucket_name = bucket_name
+        self.spool_dir = spool_dir
+        self.run_id = run_id or f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.client_factory = client_factory
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.uploaded = []
+        self.failed = []
+        self._bucket = None
+        self._queue = queue.Queue()
+        self._sequence = itertools.count(1)
+        self._thread = threading.Thread(target=self._run, name="log-uploader", daemon=True)
+        self._thread.start()
+        self.recover()
+
+    def recover(self):
+        """Queue the files a previous run spooled but never uploaded."""
+        if not os.path.isdir(self.spool_dir):
+            return
+        for run_dir in sorted(os.listdir(self.spool_dir)):
+            run_path = os.path.join(self.spool_dir, run_dir)
+            if run_dir == self.run_id or not os.path.isdir(run_path) or self._owner_alive(run_path):
+                continue
+            # Claim the directory with an atomic rename so parallel workers never upload it twice
+            claimed_path = os.path.join(self.spool_dir, f"{run_dir.split('.')[0]}.{self.run_id}")
+            try:
+                os.rename(run_path, claimed_path)
+            except OSError:
+                continue
+            self._write_owner(claimed_path)
+            spooled = sorted(name for name in os.listdir(claimed_path) if name != OWNER_FILE)
+            if not spooled:
+                shutil.rmtree(claimed_path, ignore_errors=True)
+            for file_name in spooled:
+                logger.info(f"Re-queueing spooled log {run_dir}/{file_name} from a previous run")
+                self._queue.put(os.path.join(claimed_path, file_name))
+
+    def submit(self, file_name):
+        """Compress file_name into the spool and queue it for upload. Never blocks on the network."""
+        run_path = os.path.join(self.spool_dir, self.run_id)
+        if not os.path.isdir(run_path):
+            os.makedirs(run_path)
+            self._write_owner(run_path)
+        spool_name = f"{next(self._sequence):06d}.{os.path.basename(file_name)}.gz"
+        spool_path = os.path.join(run_path, spool_name)
+        with open(file_name, "rb") as source, gzip.open(spool_path, "wb") as target:
+            shutil.copyfileobj(source, target)
+        self._queue.put(spool_path)
+        return spool_path
+
+    def close(self, timeout=30):
+        """Wait up to timeout seconds for queued uploads. Anything left stays in the spool for the next run."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.1)
+        if self._queue.unfinished_tasks:
+            logger.warning(f"{self._queue.unfinished_tasks} log uploads still pending; they stay in {self.spool_dir}")
+
+    def _write_owner(self, run_path):
+        with open(os.path.join(run_path, OWNER_FILE), "w") as owner_file:
+            owner_file.write(str(os.getpid()))
+
+    def _owner_alive(self, run_path):
+        """True if the process that spooled run_path (e.g. a parallel worker) is still running."""
+        try:
+            with open(os.path.join(run_path, OWNER_FILE)) as owner_file:
+                return psutil.pid_exists(int(owner_file.read()))
+        except (OSError, ValueError):
+            return False
+
+    def _get_bucket(self):
+        if self._bucket is None:
+            self._bucket = self.client_factory().bucket(self.bucket_name)
+        return self._bucket
+
+    def _upload(self, spool_path):
+        # Recovered files sit in '<original run id>.<claiming run id>'
+        run_dir = os.path.basename(os.path.dirname(spool_path)).split('.')[0]
+        blob = self._get_bucket().blob(f"{run_dir}/{object_name(spool_path)}")
+        blob.content_encoding = "gzip"
+        blob.upload_from_filename(spool_path, content_type="application/x-ndjson")
+
+    def _run(self):
+        while True:
+            spool_path = self._queue.get()
+            try:
+                delay = self.retry_delay
+                for attempt in range(1, self.max_attempts + 1):
+                    try:
+                        self._upload(spool_path)
+                        os.remove(spool_path)
+                        run_path = os.path.dirname(spool_path)
+                        # Recovered directories go away once empty; this run's own one is still in use
+                        if os.path.basename(run_path) != self.run_id and os.listdir(run_path) == [OWNER_FILE]:
+                            shutil.rmtree(run_path, ignore_errors=True)
+                        self.uploaded.append(spool_path)
+                        logger.info(f"Uploaded {spool_path} to {self.bucket_name}")
+                        break
+                    except Exception as e:
+                        # Anything the storage client raises is retried; the traceback tells why it failed
+                        logger.warning(f"Upload of {spool_path} failed (attempt {attempt}/{self.max_attempts}): {e}", exc_info=True)
+                        if attempt == self.max_attempts:
+                            self.failed.append(spool_path)
+                        else:
+                            time.sleep(delay)
+                            delay *= 2
+            finally:
+                self._queue.task_done()
+
+
+_log_uploader = None
+_log_uploader_lock = threading.Lock()
+
+
+def get_log_uploader():
+    """Return the process-wide uploader, or None when UPLOAD_LOGS is not enabled."""
+    global _log_uploader
+    if not UPLOAD_LOGS:
+        return None
+    with _log_uploader_lock:
+        if _log_uploader is None:
+            _log_uploader = LogUploader()
+            atexit.register(_log_uploader.close)
+        return _log_uploader
@@ -0,0 +1,102 @@
+import weakref
+
+from pages.base_page import ElementCache
+
+
+class PageState:
+    """What has been done to the page currently open in a browser.
+
+    Attributes:
+        url: URL the page was requested with
+        loaded_url: URL the browser ended up on (after redirects), used to notice navigation away
+        loaded: The page finished loading (the form components are present)
+        refreshed: The page was refreshed once after loading, so the dataLayer carries user_id_ga
+        cookie_dismissed: The OneTrust cookie banner was dismissed or did not show up
+        seeded: The browser's profile snapshot made the refresh and the banner unnecessary;
+            such a page is not a first visit
+        dirty: A test changed the page (e.g. submitted the form), so it must be loaded again
+    """
+
+    def __init__(self, url, loaded_url=None):
+        self.url = url
+        self.loaded_url = loaded_url
+        self.loaded = False
+        self.refreshed = False
+        self.cookie_dismissed = False
+        self.seeded = False
+        self.dirty = False
+
+    def satisfies(self, url, refresh=True, dismiss_cookie=True, first_visit=False):
+        """True if this page can be handed to a test that wants url prepared as requested."""
+        return (
+            url == self.url
+            and self.loaded
+            and not self.dirty
+            and (self.refreshed or not refresh)
+            and (self.cookie_dismissed or not dismiss_cookie)
+            and not (first_visit and self.seeded)
+        )
+
+    def __repr__(self):
+        return (f"PageState({self.url!r}, loaded={self.loaded}, refreshed={self.refreshed}, "
+                f"cookie_dismissed={self.cookie_dismissed}, dirty={self.dirty})")
+
+
+class PageCache:
+    """Tracks the prepared page of a WebDriver so tests with the same preconditions share one navigation.
+
+    The page objects' ElementCache follows the page: it starts over with every
+    load and is dropped when the page is invalidated.
+
+    Whoever changes the page without going through BaseTest.open_page (a
+    mutating step, a session reset, a failed test) calls mark_dirty() or
+    invalidate() so the next test loads it again.
+    """
+
+    # One cache per WebDriver, like the DataLayerRecorder
+    _driver_caches = weakref.WeakKeyDictionary()
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.state = None
+        self.hits = 0
+        self.loads = 0
+
+    @classmethod
+    def for_driver(cls, driver):
+        cache = cls._driver_caches.get(driver)
+        if cache is None:
+            cache = cls._driver_caches[driver] = cls(driver)
+        return cache
+
+    @property
+    def reusable(self):
+        """True if a clean, fully prepared page is open and the next test may get it."""
+        return self.state is not None and self.state.loaded and not self.state.dirty
+
+    def lookup(self, url, refresh=True, dismiss_cookie=True, first_visit=False):
+        """Return the cached PageState if it is still open in the browser and meets the preconditions."""
+        state = self.state
+        if state is None or not state.satisfies(url, refresh, dismiss_cookie, first_visit):
+            return None
+        # One round trip to make sure no one navigated away behind our back
+        if self.driver.current_url != state.loaded_url:
+            self.invalidate()
+            return None
+        self.hits += 1
+        return state
+
+    def start_load(self, url):
+        """Forget the current page and return the state of the one about to be loaded."""
+        self.loads += 1
+        self.state = PageState(url)
+        ElementCache.for_driver(self.driver).start_page()
+        return self.state
+
+    def mark_dirty(self):
+        if self.state is not None:
+            self.state.dirty = True
+
+    def invalidate(self):
+        self.state = None
+        ElementCache.for_driver(self.driver).clear()
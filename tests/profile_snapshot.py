@@ -0,0 +1,180 @@
+"""Chrome profile snapshots with the consent and GA cookies already set.
+
+A fresh profile makes every test pay for a second page load (user_id_ga is
+only set once the GA cookies exist) and a wait for the OneTrust banner. A
+snapshot is a Chrome user-data-dir that has already visited the site and
+dismissed the banner, together with the cookies it ended up with:
+
+    <snapshot>/user-data/     the Chrome user-data-dir
+    <snapshot>/cookies.json   the seeded cookies, restored on every session reset
+
+When PROFILE_SNAPSHOT points at one, each Chrome session starts from its own
+copy-on-write clone of it (cp --reflink=auto, a plain copy where the file
+system cannot share blocks) and BaseTest.open_page skips the refresh and the
+banner, except for tests of first-visit behaviour (first_visit=True).
+
+Usage:
+    python -m tests.profile_snapshot build [URL] [--snapshot profile_snapshot]
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import weakref
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from .catalog import load_catalog
+from .drivers import start_chrome
+from .waits import wait_until
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SNAPSHOT = os.environ.get("PROFILE_SNAPSHOT")
+DEFAULT_SNAPSHOT = "profile_snapshot"
+USER_DATA = "user-data"
+COOKIES_FILE = "cookies.json"
+
+# Chrome refuses to share a user-data-dir; these mark the copy as in use by the snapshot's builder
+LOCK_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+# The Network.getAllCookies fields Network.setCookies accepts back
+COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+
+
+def seed_cookie(cookie):
+    """The part of a CDP cookie needed to set it again (session cookies have no expiry)."""
+    seed = {key: cookie[key] for key in COOKIE_FIELDS if key in cookie}
+    if cookie.get('session'):
+        seed.pop('expires', None)
+    return seed
+
+
+def remove_lock_files(user_data_dir):
+    for name in LOCK_FILES:
+        path = os.path.join(user_data_dir, name)
+        if os.path.lexists(path):
+            os.remove(path)
+
+
+def clone_tree(source, destination):
+    """Copy directory source into destination, sharing the file blocks where the file system can."""
+    os.makedirs(destination, exist_ok=True)
+    try:
+        subprocess.run(["cp", "-a", "--reflink=auto", os.path.join(source, "."), destination],
+                       check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        # No GNU cp (e.g. macOS): a full copy is slower but the same
+        logger.info(f"cp --reflink failed ({e}), copying the profile snapshot")
+        shutil.copytree(source, destination, symlinks=True, dirs_exist_ok=True)
+    remove_lock_files(destination)
+
+
+class ProfileClone:
+    """One browser's private copy of a profile snapshot, removed when the session closes.
+
+    Args:
+        snapshot: Directory written by build_snapshot
+        parent_dir: Where the clone is made (the system temp dir by default)
+    """
+
+    # The clone each driver was started from, like the DataLayerRecorder per driver
+    _driver_clones = weakref.WeakKeyDictionary()
+
+    def __init__(self, snapshot, parent_dir=None, prefix="chrome_profile_"):
+        self.snapshot = snapshot
+        with open(os.path.join(snapshot, COOKIES_FILE)) as cookies_file:
+            self.cookies = json.load(cookies_file)['cookies']
+        self.path = tempfile.mkdtemp(prefix=prefix, dir=parent_dir)
+        clone_tree(os.path.join(snapshot, USER_DATA), self.path)
+
+    @classmethod
+    def for_driver(cls, driver):
+        """The clone driver was started from, or None for a driver with an empty profile."""
+        return cls._driver_clones.get(driver)
+
+    def attach(self, driver):
+        self._driver_clones[driver] = self
+
+    def restore_cookies(self, driver):
+        """Set the seeded cookies again, after a session reset cleared them."""
+        try:
+            driver.execute_cdp_cmd("Network.setCookies", {'cookies': self.cookies})
+        except WebDriverException as e:
+            logger.warning(f"Could not restore the seeded cookies: {e}")
+
+    def remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def is_seeded(driver):
+    """True if driver started from a profile snapshot, so its pages load as a returning visitor's."""
+    return ProfileClone.for_driver(driver) is not None
+
+
+def forget_cookies(driver):
+    """Clear every cookie so the next page load is a first visit; the next session reset restores the seeded ones."""
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    except (AttributeError, WebDriverException):
+        # No DevTools (Firefox)
+        driver.delete_all_cookies()
+
+
+def build_snapshot(url, snapshot=DEFAULT_SNAPSHOT, ready_selector="rhcl-dropdown"):
+    """Visit url twice in a new profile, dismiss the cookie banner and save the profile as a snapshot.
+
+    Returns the seeded cookies.
+    """
+    user_data_dir = os.path.join(snapshot, USER_DATA)
+    shutil.rmtree(snapshot, ignore_errors=True)
+    os.makedirs(user_data_dir)
+    driver, _ = start_chrome(None, "cdp", user_data_dir=user_data_dir)
+    try:
+        # The second visit is the one that sets user_id_ga, like the refresh of BaseTest.prepare_page
+        for _ in range(2):
+            driver.get(url)
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, ready_selector)))
+        try:
+            WebDriverWait(driver, 5).until(
+                EC.element_to_be_clickable((By.ID, "onetrust-close-btn-container"))
+            ).click()
+            wait_until(lambda: driver.get_cookie("OptanonAlertBoxClosed"), timeout=5, description="consent cookie")
+        except TimeoutException:
+            logger.info("No cookie banner detected")
+        cookies = [seed_cookie(cookie) for cookie in driver.execute_cdp_cmd("Network.getAllCookies", {})['cookies']]
+    finally:
+        # Quitting writes the cookies out to the profile
+        driver.quit()
+
+    remove_lock_files(user_data_dir)
+    with open(os.path.join(snapshot, COOKIES_FILE), "w") as cookies_file:
+        json.dump({'url': url, 'built': datetime.datetime.now().isoformat(), 'cookies': cookies}, cookies_file, indent=2)
+    return cookies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a Chrome profile snapshot with the consent and GA cookies set.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build the snapshot")
+    build.add_argument("url", nargs="?", help="Page to seed the profile on (default: the first catalog page)")
+    build.add_argument("--snapshot", default=PROFILE_SNAPSHOT or DEFAULT_SNAPSHOT, help="Snapshot directory")
+    args = parser.parse_args(argv)
+
+    url = args.url or load_catalog()['pages'][0]['url']
+    cookies = build_snapshot(url, args.snapshot)
+    print(f"Snapshot {args.snapshot} seeded on {url} with {len(cookies)} cookies: {', '.join(sorted(c['name'] for c in cookies))}")
+    print(f"Run the tests with PROFILE_SNAPSHOT={os.path.abspath(args.snapshot)}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""Wall time and call counts per step of a test, as a tree of nested steps.
+
+Code marks steps with ``with step("name"):`` or the ``@profiled()`` decorator.
+Both are no-ops unless a profile is active (the conftest starts one per test
+when PROFILE_TESTS=1 or RESULTS_DB is set), and only the thread that started
+the profile is recorded.
+
+Besides timings a profile sums numeric metrics passed to ``record()`` (HAR
+bytes, browser memory, ...).
+
+A finished profile renders as an indented summary for the log, as collapsed
+stacks ("a;b;c <microseconds>", the input format of flamegraph.pl and
+speedscope) and as a dict for the per-run JSON profile written by RunProfile.
+"""
+import contextlib
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+
+# Profiling is opt-in so local runs leave no profiles behind
+PROFILE_TESTS = os.environ.get("PROFILE_TESTS") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+
+class StepStats:
+    __slots__ = ('children', 'count', 'total')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.children = 0.0  # time spent in nested steps
+
+    @property
+    def self_time(self):
+        return max(self.total - self.children, 0.0)
+
+
+class Profiler:
+    """Records how long each step (keyed by its path of enclosing step names) took and how often it ran."""
+
+    def __init__(self, name):
+        self.name = name
+        self.stats = {}
+        self.metrics = {}
+        self._stack = []
+        self._thread_id = threading.get_ident()
+        self._start_time = time.perf_counter()
+        self.wall_time = None
+        self.outcome = None  # set by the conftest once the test is over
+        self.browser = None  # engine of the test's browser session, set by the setup_driver fixture
+
+    @contextlib.contextmanager
+    def step(self, name):
+        if threading.get_ident() != self._thread_id:
+            yield
+            return
+        self._stack.append(name)
+        path = tuple(self._stack)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self._stack.pop()
+            stats = self.stats.get(path)
+            if stats is None:
+                stats = self.stats[path] = StepStats()
+            stats.count += 1
+            stats.total += elapsed
+            if self._stack:
+                parent = tuple(self._stack)
+                if parent not in self.stats:
+                    self.stats[parent] = StepStats()
+                self.stats[parent].children += elapsed
+
+    def record(self, name, value):
+        """Add value to the metric name."""
+        self.metrics[name] = self.metrics.get(name, 0) + value
+
+    def stop(self):
+        self.wall_time = time.perf_counter() - self._start_time
+        return self
+
+    def collapsed(self):
+        """Collapsed stack lines with self time in microseconds, rooted at the profile name."""
+        lines = []
+        for path, stats in self.stats.items():
+            micros = int(stats.self_time * 1_000_000)
+            if micros:
+                lines.append(f"{';'.join((self.name,) + path)} {micros}")
+        return lines
+
+    def summary(self):
+        """Indented tree of steps with total time, share of the test and call count."""
+        wall_time = self.wall_time or (time.perf_counter() - self._start_time)
+        lines = [f"Profile of {self.name}: {wall_time:.2f}s"]
+        for path in sorted(self.stats):
+            stats = self.stats[path]
+            share = 100 * stats.total / wall_time if wall_time else 0
+            lines.append(f"{'  ' * len(path)}{path[-1]}: {stats.total:.3f}s ({share:.0f}%) x{stats.count}")
+        return "\n".join(lines)
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'outcome': self.outcome,
+            'browser': self.browser,
+            'wall_time': round(self.wall_time or 0.0, 6),
+            'metrics': dict(self.metrics),
+            'steps': [
+                {
+                    'path': ';'.join(path),
+                    'count': stats.count,
+                    'total': round(stats.total, 6),
+                    'self': round(stats.self_time, 6),
+                }
+                for path, stats in sorted(self.stats.items())
+            ],
+        }
+
+
+_active = None
+
+
+def start_profile(name):
+    """Make a new Profiler the active one and return it."""
+    global _active
+    _active = Profiler(name)
+    return _active
+
+
+def stop_profile():
+    """Deactivate and return the active Profiler (None if there is none)."""
+    global _active
+    profiler, _active = _active, None
+    return profiler.stop() if profiler is not None else None
+
+
+def get_profiler():
+    return _active
+
+
+def step(name):
+    """Context manager timing name in the active profile; does nothing without one."""
+    profiler = _active
+    return profiler.step(name) if profiler is not None else contextlib.nullcontext()
+
+
+def record(name, value):
+    """Add value to a metric of the active profile; does nothing without one."""
+    profiler = _active
+    if profiler is not None:
+        profiler.record(name, value)
+
+
+def profiled(name=None):
+    """Decorator timing every call of a function as a step (named after the function by default)."""
+    def decorator(func):
+        step_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with step(step_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_driver(driver):
+    """Time every WebDriver round trip of driver as a 'webdriver:<command>' step."""
+    execute = driver.execute
+
+    def profiled_execute(driver_command, params=None):
+        with step(f"webdriver:{driver_command}"):
+            return execute(driver_command, params)
+
+    driver.execute = profiled_execute
+    return driver
+
+
+class RunProfile:
+    """Collects the profiles of every test of a run and writes them out at the end.
+
+    Writes <profile_dir>/<timestamp>_<worker>.json with each test's steps and the
+    totals per step over the run, and a matching .folded file of collapsed
+    stacks for flame graphs.
+    """
+
+    def __init__(self, worker="master", profile_dir=PROFILE_DIR):
+        self.worker = worker
+        self.profile_dir = profile_dir
+        self.started = datetime.datetime.now()
+        self.profiles = []
+
+    def add(self, profiler):
+        # Tests that never hit an instrumented step (pure unit tests) would only add noise
+        if profiler.stats:
+            self.profiles.append(profiler)
+
+    def totals(self):
+        totals = {}
+        for profiler in self.profiles:
+            for path, stats in profiler.stats.items():
+                total = totals.setdefault(';'.join(path), {'count': 0, 'total': 0.0, 'self': 0.0})
+                total['count'] += stats.count
+                total['total'] += stats.total
+                total['self'] += stats.self_time
+        for total in totals.values():
+            total['total'] = round(total['total'], 6)
+            total['self'] = round(total['self'], 6)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]['total']))
+
+    def write(self):
+        """Write the JSON profile and the collapsed stacks. Returns the JSON file path, or None without tests."""
+        if not self.profiles:
+            return None
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base_name = os.path.join(self.profile_dir, f"{self.started.strftime('%Y%m%d%H%M%S')}_{self.worker}")
+        profile = {
+            'started': self.started.isoformat(),
+            'worker': self.worker,
+            'wall_time': round(sum(profiler.wall_time or 0.0 for profiler in self.profiles), 6),
+            'totals': self.totals(),
+            'tests': [profiler.as_dict() for profiler in self.profiles],
+        }
+        with open(f"{base_name}.json", "w") as profile_file:
+            json.dump(profile, profile_file, indent=2)
+        with open(f"{base_name}.folded", "w") as folded_file:
+            for profiler in self.profiles:
+                folded_file.writelines(f"{line}\n" for line in profiler.collapsed())
+        return f"{base_name}.json"
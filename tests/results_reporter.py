@@ -0,0 +1,129 @@
+import atexit
+import http.client
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# Live results are opt-in: set to the results service (server.py), e.g. http://localhost:5000
+RESULTS_SERVER_URL = os.environ.get("RESULTS_SERVER_URL")
+# Events waiting to be posted; beyond that they are dropped rather than slowing the tests down
+MAX_PENDING_EVENTS = 1000
+MAX_BATCH_SIZE = 50
+POST_TIMEOUT = 2
+
+
+class ResultsReporter:
+    """Posts test events to the results service from a background thread.
+
+    report() never blocks: events go on a bounded queue and the sender thread
+    posts them in batches. The live view is best effort, so events that cannot
+    be delivered are dropped and counted instead of retried.
+    """
+
+    def __init__(self, server_url, max_pending_events=MAX_PENDING_EVENTS):
+        self.events_url = f"{server_url.rstrip('/')}/api/events"
+        self.queue = queue.Queue(maxsize=max_pending_events)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="results-reporter", daemon=True)
+        self._thread.start()
+
+    def report(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5):
+        """Send what is queued (waiting at most timeout seconds) and stop the sender thread."""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self.dropped:
+            logger.warning(f"{self.dropped} test result events could not be sent to {self.events_url}")
+
+    def _post(self, batch):
+        request = urllib.request.Request(
+            self.events_url, data=json.dumps(batch).encode("utf-8"),
+            headers={'Content-Type': 'application/json'}, method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=POST_TIMEOUT):
+            pass
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < MAX_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [event for event in batch if event is not None]
+            if not batch:
+                continue
+            try:
+                self._post(batch)
+            except (OSError, http.client.HTTPException) as e:
+                # URLError, refused connections and timeouts are all OSErrors
+                self.dropped += len(batch)
+                logger.debug(f"Could not send test results to {self.events_url}: {e}")
+
+
+class ResultsPlugin:
+    """pytest plugin reporting the start and the end of every test to a ResultsReporter.
+
+    A test's outcome and duration cover setup, call and teardown, so fixture
+    errors and time spent in fixtures show up too.
+    """
+
+    def __init__(self, reporter, worker="master"):
+        self.reporter = reporter
+        self.worker = worker
+        self.run_started = time.time()
+        self._pending = {}  # nodeid -> {'outcome': ..., 'duration': ...}
+
+    def event(self, event_type, nodeid, **fields):
+        event = {'type': event_type, 'test': nodeid, 'worker': self.worker, 'run': self.run_started, 'timestamp': time.time()}
+        event.update(fields)
+        return event
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        self._pending[nodeid] = {'outcome': "passed", 'duration': 0.0}
+        self.reporter.report(self.event("start", nodeid))
+
+    def pytest_runtest_logreport(self, report):
+        result = self._pending.setdefault(report.nodeid, {'outcome': "passed", 'duration': 0.0})
+        result['duration'] += report.duration
+        if report.failed and result['outcome'] == "passed":
+            result['outcome'] = "failed" if report.when == "call" else "error"
+        elif report.skipped and result['outcome'] == "passed":
+            result['outcome'] = "skipped"
+        if report.when == "teardown":
+            self._pending.pop(report.nodeid)
+            self.reporter.report(self.event("finish", report.nodeid, outcome=result['outcome'], duration=round(result['duration'], 3)))
+
+
+_results_reporter = None
+_results_reporter_lock = threading.Lock()
+
+
+def get_results_reporter():
+    """Return the process-wide reporter, or None when RESULTS_SERVER_URL is not set."""
+    global _results_reporter
+    if not RESULTS_SERVER_URL:
+        return None
+    with _results_reporter_lock:
+        if _results_reporter is None:
+            _results_reporter = ResultsReporter(RESULTS_SERVER_URL)
+            atexit.register(_results_reporter.close)
+        return _results_reporter
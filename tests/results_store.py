@@ -0,0 +1,258 @@
+"""Local SQLite store of test results across runs, and a CLI to query it.
+
+Ingests the JSON-lines test logs (the log_assert records, tagged with the
+metadata string suite|suite version|test case|test case version) and the run
+profiles written by RunProfile (per-test wall time). Files already ingested
+are skipped, so the same directories can be ingested after every run.
+
+Usage:
+    python -m tests.results_store ingest [*_logs_automationqa.jsonl ...] [profiles/ ...]
+    python -m tests.results_store flaky [--days 30]
+    python -m tests.results_store durations [--days 30]
+
+The database is RESULTS_DB (default results/results.sqlite), or --db. When
+RESULTS_DB is set the test session ingests its own logs and profile at the end.
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+
+RESULTS_DB = os.environ.get("RESULTS_DB")
+DEFAULT_DB = os.path.join("results", "results.sqlite")
+
+# Assertion texts repeat across thousands of runs, so they are stored once in
+# 'checks' and every result row is a few integers and floats
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checks (
+    id INTEGER PRIMARY KEY,
+    suite TEXT, suite_version TEXT, test_case TEXT, test_case_version TEXT, title TEXT,
+    UNIQUE (suite, suite_version, test_case, test_case_version, title)
+);
+CREATE TABLE IF NOT EXISTS asserts (
+    check_id INTEGER NOT NULL REFERENCES checks (id),
+    source_id INTEGER NOT NULL REFERENCES sources (id),
+    run_id TEXT,
+    ts REAL NOT NULL,
+    passed INTEGER NOT NULL,
+    duration REAL
+);
+CREATE TABLE IF NOT EXISTS tests (
+    source_id INTEGER NOT NULL REFERENCES sources (id),
+    test TEXT NOT NULL,
+    worker TEXT,
+    ts REAL NOT NULL,
+    duration REAL NOT NULL,
+    outcome TEXT
+);
+CREATE INDEX IF NOT EXISTS asserts_check_ts ON asserts (check_id, ts);
+CREATE INDEX IF NOT EXISTS asserts_ts ON asserts (ts);
+CREATE INDEX IF NOT EXISTS tests_test_ts ON tests (test, ts);
+CREATE INDEX IF NOT EXISTS tests_ts ON tests (ts);
+"""
+
+FLAKY_QUERY = """
+SELECT c.suite, c.test_case, c.title, COUNT(*) AS runs, SUM(1 - a.passed) AS failures
+FROM asserts a JOIN checks c ON c.id = a.check_id
+WHERE a.ts >= ?
+GROUP BY a.check_id
+HAVING failures > 0 AND failures < runs
+ORDER BY CAST(failures AS REAL) / runs DESC, runs DESC
+"""
+
+# Nearest-rank percentiles, like benchmarks.run.percentile
+DURATIONS_QUERY = """
+WITH ranked AS (
+    SELECT test, duration,
+           ROW_NUMBER() OVER (PARTITION BY test ORDER BY duration) AS rank,
+           COUNT(*) OVER (PARTITION BY test) AS runs
+    FROM tests WHERE ts >= ?
+)
+SELECT test, runs,
+       MIN(CASE WHEN rank >= MAX((runs * 50 + 99) / 100, 1) THEN duration END) AS p50,
+       MIN(CASE WHEN rank >= MAX((runs * 95 + 99) / 100, 1) THEN duration END) AS p95,
+       MAX(duration) AS max
+FROM ranked
+GROUP BY test
+ORDER BY p95 DESC
+"""
+
+# Newest first, so the scheduler can tell the latest outcome of each test
+HISTORY_QUERY = """
+SELECT test, outcome, duration FROM tests
+WHERE ts >= ? AND outcome IS NOT NULL
+ORDER BY test, ts DESC
+"""
+
+
+def parse_timestamp(value):
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+class ResultsDatabase:
+    """The SQLite results store. Safe to open from several processes (e.g. pytest-xdist workers) at once."""
+
+    def __init__(self, path=None):
+        self.path = path or RESULTS_DB or DEFAULT_DB
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self._check_ids = {}
+
+    def close(self):
+        self.connection.close()
+
+    def ingest(self, paths):
+        """Ingest log files, profile files and directories of them. Returns the number of files read."""
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files += sorted(glob.glob(os.path.join(path, "*.jsonl")) + glob.glob(os.path.join(path, "*.json")))
+            else:
+                files.append(path)
+
+        ingested = 0
+        for path in files:
+            with self.connection:
+                source_id = self._start_source(path)
+                if source_id is None:
+                    continue
+                if path.endswith(".jsonl"):
+                    self._ingest_log(path, source_id)
+                else:
+                    self._ingest_profile(path, source_id)
+                ingested += 1
+        return ingested
+
+    def _start_source(self, path):
+        """Register path; None if it was ingested unchanged before. Rows of an older version are replaced."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.connection.execute("SELECT id, size, mtime FROM sources WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            source_id, size, mtime = row
+            if (size, mtime) == (stat.st_size, stat.st_mtime):
+                return None
+            # Log files are appended to by later tests of the same second
+            self.connection.execute("DELETE FROM asserts WHERE source_id = ?", (source_id,))
+            self.connection.execute("DELETE FROM tests WHERE source_id = ?", (source_id,))
+            self.connection.execute("UPDATE sources SET size = ?, mtime = ? WHERE id = ?", (stat.st_size, stat.st_mtime, source_id))
+            return source_id
+        return self.connection.execute(
+            "INSERT INTO sources (path, size, mtime) VALUES (?, ?, ?)", (path, stat.st_size, stat.st_mtime)
+        ).lastrowid
+
+    def _check_id(self, metadata, title):
+        key = (*(metadata.split("|") + [None] * 4)[:4], title)
+        check_id = self._check_ids.get(key)
+        if check_id is None:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO checks (suite, suite_version, test_case, test_case_version, title) VALUES (?, ?, ?, ?, ?)", key
+            )
+            check_id = self._check_ids[key] = self.connection.execute(
+                "SELECT id FROM checks WHERE suite IS ? AND suite_version IS ? AND test_case IS ? AND test_case_version IS ? AND title IS ?", key
+            ).fetchone()[0]
+        return check_id
+
+    def _ingest_log(self, path, source_id):
+        rows = []
+        with open(path) as log_file:
+            for line in log_file:
+                try:
+                    record = json.loads(line)
+                    ts = parse_timestamp(record['timestamp'])
+                except (ValueError, KeyError):
+                    continue
+                if record.get('result') not in ("success", "failed") or not record.get('metadata'):
+                    continue
+                check_id = self._check_id(record['metadata'], record.get('title'))
+                # The time the check took, measured by BaseTest.log_assert; None in logs written before it was
+                duration = record.get('duration')
+                rows.append((check_id, source_id, record.get('run_id'), ts, int(record['result'] == "success"), duration))
+        self.connection.executemany(
+            "INSERT INTO asserts (check_id, source_id, run_id, ts, passed, duration) VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+
+    def _ingest_profile(self, path, source_id):
+        with open(path) as profile_file:
+            try:
+                profile = json.load(profile_file)
+                ts = parse_timestamp(profile['started'])
+            except (ValueError, KeyError):
+                return
+        self.connection.executemany(
+            "INSERT INTO tests (source_id, test, worker, ts, duration, outcome) VALUES (?, ?, ?, ?, ?, ?)",
+            [(source_id, test['name'], profile.get('worker'), ts, test['wall_time'], test.get('outcome'))
+             for test in profile.get('tests', [])],
+        )
+
+    def flaky_asserts(self, days=30):
+        """Assertions that both passed and failed in the last days, most often failing first."""
+        cursor = self.connection.execute(FLAKY_QUERY, (time.time() - days * 86400,))
+        return [dict(zip([column[0] for column in cursor.description], row)) for row in cursor]
+
+    def test_durations(self, days=30):
+        """p50/p95/max wall time per test over the last days, slowest p95 first."""
+        cursor = self.connection.execute(DURATIONS_QUERY, (time.time() - days * 86400,))
+        return [dict(zip([column[0] for column in cursor.description], row)) for row in cursor]
+
+    def test_history(self, days=30):
+        """(outcome, duration) of each test's runs in the last days, newest first, keyed by test."""
+        history = {}
+        for test, outcome, duration in self.connection.execute(HISTORY_QUERY, (time.time() - days * 86400,)):
+            history.setdefault(test, []).append((outcome, duration))
+        return history
+
+
+def get_results_database():
+    """The results database named by RESULTS_DB, or None when it is not set."""
+    return ResultsDatabase(RESULTS_DB) if RESULTS_DB else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store and query test results across runs.")
+    parser.add_argument("--db", help=f"SQLite database (default: RESULTS_DB or {DEFAULT_DB})")
+    parser.add_argument("--json", action="store_true", help="Print query results as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Ingest log files, profiles and directories of them")
+    ingest.add_argument("paths", nargs="+")
+    for name, help_text in (("flaky", "Assertions that both passed and failed"), ("durations", "p50/p95 wall time per test")):
+        query = commands.add_parser(name, help=help_text)
+        query.add_argument("--days", type=float, default=30, help="Look back this many days (default 30)")
+    args = parser.parse_args(argv)
+
+    database = ResultsDatabase(args.db)
+    start_time = time.perf_counter()
+    if args.command == "ingest":
+        count = database.ingest(args.paths)
+        print(f"Ingested {count} files into {database.path} in {time.perf_counter() - start_time:.2f}s")
+        return 0
+
+    rows = database.flaky_asserts(args.days) if args.command == "flaky" else database.test_durations(args.days)
+    elapsed = time.perf_counter() - start_time
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    elif args.command == "flaky":
+        for row in rows:
+            print(f"{row['failures']:>5}/{row['runs']:<5} {row['test_case']}: {row['title']}")
+    else:
+        for row in rows:
+            print(f"p50 {row['p50']:8.2f}s  p95 {row['p95']:8.2f}s  max {row['max']:8.2f}s  x{row['runs']:<5} {row['test']}")
+    print(f"{len(rows)} rows in {elapsed * 1000:.1f}ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
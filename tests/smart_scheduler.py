@@ -0,0 +1,175 @@
+"""Test ordering and retries driven by the results store (see results_store.py).
+
+From the last HISTORY_DAYS of results the scheduler:
+
+* orders the tests so that the ones whose last run failed come first, then
+  tests without history, then the others by failure rate and, on ties, the
+  longest first. Red shows up early and long tests do not trail at the end
+  of a parallel run.
+* retries a failed test (up to SMART_RETRIES times) only when the failure is
+  known to be flaky: every assertion that failed has both passed and failed
+  before, or, for failures outside an assertion, the test itself has.
+* never retries other failures, and with SMART_FAIL_FAST=1 stops the run at
+  the first of them.
+
+Opt-in: enabled by the conftest when RESULTS_DB is set and SMART_SCHEDULER=1.
+Retries only use pytest's public hooks: every attempt after the first runs a
+fresh copy of the test item, so no fixture value leaks from one attempt into
+the next.
+"""
+import logging
+import os
+
+import pytest
+
+logger = logging.getLogger(__name__)
+
+SMART_SCHEDULER = os.environ.get("SMART_SCHEDULER", "0") == "1"
+SMART_RETRIES = int(os.environ.get("SMART_RETRIES", "2"))
+SMART_FAIL_FAST = os.environ.get("SMART_FAIL_FAST", "0") == "1"
+HISTORY_DAYS = float(os.environ.get("HISTORY_DAYS", "30"))
+FAILED_OUTCOMES = ("failed", "error")
+
+# (test case, title) of the assertions that failed in the running test, see note_failed_assert
+_failed_asserts = []
+
+
+def note_failed_assert(metadata_string, title):
+    """Called by BaseTest.log_assert for every failed assertion of the running test."""
+    parts = (metadata_string or "").split("|")
+    _failed_asserts.append((parts[2] if len(parts) > 2 else None, title))
+
+
+class TestHistory:
+    """Past outcomes of the tests and the assertions known to be flaky.
+
+    Args:
+        runs: {test node id: [(outcome, duration), ...] newest first}
+        flaky_checks: {(test case, assertion title)} that both passed and failed
+    """
+
+    __test__ = False  # not a test class, despite the name
+
+    def __init__(self, runs, flaky_checks):
+        self.runs = runs
+        self.flaky_checks = set(flaky_checks)
+
+    @classmethod
+    def from_database(cls, database, days=HISTORY_DAYS):
+        flaky_checks = {(row['test_case'], row['title']) for row in database.flaky_asserts(days)}
+        return cls(database.test_history(days), flaky_checks)
+
+    def failure_rate(self, test):
+        runs = self.runs.get(test, [])
+        return sum(1 for outcome, _ in runs if outcome in FAILED_OUTCOMES) / len(runs) if runs else 0.0
+
+    def mean_duration(self, test):
+        runs = self.runs.get(test, [])
+        return sum(duration for _, duration in runs) / len(runs) if runs else 0.0
+
+    def is_flaky(self, test):
+        outcomes = {outcome in FAILED_OUTCOMES for outcome, _ in self.runs.get(test, [])}
+        return outcomes == {True, False}
+
+    def sort_key(self, test):
+        runs = self.runs.get(test)
+        if not runs:
+            group = 1
+        else:
+            group = 0 if runs[0][0] in FAILED_OUTCOMES else 2
+        return group, -self.failure_rate(test), -self.mean_duration(test)
+
+    def order(self, tests):
+        """Return the node ids in the order they should run (stable for ties)."""
+        return sorted(tests, key=self.sort_key)
+
+    def is_flaky_failure(self, test, failed_asserts):
+        """True if a failure with these failed (test case, title) assertions is worth a retry."""
+        if failed_asserts:
+            return all(check in self.flaky_checks for check in failed_asserts)
+        return self.is_flaky(test)
+
+
+class SmartSchedulerPlugin:
+    """pytest plugin applying a TestHistory: reorders the collected tests and retries known-flaky failures."""
+
+    def __init__(self, history, max_retries=SMART_RETRIES, fail_fast=SMART_FAIL_FAST):
+        self.history = history
+        self.max_retries = max_retries
+        self.fail_fast = fail_fast
+        self.retried = {}
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        positions = {nodeid: index for index, nodeid in enumerate(self.history.order([item.nodeid for item in items]))}
+        items.sort(key=lambda item: positions[item.nodeid])
+
+    def pytest_runtest_protocol(self, item, nextitem):
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        attempt = 0
+        attempt_item = item
+        while True:
+            _failed_asserts.clear()
+            reports = [self._call_and_report(attempt_item, "setup")]
+            if reports[0].passed and not item.config.getoption("setuponly", False):
+                reports.append(self._call_and_report(attempt_item, "call"))
+            retry = any(report.failed for report in reports) and self._should_retry(item, attempt)
+            # A test about to be retried only tears down its own fixtures: with the real nextitem,
+            # module and session fixtures (the browser pools) would go down and come up again for
+            # the retry whenever the test is the last of its module
+            reports.append(self._call_and_report(attempt_item, "teardown", item.parent if retry else nextitem))
+            if not retry:
+                break
+            attempt += 1
+            self.retried[item.nodeid] = attempt
+            attempt_item = self._copy_item(item)
+
+        # Only the last attempt is reported
+        for report in reports:
+            if attempt:
+                report.user_properties.append(("retries", attempt))
+            item.ihook.pytest_runtest_logreport(report=report)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
+
+    def _should_retry(self, item, attempt):
+        """Decide on a failed setup or call; failures while tearing down are reported, not retried."""
+        failed_asserts = list(_failed_asserts)
+        if not self.history.is_flaky_failure(item.nodeid, failed_asserts):
+            logger.info(f"{item.nodeid} failed deterministically, not retrying")
+            if self.fail_fast:
+                item.session.shouldstop = f"{item.nodeid} failed deterministically (SMART_FAIL_FAST)"
+            return False
+        if attempt >= self.max_retries:
+            return False
+        logger.warning(f"Retrying {item.nodeid} ({attempt + 1}/{self.max_retries}), known flaky: {failed_asserts or 'test'}")
+        return True
+
+    def _call_and_report(self, item, when, nextitem=None):
+        """Run one phase of item through the public runtest hooks and return its report."""
+        if when == "teardown" and (item.session.shouldfail or item.session.shouldstop):
+            # A session about to stop tears everything down, so that fixture teardown errors are reported
+            nextitem = None
+        hook = getattr(item.ihook, f"pytest_runtest_{when}")
+        kwargs = {'nextitem': nextitem} if when == "teardown" else {}
+        reraise = (pytest.exit.Exception,) if item.config.getoption("usepdb", False) else (pytest.exit.Exception, KeyboardInterrupt)
+        call = pytest.CallInfo.from_call(lambda: hook(item=item, **kwargs), when=when, reraise=reraise)
+        report = item.ihook.pytest_runtest_makereport(item=item, call=call)
+        if call.excinfo is not None and not hasattr(report, "wasxfail") and report.failed:
+            item.ihook.pytest_exception_interact(node=item, call=call, report=report)
+        return report
+
+    def _copy_item(self, item):
+        """A fresh item for a retry: it resolves its fixtures anew instead of reusing the torn down values.
+
+        The copy shares the fixture info pytest computed for item at collection, which also holds the
+        pseudo fixtures of its parameters; it is only read and passed back to the Function constructor.
+        """
+        kwargs = {'callspec': item.callspec} if hasattr(item, "callspec") else {}
+        return type(item).from_parent(item.parent, name=item.name, originalname=item.originalname,
+                                      keywords=item.keywords, fixtureinfo=item._fixtureinfo, **kwargs)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.retried:
+            terminalreporter.write_sep("-", f"{len(self.retried)} known-flaky tests retried")
+            for nodeid, attempts in self.retried.items():
+                terminalreporter.write_line(f"{nodeid}: {attempts} retries")
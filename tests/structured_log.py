@@ -0,0 +1,96 @@
+import atexit
+import contextlib
+import json
+import logging
+import queue
+import threading
+
+# Records queued beyond this block the caller until the writer catches up
+MAX_QUEUED_RECORDS = 10000
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedLogWriter:
+    """Writes JSON-lines log records from a background thread.
+
+    Callers only put records on a bounded in-memory queue; the writer thread
+    keeps one buffered handle open per log file and the files are only flushed
+    when flush() is called (at test teardown) or the writer is closed.
+    """
+
+    def __init__(self, max_queued_records=MAX_QUEUED_RECORDS):
+        self.queue = queue.Queue(maxsize=max_queued_records)
+        self._files = {}
+        # The writer thread opens files while the caller may be listing them
+        self._files_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, file_name, record):
+        """Queue a record (a JSON-serializable dict) to be appended to file_name."""
+        self.queue.put((file_name, record))
+
+    @property
+    def file_names(self):
+        """The log files written to so far."""
+        with self._files_lock:
+            return list(self._files)
+
+    def flush(self):
+        """Block until every record queued so far is written and flushed to disk."""
+        self._wait_for_writer(close=False)
+
+    def close(self):
+        """Write out every record queued so far and close the log files."""
+        self._wait_for_writer(close=True)
+
+    def _wait_for_writer(self, close):
+        done = threading.Event()
+        self.queue.put((None, (done, close)))
+        done.wait()
+
+    def _run(self):
+        # The writer thread owns the open files; a close request closes them all
+        with contextlib.ExitStack() as open_files:
+            while True:
+                file_name, record = self.queue.get()
+                try:
+                    with self._files_lock:
+                        if file_name is None:
+                            self._flush_files(open_files, *record)
+                        else:
+                            log_file = self._files.get(file_name)
+                            if log_file is None:
+                                log_file = open_files.enter_context(open(file_name, "a"))
+                                self._files[file_name] = log_file
+                            log_file.write(json.dumps(record, default=str) + "\n")
+                except (OSError, ValueError) as e:
+                    # Never let a bad record (unwritable file, circular reference) kill the writer thread
+                    logger.warning(f"Could not write log record to {file_name}: {e}")
+                finally:
+                    self.queue.task_done()
+
+    def _flush_files(self, open_files, done, close):
+        try:
+            for log_file in self._files.values():
+                log_file.flush()
+            if close:
+                open_files.close()
+                self._files = {}
+        finally:
+            done.set()
+
+
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    """Return the process-wide log writer, starting it on first use."""
+    global _log_writer
+    with _log_writer_lock:
+        if _log_writer is None:
+            _log_writer = BufferedLogWriter()
+            atexit.register(_log_writer.close)
+        return _log_writer
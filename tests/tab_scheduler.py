@@ -0,0 +1,210 @@
+import logging
+import os
+
+from .datalayer_recorder import DataLayerRecorder
+from .page_cache import PageCache
+from .profile_snapshot import is_seeded
+from .profiler import profiled
+from .waits import wait_until
+
+logger = logging.getLogger(__name__)
+
+# Pages loaded concurrently in one browser; 1 loads every page on its own
+MAX_TABS = int(os.environ.get("MAX_TABS", "4"))
+
+# Returns the page's navigation start (changes with every load) and whether it is ready
+READY_SCRIPT = """
+    const selector = arguments[0];
+    return {
+        origin: performance.timeOrigin,
+        ready: document.readyState === 'complete' && (!selector || document.querySelector(selector) !== null),
+        url: location.href
+    };
+"""
+
+# One-shot OneTrust dismissal: tabs are never waited on for a banner that may not come
+DISMISS_COOKIE_SCRIPT = """
+    const banner = document.getElementById('onetrust-close-btn-container');
+    if (banner && banner.offsetParent !== null) { banner.click(); return true; }
+    return false;
+"""
+
+
+class Tab:
+    """A browser tab loading one URL, with its own dataLayer recorder.
+
+    Attributes:
+        url: URL the tab was asked to load
+        handle: WebDriver window handle of the tab
+        recorder: DataLayerRecorder of the tab; only use it while the tab is focused
+        loaded_url: location.href once the page was ready (after redirects); GA4 hits carry it as dl
+        page_load_ids: GA4 '_p' values of the hits attributed to this tab, one per page load
+        hits: GA4 hits attributed to this tab by TabScheduler.attribute_hits
+    """
+
+    def __init__(self, url, handle, recorder):
+        self.url = url
+        self.handle = handle
+        self.recorder = recorder
+        self.loaded_url = None
+        self.time_origin = None
+        self.page_load_ids = []
+        self.hits = []
+
+    def hit_filters(self):
+        """Ga4HitIndex.find() filters selecting this tab's hits."""
+        return {'dl': self.loaded_url or self.url}
+
+    def __repr__(self):
+        return f"Tab({self.url!r}, handle={self.handle!r})"
+
+
+class TabScheduler:
+    """Loads several URLs at once in tabs of one browser, sharing its network capture.
+
+    WebDriver only ever drives the focused tab, but page loads keep going in the
+    other tabs. So the scheduler starts every load of a batch before waiting
+    for any of them, and most of the network idle time (tags firing, GA4 hits
+    being sent) overlaps. Navigation is started with a script instead of
+    driver.get(), which would block until the page is loaded.
+
+    All tabs share the browser's cookies, so GA4 hits from different tabs carry
+    the same 'sid'. Hits are attributed to tabs by document location ('dl') and,
+    for hits sent after an in-page URL change, by page load id ('_p').
+
+    Args:
+        driver: The WebDriver instance
+        proxy: The HarStream (or CdpNetworkCapture) recording the browser's traffic
+        max_tabs: Number of pages loaded concurrently
+        ready_selector: Element that must be present for a page to count as loaded
+    """
+
+    def __init__(self, driver, proxy, max_tabs=MAX_TABS, ready_selector="rhcl-dropdown"):
+        self.driver = driver
+        self.proxy = proxy
+        self.max_tabs = max_tabs
+        self.ready_selector = ready_selector
+        self.main_handle = driver.current_window_handle
+        self.tabs = []
+
+    def batches(self, urls):
+        """Split urls into batches of at most max_tabs distinct URLs (a repeated URL goes to a later batch)."""
+        batches = []
+        for url in urls:
+            batch = next((batch for batch in batches if len(batch) < self.max_tabs and url not in batch), None)
+            if batch is None:
+                batch = []
+                batches.append(batch)
+            batch.append(url)
+        return batches
+
+    def run(self, urls, refresh=True, timeout=30):
+        """Load urls batch by batch and yield each batch as a list of ready Tabs.
+
+        Each batch starts with a new HAR, so only its own hits are in the
+        capture while the caller validates it. Tabs are closed once the caller
+        asks for the next batch.
+        """
+        try:
+            for batch in self.batches(urls):
+                yield self.load_batch(batch, refresh, timeout)
+                self.close_tabs()
+        finally:
+            self.close_tabs()
+
+    @profiled("tabs:load_batch")
+    def load_batch(self, urls, refresh=True, timeout=30):
+        # The pages the driver had open are replaced; nothing cached about them holds any more
+        PageCache.for_driver(self.driver).invalidate()
+        self.proxy.new_har()
+        self.tabs = []
+        for url in urls:
+            # The first tab is the one the driver already has open
+            self.tabs.append(self.open_tab(url, new_window=bool(self.tabs)))
+
+        # Every load is started before waiting on any of them
+        for tab in self.tabs:
+            self.driver.switch_to.window(tab.handle)
+            self.driver.execute_script("window.location.href = arguments[0];", tab.url)
+        self.wait_until_ready(timeout)
+
+        # A profile snapshot already holds the cookies of a second visit and of the banner
+        seeded = is_seeded(self.driver)
+        if refresh and not seeded:
+            # Second visit, like prepare_page: user_id_ga is only set once the cookies exist
+            for tab in self.tabs:
+                self.driver.switch_to.window(tab.handle)
+                self.driver.execute_script("location.reload();")
+            self.wait_until_ready(timeout)
+
+        for tab in self.tabs:
+            self.driver.switch_to.window(tab.handle)
+            if not seeded and self.driver.execute_script(DISMISS_COOKIE_SCRIPT):
+                logger.info(f"Cookie banner dismissed in tab {tab.url}")
+        return self.tabs
+
+    def open_tab(self, url, new_window=True):
+        """Open a blank tab and install a dataLayer recorder in it before anything loads."""
+        if new_window:
+            self.driver.switch_to.new_window('tab')
+        else:
+            self.driver.switch_to.window(self.main_handle)
+            self.driver.get("about:blank")
+        recorder = DataLayerRecorder(self.driver)
+        recorder.install()  # Page.addScriptToEvaluateOnNewDocument applies to the focused tab only
+        return Tab(url, self.driver.current_window_handle, recorder)
+
+    def wait_until_ready(self, timeout):
+        """Wait until every tab finished a new page load (one with a new navigation start)."""
+        pending = list(self.tabs)
+
+        def all_ready():
+            for tab in list(pending):
+                self.driver.switch_to.window(tab.handle)
+                state = self.driver.execute_script(READY_SCRIPT, self.ready_selector)
+                if state['ready'] and state['url'] != "about:blank" and state['origin'] != tab.time_origin:
+                    tab.time_origin = state['origin']
+                    tab.loaded_url = state['url']
+                    pending.remove(tab)
+            return not pending
+
+        result = wait_until(all_ready, timeout=timeout, description=f"{len(self.tabs)} tabs to load")
+        if not result.satisfied:
+            raise TimeoutError(f"Tabs not loaded after {timeout}s: {pending}")
+
+    def focus(self, tab):
+        self.driver.switch_to.window(tab.handle)
+
+    def attribute_hits(self, hit_index):
+        """Assign the indexed GA4 hits to the tabs. Returns the hits no tab could claim."""
+        by_location = {}
+        for tab in self.tabs:
+            tab.hits = []
+            tab.page_load_ids = []
+            by_location[tab.loaded_url] = tab
+            by_location.setdefault(tab.url, tab)
+        by_page_load = {}
+
+        unattributed = []
+        for hit in hit_index.hits:
+            tab = by_location.get(hit.get('dl'))
+            page_load_id = hit.get('_p')
+            if tab is None:
+                tab = by_page_load.get(page_load_id)
+            elif page_load_id and page_load_id not in by_page_load:
+                by_page_load[page_load_id] = tab
+                tab.page_load_ids.append(page_load_id)
+            if tab is None:
+                unattributed.append(hit)
+            else:
+                tab.hits.append(hit)
+        return unattributed
+
+    def close_tabs(self):
+        """Close every tab but the one the driver started with, and focus that one again."""
+        for tab in self.tabs:
+            if tab.handle != self.main_handle:
+                self.driver.switch_to.window(tab.handle)
+                self.driver.close()
+        self.tabs = []
+        self.driver.switch_to.window(self.main_handle)
@@ -0,0 +1,49 @@
+import pytest
+
+from pages.base_page import BasePage, ElementCache, parse_locator
+
+from .page_cache import PageCache
+
+PHONE_LINK = "rhcl-block-hero-form >>> rhcl-button >>> a"
+
+
+class FakeDriver:
+    """Answers DEEP_QUERY_SCRIPT from a dict of path -> element."""
+
+    def __init__(self, elements):
+        self.elements = elements
+        self.scripts = 0
+
+    def execute_script(self, script, paths):
+        self.scripts += 1
+        results = []
+        for path in paths:
+            element = self.elements.get(tuple(path))
+            results.append({'element': element, 'failed_step': None if element else len(path) - 1})
+        return results
+
+
+def test_parse_locator():
+    assert parse_locator(PHONE_LINK) == ("rhcl-block-hero-form", "rhcl-button", "a")
+    with pytest.raises(ValueError):
+        parse_locator("rhcl-button >>> ")
+
+
+def test_locators_resolve_in_one_call_and_stay_cached_until_the_page_changes():
+    driver = FakeDriver({("rhcl-block-hero-form",): "form", parse_locator(PHONE_LINK): "link"})
+    page = BasePage(driver)
+
+    # No page load seen yet: nothing is cached
+    assert page.find_all("rhcl-block-hero-form", PHONE_LINK, "missing") == ["form", "link", None]
+    page.find_all(PHONE_LINK)
+    assert driver.scripts == 2
+
+    PageCache.for_driver(driver).start_load("https://example.com/")
+    page.find_all("rhcl-block-hero-form", PHONE_LINK)
+    assert page.find_element(PHONE_LINK) == "link"
+    assert driver.scripts == 3
+    assert ElementCache.for_driver(driver).hits == 1
+
+    PageCache.for_driver(driver).invalidate()
+    page.find_all(PHONE_LINK)
+    assert driver.scripts == 4
@@ -0,0 +1,60 @@
+import json
+import urllib.request
+
+from benchmarks.run import (
+    format_comparison,
+    percentile,
+    summarize,
+    summarize_by_browser,
+    write_catalog,
+)
+from benchmarks.stand_in import StandInSite
+
+from .catalog import compile_plan, load_catalog
+
+
+def test_stand_in_serves_the_hire_page_and_sinks_hits():
+    with StandInSite() as site:
+        catalog = load_catalog(base_url=site.base_url)
+        plan, = compile_plan(catalog)
+        with urllib.request.urlopen(plan.url) as page:
+            assert b"<title>Hire Now" in page.read()
+
+        form_action_url = plan.steps[-1].action_params['form_action_url']
+        assert form_action_url == f"{site.base_url}/proxy-lead-processing/send"
+        request = urllib.request.Request(form_action_url, data=b'{"firstName": "Jes"}', headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            assert json.load(response)['status'] == "success"
+        urllib.request.urlopen(urllib.request.Request(f"{site.base_url}/g/collect?v=2&en=page_view", data=b""))
+
+        assert site.leads == [{"firstName": "Jes"}]
+        assert len(site.hits) == 1
+
+
+def test_catalog_copies_and_report(tmp_path):
+    catalog_path = tmp_path / "catalog.json"
+    write_catalog(str(catalog_path), pages=3)
+    plans = compile_plan(load_catalog(str(catalog_path)))
+    assert len({plan.url for plan in plans}) == 3
+
+    tests = [{'wall_time': seconds, 'metrics': {'har_bytes': 1000, 'browser_rss': 2**20}} for seconds in (1, 2, 3, 4)]
+    report = summarize([(0, 30.0, tests[:2]), (1, 30.0, tests[2:])])
+    assert (report['tests'], report['failed_runs'], report['tests_per_minute']) == (4, 1, 4.0)
+    assert (report['latency_p50'], report['latency_p95']) == (2, 4)
+    assert report['browser_rss_peak_mb'] == 1.0
+    assert percentile([], 95) == 0.0
+
+
+def test_engines_are_reported_side_by_side():
+    tests = [
+        {'wall_time': 2.0, 'browser': "chrome", 'metrics': {'browser_startup': 1.5}},
+        {'wall_time': 4.0, 'browser': "chrome", 'metrics': {}},
+        {'wall_time': 3.0, 'browser': "firefox", 'metrics': {'browser_startup': 2.5}},
+    ]
+    reports = summarize_by_browser([(0, 60.0, tests)])
+    assert list(reports) == ["chrome", "firefox"]
+    assert (reports['chrome']['tests'], reports['chrome']['startup_mean'], reports['chrome']['latency_p95']) == (2, 1.5, 4.0)
+    assert (reports['firefox']['tests'], reports['firefox']['startup_mean']) == (1, 2.5)
+    table = format_comparison(reports).splitlines()
+    assert table[0].split() == ["chrome", "firefox"]
+    assert table[1].split() == ["tests", "2", "1"]
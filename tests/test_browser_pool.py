@@ -0,0 +1,157 @@
+import json
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from .browser_pool import BrowserPool, BrowserSession, frame_origins
+from .page_cache import PageCache, PageState
+
+FRAME_TREE = {
+    'frame': {'id': "main", 'securityOrigin': "https://www.roberthalf.com"},
+    'childFrames': [
+        {'frame': {'id': "consent", 'securityOrigin': "https://cdn.cookielaw.org"}},
+        {'frame': {'id': "blank", 'securityOrigin': "null"},
+         'childFrames': [{'frame': {'id': "nested", 'securityOrigin': "https://www.roberthalf.com"}}]},
+    ],
+}
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_handle = handle
+
+
+class FakeDriver:
+    def __init__(self, handles=("tab1",), cdp=True):
+        self.window_handles = list(handles)
+        self.current_handle = handles[0]
+        self.switch_to = FakeSwitchTo(self)
+        self.cdp = cdp
+        self.alive = True
+        self.calls = []
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise ConnectionError("chromedriver is gone")
+        return "https://www.roberthalf.com/us/en/hire"
+
+    def close(self):
+        self.window_handles.remove(self.current_handle)
+        self.calls.append(("close", self.current_handle))
+
+    def execute_script(self, script):
+        self.calls.append(("script", "localStorage.clear()" in script))
+
+    def get(self, url):
+        self.calls.append(("get", url))
+
+    def execute_cdp_cmd(self, command, params):
+        if not self.cdp:
+            raise WebDriverException("no DevTools")
+        self.calls.append((command, params.get('origin')))
+        return {'frameTree': FRAME_TREE} if command == "Page.getFrameTree" else {}
+
+    def delete_all_cookies(self):
+        self.calls.append(("delete_all_cookies", None))
+
+    def quit(self):
+        self.alive = False
+
+
+class FakeProxy:
+    def __init__(self):
+        self.hars = 0
+
+    def new_har(self):
+        self.hars += 1
+
+
+class FakeProfile:
+    def __init__(self):
+        self.restored = 0
+        self.removed = False
+
+    def restore_cookies(self, driver):
+        self.restored += 1
+
+    def remove(self):
+        self.removed = True
+
+
+def test_frame_origins_cover_iframes_once_and_skip_opaque_ones():
+    assert frame_origins(FRAME_TREE) == ["https://www.roberthalf.com", "https://cdn.cookielaw.org"]
+
+
+def test_reset_closes_extra_tabs_and_clears_every_origin_of_the_page():
+    driver = FakeDriver(handles=("tab1", "tab2", "tab3"))
+    proxy, profile = FakeProxy(), FakeProfile()
+    session = BrowserSession(driver, proxy, profile=profile)
+
+    session.reset()
+
+    assert driver.window_handles == ["tab1"] and driver.current_handle == "tab1"
+    assert driver.calls == [
+        ("close", "tab2"), ("close", "tab3"), ("script", True), ("Page.getFrameTree", None),
+        ("Storage.clearDataForOrigin", "https://www.roberthalf.com"), ("Storage.clearDataForOrigin", "https://cdn.cookielaw.org"),
+        ("get", "about:blank"), ("Network.clearBrowserCookies", None),
+    ]
+    assert profile.restored == 1 and proxy.hars == 1
+
+
+def test_reset_without_devtools_clears_the_top_frame_and_deletes_cookies():
+    driver = FakeDriver(cdp=False)
+    BrowserSession(driver, FakeProxy()).reset()
+
+    assert driver.calls == [("script", True), ("get", "about:blank"), ("delete_all_cookies", None)]
+
+
+def test_reset_keeping_the_page_only_closes_extra_tabs():
+    driver = FakeDriver(handles=("tab1", "tab2"))
+    proxy = FakeProxy()
+    BrowserSession(driver, proxy).reset(keep_page=True)
+
+    assert driver.calls == [("close", "tab2")]
+    assert proxy.hars == 0
+
+
+def test_pool_reuses_released_sessions_and_replaces_unhealthy_ones(tmp_path):
+    launched = []
+
+    def launch():
+        launched.append(BrowserSession(FakeDriver(), FakeProxy(), profile=FakeProfile()))
+        return launched[-1]
+
+    pool = BrowserPool(launch, name="gw0", size=1, pid_dir=str(tmp_path))
+    session = pool.acquire()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(session)
+    assert pool.acquire() is session
+    assert json.loads((tmp_path / ".browser_pool_gw0.pids").read_text()) == []
+
+    pool.release(session)
+    session.driver.alive = False
+    replacement = pool.acquire()
+    assert replacement is launched[1]
+    assert session.profile.removed
+    assert pool.sessions == [replacement]
+
+    pool.close()
+    assert not (tmp_path / ".browser_pool_gw0.pids").exists()
+
+
+def test_pool_keeps_a_prepared_page_for_the_next_test(tmp_path):
+    pool = BrowserPool(lambda: BrowserSession(FakeDriver(), FakeProxy()), pid_dir=str(tmp_path))
+    pool.warm()
+    session = pool.sessions[0]
+    state = PageCache.for_driver(session.driver).state = PageState("https://www.roberthalf.com/us/en/hire")
+    state.loaded = True
+
+    assert pool.acquire() is session
+    assert session.driver.calls == []
+    assert session.proxy.hars == 0
+    pool.close()
@@ -0,0 +1,81 @@
+import re
+
+from .capture_policy import (
+    GA4_COLLECT_URLS,
+    CapturePolicy,
+    get_capture_policy,
+    pattern_to_regex,
+)
+from .har_stream import HarStream
+
+GA4_URL = "https://region1.google-analytics.com/g/collect?v=2&tid=G-ABC&en=page_view"
+LEAD_URL = "https://qs04-dr.int-qs-lp.api.roberthalfonline.com/proxy-lead-processing/send"
+IMAGE_URL = "https://aem-qs4.np.roberthalf.com/content/dam/hero.png?width=1200"
+FONT_URL = "https://aem-qs4.np.roberthalf.com/etc/fonts/inter.woff2"
+# GA4 hits whose page URL parameter names an image
+GA4_IMAGE_PAGE_URL = "https://region1.google-analytics.com/g/collect?v=2&dl=https%3A%2F%2Fwww.roberthalf.com%2Fhero.png&en=page_view"
+GA4_IMAGE_PAGE_LAST_URL = "https://region1.google-analytics.com/g/collect?v=2&en=page_view&dl=https%3A%2F%2Fwww.roberthalf.com%2Fhero.png"
+
+
+def har_entry(url, text="eyJvayI6IHRydWV9"):
+    return {'request': {'url': url}, 'response': {'status': 200, 'content': {'text': text, 'encoding': 'base64'}}}
+
+
+class FakeProxy:
+    def __init__(self, entries):
+        self.entries = entries
+        self.blocked = []
+
+    @property
+    def har(self):
+        return {'log': {'entries': self.entries}}
+
+    def new_har(self, ref=None, options=None):
+        entries, self.entries = self.entries, []
+        return 200, {'log': {'entries': entries}}
+
+    def blacklist(self, regexp, status_code):
+        self.blocked.append((regexp, status_code))
+
+
+def test_analytics_policy_keeps_only_asserted_requests_and_bodies():
+    proxy = FakeProxy([har_entry(GA4_URL), har_entry(IMAGE_URL), har_entry(LEAD_URL)])
+    stream = HarStream(proxy, policy=get_capture_policy('analytics'))
+
+    ga4_entry, lead_entry = stream.poll()
+    assert ga4_entry['request']['url'] == GA4_URL
+    assert 'text' not in ga4_entry['response']['content']
+    assert lead_entry['response']['content']['text'] == "eyJvayI6IHRydWV9"
+    assert len(get_capture_policy('full').filter_entries([har_entry(IMAGE_URL)])) == 1
+
+
+def test_lean_policy_blocks_heavy_resources_on_the_proxy():
+    proxy = FakeProxy([])
+    policy = get_capture_policy('lean')
+    policy.apply_to_proxy(proxy)
+
+    blocked = [regexp for regexp, _ in proxy.blocked]
+    assert any(re.fullmatch(regexp, IMAGE_URL) for regexp in blocked)
+    assert any(re.fullmatch(regexp, FONT_URL) for regexp in blocked)
+    assert not any(re.fullmatch(regexp, url) for regexp in blocked for url in (GA4_URL, GA4_IMAGE_PAGE_URL, GA4_IMAGE_PAGE_LAST_URL, LEAD_URL))
+    assert pattern_to_regex("*doubleclick.net/*") == r".*doubleclick\.net/.*"
+
+
+def test_lean_policy_blocks_heavy_resources_in_chrome_by_path_only():
+    driver_blocked = [pattern_to_regex(pattern) for pattern in get_capture_policy('lean').block]
+
+    assert any(re.fullmatch(regexp, IMAGE_URL) for regexp in driver_blocked)
+    assert not any(re.fullmatch(regexp, GA4_IMAGE_PAGE_URL) for regexp in driver_blocked)
+
+
+def test_record_patterns_are_never_blocked_on_the_proxy():
+    policy = CapturePolicy('greedy', record=GA4_COLLECT_URLS, block=("*google-analytics.com/*",))
+
+    regexp, = policy.block_regexes()
+    assert not re.fullmatch(regexp, GA4_URL)
+    assert re.fullmatch(regexp, "https://www.google-analytics.com/analytics.js")
+
+
+def test_full_capture_is_the_default():
+    assert get_capture_policy().name == 'full'
+
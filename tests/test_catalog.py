@@ -0,0 +1,153 @@
+import datetime
+
+import pytest
+from selenium.webdriver.common.by import By
+
+from .base_test import BaseTest
+from .catalog import compile_plan, load_catalog
+from .catalog_actions import ACTIONS
+from .ga4_hits import Ga4HitIndex
+from .tab_scheduler import MAX_TABS, TabScheduler
+
+CATALOG = load_catalog()
+PLANS = compile_plan(CATALOG)
+# Pages that are only checked, never interacted with, are loaded together in tabs of one browser
+LANDING_PLANS = [plan for plan in PLANS if MAX_TABS > 1 and not plan.first_visit and not any(step.action for step in plan.steps)]
+PAGE_PLANS = [plan for plan in PLANS if plan not in LANDING_PLANS]
+
+# Start this worker's browser session (conftest.py) before the first test of the module
+pytestmark = pytest.mark.usefixtures("setup_browsermob")
+
+
+class TestCatalogPage(BaseTest):
+    """Runs the steps of one catalog page, each logged under its own test case name."""
+
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.test_name = "test_catalog"
+        self.test_id = 1
+        self.metadata_string = self.get_metadata_string(
+            CATALOG['test_suite'], CATALOG['test_suite_version'], self.test_name, '1.0.0'
+        )
+
+    def start_step(self, step):
+        self.test_name = step.test_case
+        self.metadata_string = self.get_metadata_string(
+            CATALOG['test_suite'], CATALOG['test_suite_version'], step.test_case, step.test_case_version
+        )
+
+    def run_step(self, step, driver, proxy, tab=None):
+        """Run one step on the current page, or on a TabScheduler tab (focused) sharing the capture with others."""
+        if step.title_contains:
+            self.log_assert(f"Page contains '{step.title_contains}' in title", step.title_contains in driver.title, f"Page title does not contain '{step.title_contains}'")
+
+        for element_id in step.element_ids:
+            elements = driver.find_elements(By.ID, element_id)
+            self.log_assert(f"Element with ID '{element_id}' on page", len(elements) > 0, f"Element with ID '{element_id}' not found")
+
+        if step.action:
+            ACTIONS[step.action](self, driver, proxy, **step.action_params)
+
+        if step.event:
+            recorder = tab.recorder if tab else self.get_data_layer_recorder(driver)
+            self.validate_datalayer_event(recorder, step.event, step.datalayer_properties, step.check_user_ids)
+            self.validate_ga4_collect_event(proxy, step.event, step.ga4_properties, filters=tab.hit_filters() if tab else None)
+
+
+@pytest.mark.parametrize("plan", PAGE_PLANS, ids=[plan.name for plan in PAGE_PLANS])
+def test_catalog_page(setup_driver, plan):
+    test_instance = TestCatalogPage()
+    test_instance.setup_method(None)  # Initialize the test instance
+    driver, proxy = setup_driver
+    test_instance.attach_artifacts(driver, proxy, name=f"catalog_{plan.name}")
+    test_url = plan.url
+    failures = []
+
+    try:
+        # One navigation and HAR capture serves every step of the page, and the
+        # following plans for the same URL while no step has changed the page
+        test_instance.open_page(driver, test_url, first_visit=plan.first_visit)
+        test_instance.log_info(f"{test_instance.metadata_string}|'Form Loaded'|{test_url}|Form elements detected")
+
+        for step in plan.steps:
+            test_instance.start_step(step)
+            if step.mutates_page:
+                test_instance.get_page_cache(driver).mark_dirty()
+            try:
+                with test_instance.profile_step(step.test_case):
+                    test_instance.run_step(step, driver, proxy)
+            except AssertionError as e:
+                # Keep going so one failing event does not hide the results of the others
+                test_instance.log_error(f"{test_instance.metadata_string}|'Test failed'|{test_url}|{e}")
+                failures.append(f"{step.test_case}: {e}")
+
+        assert not failures, "\n".join(failures)
+
+    except AssertionError as e:
+        test_instance.test_result = "fail"
+        test_instance.test_error_description = str(e)
+        if not failures:
+            test_instance.log_error(f"{test_instance.metadata_string}|'Test failed'|{test_url}|{e}")
+        test_instance.capture_failure(str(e))  # no-op if a failed assertion already wrote the bundle
+        raise
+    except Exception as e:
+        test_instance.test_result = "fail"
+        test_instance.test_error_description = str(e)
+        test_instance.log_error(f"{test_instance.metadata_string}|'Unexpected error'|{test_url}|{e}")
+        test_instance.capture_failure(str(e))
+        # The page is in an unknown state, the next test has to load it again
+        test_instance.get_page_cache(driver).invalidate()
+        raise
+    finally:
+        test_instance.test_finish_timestamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+
+
+@pytest.mark.skipif(not LANDING_PLANS, reason="No catalog pages without actions")
+def test_catalog_landing_pages(setup_driver):
+    test_instance = TestCatalogPage()
+    test_instance.setup_method(None)
+    driver, proxy = setup_driver
+    test_instance.attach_artifacts(driver, proxy, name="catalog_landing_pages")
+    scheduler = TabScheduler(driver, proxy)
+    plans_by_url = {plan.url: plan for plan in LANDING_PLANS}
+    failures = []
+
+    try:
+        for tabs in scheduler.run(list(plans_by_url)):
+            test_instance.log_info(f"{test_instance.metadata_string}|'Tabs Loaded'|{len(tabs)} tabs|{', '.join(tab.loaded_url for tab in tabs)}")
+            for tab in tabs:
+                scheduler.focus(tab)
+                for step in plans_by_url[tab.url].steps:
+                    test_instance.start_step(step)
+                    try:
+                        with test_instance.profile_step(step.test_case):
+                            test_instance.run_step(step, driver, proxy, tab=tab)
+                    except AssertionError as e:
+                        test_instance.log_error(f"{test_instance.metadata_string}|'Test failed'|{tab.url}|{e}")
+                        failures.append(f"{tab.url} {step.test_case}: {e}")
+
+            unattributed = scheduler.attribute_hits(Ga4HitIndex.for_stream(proxy))
+            for tab in tabs:
+                test_instance.log_info(f"{test_instance.metadata_string}|'GA4 hits'|{tab.url}|{len(tab.hits)} hits from {len(tab.page_load_ids)} page loads")
+            if unattributed:
+                test_instance.log_info(f"{test_instance.metadata_string}|'GA4 hits'|unattributed|{len(unattributed)} hits matched no tab")
+
+        assert not failures, "\n".join(failures)
+
+    except AssertionError as e:
+        test_instance.test_result = "fail"
+        test_instance.test_error_description = str(e)
+        test_instance.capture_failure(str(e))
+        raise
+    except Exception as e:
+        test_instance.test_result = "fail"
+        test_instance.test_error_description = str(e)
+        test_instance.log_error(f"{test_instance.metadata_string}|'Unexpected error'|tabs|{e}")
+        test_instance.capture_failure(str(e))
+        raise
+    finally:
+        test_instance.test_finish_timestamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,15 @@
+from .catalog import compile_plan, ga4_expectations, load_catalog
+from .ga4_replay import Ga4Expectation, load_captures, replay
+from .ga4_samples import GA_COLLECT_URLS_FILE, PAGE_VIEW_PARAMS
+
+
+def test_catalog_compiles_to_one_plan_per_page():
+    plan, = compile_plan(load_catalog())
+
+    assert [step.test_case for step in plan.steps] == ["test_base_page_elements", "test_page_view", "test_phone_click", "test_form_submit"]
+    assert plan.steps[1].ga4_properties == PAGE_VIEW_PARAMS
+
+    # The captured hits only hold a page_view, so the catalog replay fails on the other events
+    expectations = [Ga4Expectation.from_dict(data) for data in ga4_expectations(load_catalog())]
+    results = replay(load_captures([GA_COLLECT_URLS_FILE]), expectations)
+    assert [result.passed for result in results] == [True, False, False]
@@ -0,0 +1,138 @@
+import base64
+import json
+
+from .capture_policy import get_capture_policy
+from .cdp_capture import CdpNetworkCapture
+from .har_stream import is_complete, response_body
+
+GA4_URL = "https://region1.google-analytics.com/g/collect?v=2&tid=G-ABC&en=page_view"
+LEAD_URL = "https://qs04-dr.int-qs-lp.api.roberthalfonline.com/proxy-lead-processing/send"
+PAGE_URL = "https://www.roberthalf.com/us/en/hire"
+
+
+def message(method, **params):
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+
+def request_sent(request_id, url, method="GET", resource_type="XHR", redirect_response=None, **request):
+    params = {'requestId': request_id, 'wallTime': 1735689600, 'type': resource_type,
+              'request': {'url': url, 'method': method, 'headers': {'Accept': "*/*"}, **request}}
+    if redirect_response is not None:
+        params['redirectResponse'] = redirect_response
+    return message('Network.requestWillBeSent', **params)
+
+
+def response_received(request_id, status=200, resource_type="XHR", mime_type="application/json"):
+    return message('Network.responseReceived', requestId=request_id, type=resource_type,
+                   response={'status': status, 'statusText': "OK", 'headers': {'Content-Type': mime_type}, 'mimeType': mime_type})
+
+
+class FakeDriver:
+    """Hands out canned performance log messages and answers the Network.* body commands."""
+
+    def __init__(self, bodies=None, post_data=None):
+        self.logs = []
+        self.bodies = bodies or {}
+        self.post_data = post_data or {}
+        self.commands = []
+
+    def get_log(self, log_type):
+        assert log_type == 'performance'
+        logs, self.logs = self.logs, []
+        return logs
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append((command, params['requestId']))
+        if command == 'Network.getResponseBody':
+            return self.bodies[params['requestId']]
+        return {'postData': self.post_data[params['requestId']]}
+
+
+def test_requests_become_har_entries_completed_as_responses_arrive():
+    driver = FakeDriver(bodies={'2': {'body': '{"status": "success"}', 'base64Encoded': False}},
+                        post_data={'2': "first_name=Ada"})
+    capture = CdpNetworkCapture(driver)
+    capture.new_har()
+
+    driver.logs = [request_sent('1', PAGE_URL, resource_type="Document"),
+                   request_sent('2', LEAD_URL, method="POST", hasPostData=True)]
+    document, lead = capture.poll()
+    assert lead['request'] == {'method': "POST", 'url': LEAD_URL, 'headers': [{'name': "Accept", 'value': "*/*"}],
+                               'postData': {'text': "first_name=Ada"}}
+    assert lead['startedDateTime'] == "2025-01-01T00:00:00+00:00"
+    assert lead['response']['status'] == 0
+
+    driver.logs = [response_received('1', resource_type="Document", mime_type="text/html"),
+                   message('Network.loadingFinished', requestId='1'),
+                   response_received('2'), message('Network.loadingFinished', requestId='2'),
+                   message('Network.dataReceived', requestId='2')]
+    assert capture.poll() == []
+    # Completed in place; only the XHR's body was fetched
+    assert document['response']['status'] == 200 and 'text' not in document['response']['content']
+    assert lead['response']['headers'] == [{'name': "Content-Type", 'value': "application/json"}]
+    assert lead['response']['content'] == {'mimeType': "application/json", 'text': '{"status": "success"}'}
+    assert response_body(lead) == '{"status": "success"}'
+    assert ('Network.getResponseBody', '1') not in driver.commands
+    assert capture.entries == [document, lead]
+
+
+def test_binary_bodies_are_stored_base64_encoded():
+    encoded = base64.b64encode(b'{"status": "success"}').decode('ascii')
+    driver = FakeDriver(bodies={'1': {'body': encoded, 'base64Encoded': True}})
+    capture = CdpNetworkCapture(driver)
+    driver.logs = [request_sent('1', LEAD_URL, resource_type="Fetch"), response_received('1', resource_type="Fetch"),
+                   message('Network.loadingFinished', requestId='1')]
+
+    entry, = capture.poll()
+
+    assert entry['response']['content']['encoding'] == 'base64'
+    assert response_body(entry) == '{"status": "success"}'
+
+
+def test_redirects_failures_and_the_capture_policy():
+    driver = FakeDriver()
+    capture = CdpNetworkCapture(driver, policy=get_capture_policy('analytics'))
+    driver.logs = [
+        request_sent('1', GA4_URL.replace("https:", "http:"), resource_type="Ping"),
+        request_sent('1', GA4_URL, resource_type="Ping", redirect_response={'status': 307, 'headers': {}}),
+        request_sent('2', PAGE_URL, resource_type="Document"),
+        request_sent('3', GA4_URL, resource_type="Ping"),
+        message('Network.loadingFailed', requestId='3', errorText="net::ERR_BLOCKED_BY_CLIENT"),
+        message('Page.frameNavigated', frame={}),
+    ]
+
+    redirect, ga4, failed = capture.poll()
+
+    # The page itself is not recorded by the analytics policy
+    assert [entry['request']['url'] for entry in (redirect, ga4, failed)] == [GA4_URL.replace("https:", "http:"), GA4_URL, GA4_URL]
+    assert redirect['response']['status'] == 307
+    assert ga4['response']['status'] == 0
+    assert failed['response']['_error'] == "net::ERR_BLOCKED_BY_CLIENT"
+
+
+def test_a_failed_request_is_complete():
+    driver = FakeDriver()
+    capture = CdpNetworkCapture(driver)
+    driver.logs = [request_sent('1', LEAD_URL, method="POST")]
+    lead, = capture.poll()
+    assert not is_complete(lead)
+
+    driver.logs = [message('Network.loadingFailed', requestId='1', errorText="net::ERR_CONNECTION_RESET")]
+    capture.poll()
+
+    assert is_complete(lead)
+    assert lead['response']['status'] == 0 and lead['response']['_error'] == "net::ERR_CONNECTION_RESET"
+
+
+def test_new_har_discards_what_was_logged_before():
+    driver = FakeDriver()
+    capture = CdpNetworkCapture(driver)
+    driver.logs = [request_sent('1', GA4_URL, resource_type="Ping")]
+    capture.poll()
+    driver.logs = [request_sent('2', PAGE_URL, resource_type="Document")]
+
+    capture.new_har()
+
+    assert capture.poll() == []
+    assert capture.entries == []
+    assert capture.generation == 1
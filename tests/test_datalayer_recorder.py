@@ -0,0 +1,137 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from .datalayer_recorder import (
+    FETCH_SCRIPT,
+    RECORDER_SCRIPT,
+    DataLayerRecorder,
+    get_event_name,
+)
+
+
+class FakeDriver:
+    """Answers FETCH_SCRIPT from a list of pushes per page, like the recorder in the browser."""
+
+    def __init__(self, cdp=True):
+        self.cdp = cdp
+        self.page_id = "page1"
+        self.pushes = []
+        self.scripts = []
+        self.cdp_commands = []
+
+    def load(self, page_id):
+        self.page_id = page_id
+        self.pushes = []
+
+    def push(self, data):
+        self.pushes.append({'seq': len(self.pushes), 't': 0, 'data': data})
+
+    def execute_cdp_cmd(self, command, params):
+        if not self.cdp:
+            raise WebDriverException("no DevTools")
+        self.cdp_commands.append((command, params))
+
+    def execute_script(self, script, page_id, cursor):
+        self.scripts.append((page_id, cursor))
+        start = cursor if page_id == self.page_id else 0
+        return {'id': self.page_id, 'start': start, 'events': self.pushes[start:]}
+
+
+def test_event_names_of_gtag_and_gtm_pushes():
+    assert get_event_name(["event", "page_view", {}]) == "page_view"
+    assert get_event_name({'event': "gtm.js"}) == "gtm.js"
+    assert get_event_name(["config", "G-123"]) is None
+    assert get_event_name({'user_id': "42"}) is None
+
+
+def test_recorder_is_installed_once_per_driver_at_document_start():
+    driver = FakeDriver()
+    recorder = DataLayerRecorder.for_driver(driver)
+
+    assert DataLayerRecorder.for_driver(driver) is recorder
+    assert driver.cdp_commands == [('Page.addScriptToEvaluateOnNewDocument', {'source': RECORDER_SCRIPT})]
+
+
+def test_recorder_without_cdp_is_injected_by_the_fetch():
+    driver = FakeDriver(cdp=False)
+    driver.push({'event': "gtm.js"})
+
+    assert DataLayerRecorder.for_driver(driver).find_event("gtm.js") == {'event': "gtm.js"}
+
+
+def test_fetch_only_transfers_new_pushes_and_starts_over_on_a_new_page():
+    driver = FakeDriver()
+    recorder = DataLayerRecorder(driver)
+    driver.push({'event': "gtm.js"})
+    driver.push(["event", "page_view", {}])
+
+    assert [event['seq'] for event in recorder.fetch_new()] == [0, 1]
+    driver.push({'event': "form_start"})
+    assert [event['seq'] for event in recorder.fetch_new()] == [2]
+    assert driver.scripts == [(None, 0), ("page1", 2)]
+    assert recorder.data_layer == [{'event': "gtm.js"}, ["event", "page_view", {}], {'event': "form_start"}]
+
+    driver.load("page2")
+    driver.push({'event': "gtm.js"})
+    assert recorder.find_event("page_view") is None
+    assert recorder.find_event("gtm.js") == {'event': "gtm.js"}
+    assert recorder.data_layer == [{'event': "gtm.js"}]
+
+
+def test_wait_for_event_fetches_until_the_event_is_pushed():
+    driver = FakeDriver()
+    recorder = DataLayerRecorder(driver)
+    driver.push(["event", "page_view", {'page': "/"}])
+
+    result = recorder.wait_for_event("page_view", timeout=1)
+
+    assert result.value == ["event", "page_view", {'page': "/"}]
+
+
+# Runs the recorder in node, with the global object standing in for the page's window
+# (scripts run in this context declare non-configurable global vars, like a browser's)
+NODE_HARNESS = """
+const vm = require('vm');
+const [page, fetch] = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+globalThis.window = globalThis;
+vm.runInThisContext(page.before);
+vm.runInThisContext(page.recorder);
+vm.runInThisContext(page.after);
+const result = vm.runInThisContext('(function () {' + fetch + '})').apply(null, [null, 0]);
+console.log(JSON.stringify(result.events.map(event => event.data)));
+"""
+
+
+def run_recorder(before, after):
+    """dataLayer pushes recorded when the page runs before, then the recorder, then after."""
+    page = {'before': before, 'recorder': RECORDER_SCRIPT, 'after': after}
+    output = subprocess.run(["node", "-e", NODE_HARNESS], input=json.dumps([page, FETCH_SCRIPT]),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_recorder_script_records_pushes_from_document_start():
+    events = run_recorder("", """
+        var dataLayer = window.dataLayer || [];
+        dataLayer.push({event: 'gtm.js'});
+        window.dataLayer = [{event: 'replaced'}];
+        dataLayer.push(['event', 'page_view']);
+    """)
+    assert events == [{'event': "gtm.js"}, {'event': "replaced"}, ["event", "page_view"]]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_recorder_script_hooks_a_dataLayer_declared_with_var():
+    # Injected after the page ran (no CDP): the global var cannot be redefined as an accessor
+    events = run_recorder("var dataLayer = [{event: 'gtm.js'}];", """
+        dataLayer.push({event: 'form_start'});
+        dataLayer = [{event: 'replaced'}];
+        dataLayer.push(['event', 'page_view']);
+    """)
+    # The reassigned dataLayer is hooked, with what it holds, by the fetch
+    assert events == [{'event': "gtm.js"}, {'event': "form_start"}, {'event': "replaced"}, ["event", "page_view"]]
@@ -0,0 +1,19 @@
+import pytest
+
+from . import drivers
+from .drivers import capture_backend_for, start_browser
+
+
+def test_engines_without_devtools_fall_back_to_the_proxy():
+    assert capture_backend_for("chrome", "cdp") == "cdp"
+    assert capture_backend_for("chrome", "browsermob") == "browsermob"
+    assert capture_backend_for("firefox", "cdp") == "browsermob"
+
+
+def test_browser_is_started_by_its_factory(monkeypatch):
+    started = []
+    monkeypatch.setitem(drivers.DRIVER_FACTORIES, "firefox", (lambda proxy, backend: started.append((proxy, backend)) or ("driver", proxy), ("browsermob",)))
+    assert start_browser("firefox", "proxy", "browsermob") == ("driver", "proxy")
+    assert started == [("proxy", "browsermob")]
+    with pytest.raises(ValueError, match="Unknown browser 'safari'"):
+        start_browser("safari", None)
@@ -0,0 +1,92 @@
+import json
+import zipfile
+
+from .datalayer_recorder import DataLayerRecorder
+from .failure_artifacts import FailureArtifacts, trim_entry
+from .profiler import start_profile, stop_profile
+
+
+class FakeDriver:
+    current_url = "https://aem-qs4.np.roberthalf.com/us/en/c/hire"
+    page_source = "<html><body>hire</body></html>"
+
+    def __init__(self):
+        self.console = [{'level': "SEVERE", 'message': "old page error"}]
+
+    def get_log(self, log_type):
+        logs, self.console = self.console, []
+        return logs
+
+    def get_screenshot_as_png(self):
+        return b"\x89PNG fake"
+
+    def execute_cdp_cmd(self, command, params):
+        return {}
+
+    def execute_script(self, script, *args):
+        return {'id': "page-1", 'start': 0, 'events': []}
+
+
+class FakeStream:
+    def __init__(self):
+        self.generation = 1
+        self.entries = []
+
+    def since(self, cursor):
+        return self.entries[cursor:], len(self.entries)
+
+    def poll(self):
+        return []
+
+
+def entry(url, body=None):
+    return {'request': {'url': url}, 'response': {'status': 200, 'content': {'text': body}}}
+
+
+def test_window_keeps_recent_entries_across_har_resets():
+    stream = FakeStream()
+    artifacts = FailureArtifacts(FakeDriver(), stream, window=3)
+    stream.entries = [entry(f"https://example.com/{i}") for i in range(2)]
+    artifacts.observe()
+    # new_har(): the stream starts over, the window keeps the older entries
+    stream.generation, stream.entries = 2, [entry(f"https://example.com/new{i}") for i in range(2)]
+    artifacts.observe()
+    artifacts.observe()
+
+    assert [e['request']['url'] for e in artifacts.network] == [
+        "https://example.com/1", "https://example.com/new0", "https://example.com/new1",
+    ]
+    assert list(artifacts.console) == []  # logged before the test started
+
+
+def test_nothing_is_written_until_a_failure_and_then_only_once(tmp_path):
+    driver, stream = FakeDriver(), FakeStream()
+    artifacts = FailureArtifacts(driver, stream, test_name="catalog hire_now", artifact_dir=str(tmp_path / "artifacts"))
+    DataLayerRecorder.for_driver(driver).events = [{'seq': 0, 't': 0, 'data': {'event': "page_view"}}]
+    stream.entries = [entry("https://www.google-analytics.com/g/collect?en=page_view", "x" * 10000)]
+    driver.console = [{'level': "SEVERE", 'message': "form error"}]
+    artifacts.observe()
+    assert not (tmp_path / "artifacts").exists()
+
+    start_profile("catalog hire_now")
+    try:
+        path = artifacts.capture("page_view missing")
+        assert artifacts.capture("second failure") is None
+    finally:
+        stop_profile()
+
+    with zipfile.ZipFile(path) as bundle:
+        # profile.json comes from the active profile
+        assert set(bundle.namelist()) == {"failure.json", "har.json", "datalayer.json", "console.json", "screenshot.png", "dom.html", "profile.json"}
+        assert json.loads(bundle.read("failure.json"))['reason'] == "page_view missing"
+        har_entry = json.loads(bundle.read("har.json"))['log']['entries'][0]
+        assert len(har_entry['response']['content']['text']) < 5000
+        assert json.loads(bundle.read("datalayer.json"))[0]['data'] == {'event': "page_view"}
+        assert json.loads(bundle.read("console.json"))[0]['message'] == "form error"
+
+
+def test_trim_entry_leaves_the_original_untouched():
+    original = entry("https://example.com/", "y" * 5000)
+    trimmed = trim_entry(original, max_body_chars=10)
+    assert trimmed['response']['content']['text'].startswith("y" * 10 + "...")
+    assert len(original['response']['content']['text']) == 5000
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from .ga4_hits import Ga4HitIndex, is_ga4_collect_url
+
+GA_COLLECT_URLS_FILE = os.path.join(os.path.dirname(__file__), '..', 'ga_collect_urls.txt')
+COLLECT_URL = "https://www.google-analytics.com/g/collect?v=2&tid=G-WPZY4L4CNK&sid=1745625618"
+
+
+@pytest.fixture(scope="module")
+def captured_index():
+    index = Ga4HitIndex()
+    with open(GA_COLLECT_URLS_FILE) as urls_file:
+        for url in urls_file:
+            if url.strip():
+                index.add_url(url.strip())
+    return index
+
+
+def test_captured_page_view_hits_are_indexed(captured_index):
+    hits = captured_index.find("page_view")
+    assert len(hits) == 2
+    assert hits[0].get('ep.page_topic') == "lead form page"
+    assert hits[0].get('ep.page_zone') == "7i2dtn"
+    assert captured_index.first("focus_click", sid="1745625618").get('ep.event_text') == "positiontitle"
+
+
+def test_batched_post_body_yields_one_hit_per_event():
+    index = Ga4HitIndex()
+    body = "en=page_view&ep.page_zone=7i2dtn\r\nen=phone_click&ep.event_text=phone%20number"
+    index.add_entry({'request': {'url': COLLECT_URL, 'postData': {'text': body}}})
+
+    assert [hit.event_name for hit in index.hits] == ["page_view", "phone_click"]
+    phone_click = index.first("phone_click", tid="G-WPZY4L4CNK")
+    assert phone_click.get('ep.event_text') == "phone number"
+    assert phone_click.get('sid') == "1745625618"
+
+
+def test_event_name_inside_other_parameters_does_not_match():
+    index = Ga4HitIndex()
+    index.add_url(COLLECT_URL + "&en=scroll&dl=https%3A%2F%2Fexample.com%2F%3Fen%3Dpage_view&ep.note=en=page_view")
+    index.add_entry({'request': {'url': "https://example.com/collect?en=page_view"}})
+
+    assert index.find("page_view") == []
+    assert len(index.find("scroll")) == 1
+    assert not is_ga4_collect_url("https://example.com/collect?en=page_view")
@@ -0,0 +1,39 @@
+import json
+
+from .ga4_replay import Ga4Expectation, load_captures, main, replay
+from .ga4_samples import GA_COLLECT_URLS_FILE, PAGE_VIEW_PARAMS
+
+
+def test_captured_hits_meet_page_view_expectations():
+    index = load_captures([GA_COLLECT_URLS_FILE])
+    results = replay(index, [Ga4Expectation("page_view", PAGE_VIEW_PARAMS)])
+
+    assert results[0].passed, results[0].failures
+    assert len(results[0].checks) == 2 * len(PAGE_VIEW_PARAMS)
+
+
+def test_replay_reports_wrong_values_and_missing_events(tmp_path):
+    har_file = tmp_path / "capture.har"
+    with open(GA_COLLECT_URLS_FILE) as urls_file:
+        entries = [{'request': {'url': url.strip()}} for url in urls_file if url.strip()]
+    har_file.write_text(json.dumps({'log': {'entries': entries}}))
+
+    index = load_captures([str(har_file)])
+    wrong_zone, missing = replay(index, [
+        Ga4Expectation("page_view", {"ep.page_zone": "other"}),
+        Ga4Expectation("phone_click", {}),
+    ])
+
+    assert wrong_zone.failures == ["Value for 'ep.page_zone' does not match expected value. Expected: other, Found: 7i2dtn"]
+    assert missing.failures == ["No GA4 phone_click request found"]
+
+
+def test_cli_exit_code(tmp_path, capsys):
+    expectations_file = tmp_path / "expectations.json"
+    expectations_file.write_text(json.dumps([{"event": "page_view", "params": PAGE_VIEW_PARAMS}]))
+    assert main([GA_COLLECT_URLS_FILE, "--expectations", str(expectations_file)]) == 0
+
+    expectations_file.write_text(json.dumps([{"event": "page_view", "params": {"ep.page_zone": "other"}}]))
+    assert main([GA_COLLECT_URLS_FILE, "--expectations", str(expectations_file)]) == 1
+    assert "FAIL  page_view" in capsys.readouterr().out
+
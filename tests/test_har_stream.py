@@ -0,0 +1,150 @@
+import base64
+import json
+
+from .har_stream import HarStream, iter_har_entries, response_body
+
+
+def entry(url, text=None, encoding=None):
+    content = {'size': 12345, 'mimeType': "application/json"}
+    if text is not None:
+        content['text'] = text
+    if encoding:
+        content['encoding'] = encoding
+    return {'request': {'url': url, 'method': "GET"}, 'response': {'status': 200, 'content': content}, 'time': 1.5}
+
+
+def chunked(text, size):
+    return (text[index:index + size] for index in range(0, len(text), size))
+
+
+class FakeProxy:
+    """BrowserMob's HAR REST calls: har reads the current HAR, new_har() rotates it."""
+
+    def __init__(self):
+        self.entries = []
+        self.rotations = 0
+
+    @property
+    def har(self):
+        return {'log': {'entries': [json.loads(json.dumps(e)) for e in self.entries]}}
+
+    def new_har(self, ref=None, options=None):
+        har, self.entries = self.har, []
+        self.rotations += 1
+        return 200, har
+
+
+def test_entries_are_parsed_incrementally_across_chunk_boundaries():
+    entries = [entry(f"https://example.com/{index}", "é" * index + ' "entries": [') for index in range(20)]
+    har = {'log': {'version': "1.2", 'pages': [{'title': '"entries": []'}], 'entries': entries, 'comment': ""}}
+    text = json.dumps(har, ensure_ascii=False, indent=1)
+
+    for size in (1, 7, 4096):
+        assert list(iter_har_entries(chunked(text, size))) == entries
+    assert list(iter_har_entries(chunked(json.dumps({'log': {'entries': []}}), 3))) == []
+
+
+def test_bodies_are_decoded_only_when_asked_for():
+    encoded = base64.b64encode(b'{"status": "success"}').decode("ascii")
+    assert response_body(entry("https://example.com/", encoded, "base64")) == '{"status": "success"}'
+    assert response_body(entry("https://example.com/", '{"plain": true}')) == '{"plain": true}'
+    assert response_body(entry("https://example.com/")) is None
+
+
+def test_store_is_bounded_and_cursors_survive_trimming():
+    proxy = FakeProxy()
+    stream = HarStream(proxy, max_entries=3)
+    proxy.entries = [entry(f"https://example.com/{index}") for index in range(2)]
+    stream.poll()
+    _, cursor = stream.since(0)
+
+    proxy.entries += [entry(f"https://example.com/{index}") for index in range(2, 6)]
+    stream.poll()
+
+    new_entries, cursor = stream.since(cursor)
+    assert [e['request']['url'][-1] for e in stream.entries] == ["3", "4", "5"]
+    assert [e['request']['url'][-1] for e in new_entries] == ["3", "4", "5"]  # 2 was dropped before it was read
+    assert cursor == 6
+
+
+def test_in_flight_entries_are_completed_by_a_later_read_and_hold_up_rotation():
+    proxy = FakeProxy()
+    stream = HarStream(proxy, rotate_after=2)
+    lead = entry("https://example.com/lead")
+    lead['startedDateTime'] = "2024-01-01T00:00:00Z"
+    lead['response'] = {'status': 0, 'content': {}}
+    proxy.entries = [entry("https://example.com/page"), lead]
+    stream.poll()
+    stored = stream.entries[1]
+    assert stored['response']['status'] == 0
+
+    # The response arrives in the same proxy HAR; it is not rotated while the lead is in flight
+    proxy.entries[1]['response'] = {'status': 200, 'content': {'text': '{"status": "success"}'}}
+    proxy.entries.append(entry("https://example.com/hit"))
+    stream.poll()
+    assert proxy.rotations == 0
+    assert stored['response']['status'] == 200  # completed in place
+    assert response_body(stored) == '{"status": "success"}'
+    assert [e['request']['url'] for e in stream.since(2)[0]] == ["https://example.com/hit"]
+
+    # Nothing in flight any more: the HAR is rotated and only new entries are read from the next one
+    stream.poll()
+    proxy.entries.append(entry("https://example.com/later"))
+    stream.poll()
+    assert proxy.rotations == 1
+    assert [e['request']['url'].rsplit("/", 1)[1] for e in stream.entries] == ["page", "lead", "hit", "later"]
+
+
+def test_har_is_rotated_once_a_read_finds_it_over_the_byte_budget():
+    proxy = FakeProxy()
+    stream = HarStream(proxy, rotate_bytes=2000)
+    proxy.entries = [entry(f"https://example.com/{index}") for index in range(3)]
+    stream.poll()
+    stream.poll()
+    assert proxy.rotations == 0
+
+    proxy.entries += [entry(f"https://example.com/{index}") for index in range(3, 20)]
+    stream.poll()
+    assert proxy.rotations == 0
+    # The next read is the rotation, and the one after that only sees what is new
+    proxy.entries.append(entry("https://example.com/20"))
+    assert [e['request']['url'] for e in stream.poll()] == ["https://example.com/20"]
+    proxy.entries.append(entry("https://example.com/21"))
+    assert [e['request']['url'] for e in stream.poll()] == ["https://example.com/21"]
+    assert proxy.rotations == 1
+    assert len(stream.entries) == 22
+
+
+def test_an_oversized_har_is_rotated_even_with_entries_in_flight():
+    proxy = FakeProxy()
+    stream = HarStream(proxy, rotate_bytes=1000, max_har_bytes=5000)
+    stuck = entry("https://example.com/stream")
+    stuck['response'] = {'status': 0, 'content': {}}
+    proxy.entries = [stuck] + [entry(f"https://example.com/{index}") for index in range(5)]
+    stream.poll()
+    stream.poll()
+    assert proxy.rotations == 0  # over the budget, but held up by the request in flight
+
+    proxy.entries += [entry(f"https://example.com/{index}") for index in range(5, 40)]
+    stream.poll()
+    stream.poll()
+    assert proxy.rotations == 1
+    assert stream._in_flight == {}
+
+
+def test_a_failed_request_no_longer_holds_up_rotation():
+    proxy = FakeProxy()
+    stream = HarStream(proxy, rotate_after=1)
+    lead = entry("https://example.com/lead")
+    lead['startedDateTime'] = "2024-01-01T00:00:00Z"
+    lead['response'] = {'status': 0, 'content': {}}
+    proxy.entries = [lead]
+    stream.poll()
+    assert proxy.rotations == 0
+
+    # BrowserMob keeps status 0 for a request that failed and records the error instead
+    proxy.entries[0]['response']['_error'] = "Unable to connect to host"
+    stream.poll()
+    assert stream.entries[0]['response']['_error'] == "Unable to connect to host"
+    stream.poll()
+    assert proxy.rotations == 1
@@ -0,0 +1,116 @@
+import gzip
+import os
+import threading
+import uuid
+
+import pytest
+
+from .log_uploader import LogUploader, make_storage_client
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.content_encoding = None
+
+    def upload_from_filename(self, file_name, content_type=None):
+        if self.bucket.failures:
+            self.bucket.failures -= 1
+            raise ConnectionError("network down")
+        with open(file_name, "rb") as uploaded:
+            self.bucket.objects[self.name] = uploaded.read()
+
+
+class FakeBucket:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.objects = {}
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+class FakeClient:
+    def __init__(self, bucket):
+        self._bucket = bucket
+
+    def bucket(self, name):
+        return self._bucket
+
+
+def write_log(tmp_path, name="20250101000000_logs_automationqa.jsonl"):
+    log_file = tmp_path / name
+    log_file.write_text('{"level": "info", "message": "hello"}\n')
+    return str(log_file)
+
+
+def test_submitted_logs_are_compressed_and_uploaded_in_the_background(tmp_path):
+    bucket = FakeBucket(failures=2)
+    uploader = LogUploader(spool_dir=str(tmp_path / "spool"), run_id="run1",
+                           client_factory=lambda: FakeClient(bucket), retry_delay=0.01)
+    uploader.submit(write_log(tmp_path))
+    uploader.close(timeout=5)
+
+    uploaded = bucket.objects["run1/20250101000000_logs_automationqa.jsonl.gz"]
+    assert gzip.decompress(uploaded) == b'{"level": "info", "message": "hello"}\n'
+    assert uploader.failed == []
+    assert os.listdir(tmp_path / "spool" / "run1") == [".owner"]
+
+
+def test_resubmitting_a_file_spools_a_new_copy_and_uploads_them_in_order(tmp_path):
+    bucket = FakeBucket()
+    connected = threading.Event()
+
+    def client_factory():
+        # Hold the first upload back until the file has been submitted twice
+        connected.wait(5)
+        return FakeClient(bucket)
+
+    uploader = LogUploader(spool_dir=str(tmp_path / "spool"), run_id="run1", client_factory=client_factory)
+    log_file = write_log(tmp_path)
+    first = uploader.submit(log_file)
+    with open(log_file, "a") as log:
+        log.write('{"level": "info", "message": "again"}\n')
+    second = uploader.submit(log_file)
+    assert first != second
+    with open(first, "rb") as spooled:
+        assert gzip.decompress(spooled.read()).count(b"\n") == 1
+    connected.set()
+    uploader.close(timeout=5)
+
+    assert uploader.uploaded == [first, second]
+    uploaded = bucket.objects["run1/20250101000000_logs_automationqa.jsonl.gz"]
+    assert gzip.decompress(uploaded).count(b"\n") == 2
+
+
+def test_logs_spooled_by_a_crashed_run_are_uploaded_by_the_next_one(tmp_path):
+    spool_dir = str(tmp_path / "spool")
+    bucket = FakeBucket(failures=100)
+    crashed = LogUploader(spool_dir=spool_dir, run_id="crashed", client_factory=lambda: FakeClient(bucket),
+                          max_attempts=1)
+    crashed.submit(write_log(tmp_path))
+    crashed.close(timeout=5)
+    assert crashed.failed
+    # Pretend the owning process is gone
+    (tmp_path / "spool" / "crashed" / ".owner").write_text("999999999")
+
+    bucket.failures = 0
+    uploader = LogUploader(spool_dir=spool_dir, run_id="next", client_factory=lambda: FakeClient(bucket))
+    uploader.close(timeout=5)
+
+    assert list(bucket.objects) == ["crashed/20250101000000_logs_automationqa.jsonl.gz"]
+    assert os.listdir(spool_dir) == []
+
+
+@pytest.mark.skipif(not os.environ.get("STORAGE_EMULATOR_HOST"), reason="needs a GCS emulator such as fake-gcs-server")
+def test_upload_to_storage_emulator(tmp_path):
+    client = make_storage_client()
+    bucket_name = f"qa-logs-{uuid.uuid4().hex[:8]}"
+    client.create_bucket(bucket_name)
+
+    uploader = LogUploader(bucket_name=bucket_name, spool_dir=str(tmp_path / "spool"), run_id="emulated")
+    uploader.submit(write_log(tmp_path))
+    uploader.close(timeout=30)
+
+    assert [blob.name for blob in client.list_blobs(bucket_name)] == ["emulated/20250101000000_logs_automationqa.jsonl.gz"]
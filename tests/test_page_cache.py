@@ -0,0 +1,44 @@
+from .page_cache import PageCache
+
+HIRE_URL = "https://aem-qs4.np.roberthalf.com/us/en/c/hire?internal_user=qaselenium&urm_campaign=qaTest"
+
+
+class FakeDriver:
+    def __init__(self, current_url="about:blank"):
+        self.current_url = current_url
+
+
+def prepared_cache(driver, url=HIRE_URL):
+    cache = PageCache(driver)
+    state = cache.start_load(url)
+    state.loaded = state.refreshed = state.cookie_dismissed = True
+    state.loaded_url = driver.current_url = url
+    return cache
+
+
+def test_prepared_page_is_reused_until_marked_dirty():
+    driver = FakeDriver()
+    cache = prepared_cache(driver)
+
+    assert cache.lookup(HIRE_URL) is cache.state
+    assert cache.lookup(HIRE_URL, refresh=False, dismiss_cookie=False) is cache.state
+    assert cache.lookup(HIRE_URL + "&other=1") is None
+
+    cache.mark_dirty()
+    assert not cache.reusable
+    assert cache.lookup(HIRE_URL) is None
+    assert (cache.hits, cache.loads) == (2, 1)
+
+
+def test_page_is_not_reused_after_navigating_away_or_partial_preparation():
+    driver = FakeDriver()
+    cache = prepared_cache(driver)
+    driver.current_url = "https://www.roberthalf.com/us/en"
+    assert cache.lookup(HIRE_URL) is None
+    assert cache.state is None
+
+    state = cache.start_load(HIRE_URL)
+    state.loaded = True
+    state.loaded_url = driver.current_url = HIRE_URL
+    assert cache.lookup(HIRE_URL) is None
+    assert cache.lookup(HIRE_URL, refresh=False, dismiss_cookie=False) is state
@@ -0,0 +1,84 @@
+import json
+import os
+
+from .catalog import compile_plan
+from .page_cache import PageCache
+from .profile_snapshot import (
+    COOKIES_FILE,
+    USER_DATA,
+    ProfileClone,
+    is_seeded,
+    seed_cookie,
+)
+
+COOKIES = [
+    {'name': "_ga", 'value': "GA1.1.123.456", 'domain': ".roberthalf.com", 'path': "/", 'expires': 1.9e9,
+     'size': 24, 'httpOnly': False, 'secure': False, 'session': False, 'priority': "Medium"},
+    {'name': "OptanonAlertBoxClosed", 'value': "2024-01-01", 'domain': ".roberthalf.com", 'path': "/", 'expires': -1,
+     'size': 31, 'httpOnly': False, 'secure': True, 'session': True, 'sameSite': "Lax"},
+]
+
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = "about:blank"
+        self.cdp_commands = []
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp_commands.append((command, params))
+        return {}
+
+
+def write_snapshot(path):
+    os.makedirs(path / USER_DATA / "Default")
+    (path / USER_DATA / "Default" / "Cookies").write_bytes(b"sqlite")
+    os.symlink("builder-1234", path / USER_DATA / "SingletonLock")
+    (path / COOKIES_FILE).write_text(json.dumps({'cookies': [seed_cookie(cookie) for cookie in COOKIES]}))
+
+
+def test_each_clone_is_a_private_unlocked_copy(tmp_path):
+    write_snapshot(tmp_path / "snapshot")
+    clones = [ProfileClone(str(tmp_path / "snapshot"), parent_dir=str(tmp_path)) for _ in range(2)]
+
+    assert clones[0].path != clones[1].path
+    for clone in clones:
+        with open(os.path.join(clone.path, "Default", "Cookies"), "rb") as cookies:
+            assert cookies.read() == b"sqlite"
+        assert not os.path.lexists(os.path.join(clone.path, "SingletonLock"))
+    clones[0].remove()
+    assert not os.path.exists(clones[0].path)
+    assert os.path.lexists(tmp_path / "snapshot" / USER_DATA / "SingletonLock")  # the snapshot is left alone
+
+
+def test_seeded_cookies_are_restored_as_cdp_cookie_params(tmp_path):
+    write_snapshot(tmp_path / "snapshot")
+    clone = ProfileClone(str(tmp_path / "snapshot"), parent_dir=str(tmp_path))
+    driver = FakeDriver()
+    assert not is_seeded(driver)
+    clone.attach(driver)
+    assert is_seeded(driver)
+
+    clone.restore_cookies(driver)
+    (command, params), = driver.cdp_commands
+    assert command == "Network.setCookies"
+    assert params['cookies'][0] == {'name': "_ga", 'value': "GA1.1.123.456", 'domain': ".roberthalf.com", 'path': "/",
+                                    'secure': False, 'httpOnly': False, 'expires': 1.9e9}
+    assert 'expires' not in params['cookies'][1]
+
+
+def test_seeded_pages_are_not_handed_to_first_visit_tests():
+    url = "https://www.roberthalf.com/us/en/c/hire"
+    driver = FakeDriver()
+    cache = PageCache(driver)
+    state = cache.start_load(url)
+    state.loaded = state.seeded = state.refreshed = state.cookie_dismissed = True
+    state.loaded_url = driver.current_url = url
+
+    assert cache.lookup(url) is state
+    assert cache.lookup(url, first_visit=True) is None
+
+    plans = compile_plan({'pages': [
+        {'name': "hire", 'url': url, 'first_visit': True, 'checks': [{'test_case': "test_banner"}]},
+        {'name': "home", 'url': "https://www.roberthalf.com/us/en", 'checks': [{'test_case': "test_home"}]},
+    ]})
+    assert [plan.first_visit for plan in plans] == [True, False]
@@ -0,0 +1,35 @@
+import json
+
+from .profiler import RunProfile, profiled, start_profile, step, stop_profile
+
+
+@profiled("har:poll")
+def poll():
+    with step("sleep"):
+        pass
+
+
+def test_nested_steps_are_counted_and_written(tmp_path):
+    start_profile("test_form_submit")
+    with step("open_page"):
+        poll()
+        poll()
+    profiler = stop_profile()
+
+    assert profiler.stats[("open_page", "har:poll")].count == 2
+    assert profiler.stats[("open_page", "har:poll", "sleep")].count == 2
+    assert profiler.summary().splitlines()[1].startswith("  open_page: ")
+    assert all(line.startswith("test_form_submit;open_page") for line in profiler.collapsed())
+
+    run_profile = RunProfile(worker="gw0", profile_dir=str(tmp_path))
+    run_profile.add(profiler)
+    with open(run_profile.write()) as profile_file:
+        profile = json.load(profile_file)
+    assert profile['totals']["open_page;har:poll"]['count'] == 2
+    assert [test['name'] for test in profile['tests']] == ["test_form_submit"]
+
+
+def test_steps_are_not_recorded_without_an_active_profile():
+    stop_profile()
+    poll()  # must not fail nor record anywhere
+    assert stop_profile() is None
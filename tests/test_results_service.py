@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+
+import pytest
+from werkzeug.serving import make_server
+
+from server import ResultsStore, create_app
+
+from .results_reporter import ResultsPlugin, ResultsReporter
+
+
+class FakeReport:
+    def __init__(self, nodeid, when, outcome="passed", duration=0.5):
+        self.nodeid = nodeid
+        self.when = when
+        self.outcome = outcome
+        self.duration = duration
+        self.failed = outcome == "failed"
+        self.skipped = outcome == "skipped"
+
+
+@pytest.fixture
+def results_server():
+    store = ResultsStore(max_results=2)
+    server = make_server("127.0.0.1", 0, create_app(store), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield store, f"http://127.0.0.1:{server.port}"
+    server.shutdown()
+    thread.join()
+
+
+def test_plugin_reports_through_the_service(results_server):
+    store, url = results_server
+    reporter = ResultsReporter(url)
+    plugin = ResultsPlugin(reporter, worker="gw1")
+
+    for nodeid, call_outcome in (("test_a", "passed"), ("test_b", "failed"), ("test_c", "passed")):
+        plugin.pytest_runtest_logstart(nodeid, None)
+        for when in ("setup", "call", "teardown"):
+            plugin.pytest_runtest_logreport(FakeReport(nodeid, when, call_outcome if when == "call" else "passed"))
+    plugin.pytest_runtest_logstart("test_d", None)
+    reporter.close()
+
+    assert reporter.dropped == 0
+    # The ring buffer only keeps the latest two results, the counters keep everything
+    assert [result['test'] for result in store.latest()] == ["test_b", "test_c"]
+    assert store.latest()[0]['duration'] == 1.5
+    status = store.status()
+    assert status['counts'] == {'passed': 2, 'failed': 1, 'error': 0, 'skipped': 0}
+    assert [event['test'] for event in status['running']] == ["test_d"]
+
+
+def test_metrics_and_invalid_events():
+    store = ResultsStore()
+    client = create_app(store).test_client()
+    response = client.post("/api/events", data=json.dumps({'type': "finish", 'test': "t", 'outcome': "passed", 'duration': 7}),
+                           content_type="application/json")
+    assert response.get_json() == {'accepted': 1}
+    assert client.post("/api/events", json={'type': "bogus"}).status_code == 400
+
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert 'selenium_tests_total{outcome="passed"} 1' in metrics
+    assert 'selenium_test_duration_seconds_bucket{le="5"} 0' in metrics
+    assert 'selenium_test_duration_seconds_bucket{le="10"} 1' in metrics
+    assert "selenium_test_duration_seconds_count 1" in metrics
+
+
+def test_a_batch_with_an_invalid_event_is_rejected_as_a_whole():
+    store = ResultsStore()
+    client = create_app(store).test_client()
+    batch = [{'type': "start", 'test': "test_a"}, {'type': "finish", 'test': "test_a", 'outcome': "passed"}, {'type': "bogus"}]
+
+    assert client.post("/api/events", json=batch).status_code == 400
+    assert store.latest() == []
+    assert store.status()['running'] == []
+
+
+def test_tests_that_never_finish_stop_counting_as_running():
+    store = ResultsStore(running_ttl=0.05)
+    store.add({'type': "start", 'test': "test_killed", 'worker': "gw0"})
+    assert "selenium_tests_running 1" in store.metrics()
+
+    time.sleep(0.1)
+    store.add({'type': "start", 'test': "test_next", 'worker': "gw1"})
+
+    assert [event['test'] for event in store.status()['running']] == ["test_next"]
+    assert store.running.keys() == {("gw1", "test_next")}
@@ -0,0 +1,65 @@
+import datetime
+import json
+import os
+
+from .results_store import ResultsDatabase, main
+
+METADATA = "rh_hire_page|1.0.0|page_view|1.0.0"
+
+
+def write_log(path, run_results, start=None):
+    """One test run per entry of run_results: a list of (title, passed) asserts, a second apart and each taking 0.25s."""
+    start = start or datetime.datetime.now() - datetime.timedelta(days=1)
+    with open(path, "w") as log_file:
+        for index, results in enumerate(run_results):
+            timestamp = start + datetime.timedelta(minutes=index)
+            log_file.write(json.dumps({'timestamp': timestamp.isoformat(), 'run_id': f"run{index}", 'message': "Navigate"}) + "\n")
+            for title, passed in results:
+                timestamp += datetime.timedelta(seconds=1)
+                log_file.write(json.dumps({
+                    'timestamp': timestamp.isoformat(), 'run_id': f"run{index}", 'metadata': METADATA,
+                    'title': title, 'result': "success" if passed else "failed", 'duration': 0.25,
+                }) + "\n")
+
+
+def write_profile(path, durations):
+    with open(path, "w") as profile_file:
+        json.dump({'started': datetime.datetime.now().isoformat(), 'worker': "gw0",
+                   'tests': [{'name': name, 'wall_time': wall_time} for name, wall_time in durations]}, profile_file)
+
+
+def test_flaky_asserts_and_duration_percentiles(tmp_path):
+    write_log(tmp_path / "1_logs_automationqa.jsonl", [
+        [("GA4 page_view", True), ("dataLayer page_view", True)],
+        [("GA4 page_view", False), ("dataLayer page_view", True)],
+        [("GA4 page_view", True), ("dataLayer page_view", True)],
+    ])
+    write_profile(tmp_path / "1_gw0.json", [("test_a", float(seconds)) for seconds in range(1, 21)] + [("test_b", 3.0)])
+    database = ResultsDatabase(str(tmp_path / "results.sqlite"))
+
+    assert database.ingest([str(tmp_path)]) == 2
+    assert database.ingest([str(tmp_path)]) == 0  # unchanged files are skipped
+
+    flaky = database.flaky_asserts(days=30)
+    assert [(row['title'], row['failures'], row['runs']) for row in flaky] == [("GA4 page_view", 1, 3)]
+    assert database.flaky_asserts(days=0.5) == []
+
+    durations = {row['test']: row for row in database.test_durations()}
+    assert (durations['test_a']['p50'], durations['test_a']['p95'], durations['test_a']['runs']) == (10.0, 19.0, 20)
+    assert durations['test_b']['p95'] == 3.0
+    assert database.connection.execute("SELECT duration FROM asserts LIMIT 1").fetchone() == (0.25,)
+
+
+def test_appended_log_is_ingested_again_without_duplicates(tmp_path, capsys):
+    log_path = tmp_path / "1_logs_automationqa.jsonl"
+    database_path = str(tmp_path / "results.sqlite")
+    write_log(log_path, [[("GA4 page_view", True)]])
+    main(["--db", database_path, "ingest", str(log_path)])
+
+    write_log(log_path, [[("GA4 page_view", True)], [("GA4 page_view", False)]])
+    os.utime(log_path, (0, 1))
+    main(["--db", database_path, "ingest", str(log_path)])
+
+    capsys.readouterr()
+    assert main(["--db", database_path, "--json", "flaky"]) == 0
+    assert json.loads(capsys.readouterr().out)[0]['runs'] == 2
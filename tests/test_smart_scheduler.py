@@ -0,0 +1,155 @@
+from .smart_scheduler import SmartSchedulerPlugin, TestHistory
+
+pytest_plugins = ["pytester"]
+
+FLAKY_TEST_FILE = """
+import os
+
+COUNTER = os.path.join(os.path.dirname(__file__), "attempts")
+
+
+def attempt():
+    count = int(open(COUNTER).read()) + 1 if os.path.exists(COUNTER) else 1
+    open(COUNTER, "w").write(str(count))
+    return count
+
+
+def test_flaky():
+    assert attempt() >= 2
+
+
+def test_broken():
+    assert False
+
+
+def test_new():
+    pass
+"""
+
+
+def history():
+    return TestHistory(
+        runs={
+            'test_file.py::test_flaky': [("passed", 1.0), ("failed", 1.0), ("passed", 3.0)],
+            'test_file.py::test_broken': [("failed", 2.0), ("failed", 2.0)],
+            'test_file.py::test_slow': [("passed", 30.0)],
+            'test_file.py::test_fast': [("passed", 1.0)],
+        },
+        flaky_checks={("page_view", "GA4 request found in HAR logs")},
+    )
+
+
+def test_last_failed_then_new_then_by_failure_rate_and_duration():
+    order = history().order([
+        'test_file.py::test_fast', 'test_file.py::test_slow', 'test_file.py::test_flaky',
+        'test_file.py::test_new', 'test_file.py::test_broken',
+    ])
+    assert order == [
+        'test_file.py::test_broken', 'test_file.py::test_new', 'test_file.py::test_flaky',
+        'test_file.py::test_slow', 'test_file.py::test_fast',
+    ]
+
+
+def test_only_known_flaky_failures_are_retried():
+    test_history = history()
+    assert test_history.is_flaky_failure('test_file.py::test_other', [("page_view", "GA4 request found in HAR logs")])
+    assert not test_history.is_flaky_failure('test_file.py::test_flaky', [("page_view", "dataLayer page_view")])
+    assert test_history.is_flaky_failure('test_file.py::test_flaky', [])
+    assert not test_history.is_flaky_failure('test_file.py::test_broken', [])
+
+
+def test_plugin_retries_flaky_tests_and_fails_fast_on_the_rest(pytester):
+    pytester.makepyfile(test_file=FLAKY_TEST_FILE)
+    plugin = SmartSchedulerPlugin(history(), max_retries=2, fail_fast=True)
+    result = pytester.runpytest("-v", plugins=[plugin])
+
+    # test_broken runs first, fails without a retry and stops the run
+    result.assert_outcomes(failed=1)
+    assert plugin.retried == {}
+
+    result = pytester.runpytest("-v", "-k", "flaky or new", plugins=[SmartSchedulerPlugin(history())])
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(["*1 known-flaky tests retried*", "*test_flaky: 1 retries"])
+
+
+SESSION_FIXTURE_FILES = {
+    'conftest': """
+import pytest
+
+EVENTS = []
+
+
+@pytest.fixture(scope="session")
+def browser_pools():
+    EVENTS.append("session setup")
+    yield
+    EVENTS.append("session teardown")
+
+
+@pytest.fixture(scope="module")
+def browser_pool(browser_pools):
+    EVENTS.append("module setup")
+    yield
+    EVENTS.append("module teardown")
+
+
+def pytest_sessionfinish():
+    print("EVENTS", EVENTS)
+""",
+    'test_file': """
+import os
+
+COUNTER = os.path.join(os.path.dirname(__file__), "attempts")
+
+
+def test_new(browser_pool):
+    pass
+
+
+def test_flaky(browser_pool):
+    count = int(open(COUNTER).read()) + 1 if os.path.exists(COUNTER) else 1
+    open(COUNTER, "w").write(str(count))
+    assert count >= 2
+""",
+}
+
+
+def test_retrying_the_last_test_keeps_module_and_session_fixtures_up(pytester):
+    pytester.makepyfile(**SESSION_FIXTURE_FILES)
+    history = TestHistory(runs={'test_file.py::test_flaky': [("passed", 1.0), ("failed", 1.0)]}, flaky_checks=set())
+    plugin = SmartSchedulerPlugin(history, max_retries=2)
+    # test_new has no history, so it runs first and test_flaky is the last test of the session
+    result = pytester.runpytest("-s", plugins=[plugin])
+
+    result.assert_outcomes(passed=2)
+    assert plugin.retried == {'test_file.py::test_flaky': 1}
+    assert "EVENTS ['session setup', 'module setup', 'module teardown', 'session teardown']" in result.stdout.str()
+
+
+TEARDOWN_ERROR_FILE = """
+import pytest
+
+
+@pytest.fixture
+def page():
+    yield
+    raise RuntimeError("page did not close")
+
+
+class TestCatalog:
+    @pytest.mark.parametrize("action", ["apply"])
+    def test_broken(self, page, action):
+        assert False
+"""
+
+
+def test_a_teardown_error_after_a_failed_call_is_reported_too(pytester):
+    pytester.makepyfile(test_file=TEARDOWN_ERROR_FILE)
+    history = TestHistory(runs={'test_file.py::TestCatalog::test_broken[apply]': [("passed", 1.0), ("failed", 1.0)]},
+                          flaky_checks=set())
+    plugin = SmartSchedulerPlugin(history, max_retries=1)
+    result = pytester.runpytest(plugins=[plugin])
+
+    result.assert_outcomes(failed=1, errors=1)
+    assert plugin.retried == {'test_file.py::TestCatalog::test_broken[apply]': 1}
+    result.stdout.fnmatch_lines(["*RuntimeError: page did not close*"])
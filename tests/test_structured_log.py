@@ -0,0 +1,67 @@
+import datetime
+import json
+import logging
+import threading
+import time
+
+from .structured_log import BufferedLogWriter
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_are_written_as_json_lines_per_file(tmp_path):
+    writer = BufferedLogWriter()
+    first, second = tmp_path / "first.jsonl", tmp_path / "second.jsonl"
+    writer.write(str(first), {'message': "hello", 'time': datetime.datetime(2025, 1, 1)})
+    writer.write(str(second), {'message': "other file"})
+    writer.write(str(first), {'message': "again"})
+    writer.close()
+
+    assert read_records(first) == [{'message': "hello", 'time': "2025-01-01 00:00:00"}, {'message': "again"}]
+    assert read_records(second) == [{'message': "other file"}]
+    assert writer.file_names == []
+
+
+def test_flush_returns_once_everything_queued_before_it_is_on_disk(tmp_path):
+    writer = BufferedLogWriter()
+    log_file = tmp_path / "test.jsonl"
+    for index in range(100):
+        writer.write(str(log_file), {'index': index})
+    writer.flush()
+
+    assert [record['index'] for record in read_records(log_file)] == list(range(100))
+    assert writer.file_names == [str(log_file)]
+    writer.close()
+
+
+def test_writes_block_once_the_queue_is_full(tmp_path):
+    writer = BufferedLogWriter(max_queued_records=1)
+    log_file = str(tmp_path / "test.jsonl")
+    # Stall the writer thread on its first record
+    with writer._files_lock:
+        writer.write(log_file, {'index': 0})
+        while writer.queue.qsize():
+            time.sleep(0.01)
+        writer.write(log_file, {'index': 1})
+        blocked = threading.Thread(target=writer.write, args=(log_file, {'index': 2}))
+        blocked.start()
+        blocked.join(0.2)
+        assert blocked.is_alive()
+    blocked.join(5)
+    writer.close()
+
+    assert [record['index'] for record in read_records(tmp_path / "test.jsonl")] == [0, 1, 2]
+
+
+def test_a_bad_record_is_logged_and_the_writer_keeps_going(tmp_path, caplog):
+    writer = BufferedLogWriter()
+    log_file = tmp_path / "test.jsonl"
+    with caplog.at_level(logging.WARNING):
+        writer.write(str(tmp_path / "missing" / "test.jsonl"), {'message': "lost"})
+        writer.write(str(log_file), {'message': "kept"})
+        writer.close()
+
+    assert "Could not write log record" in caplog.text
+    assert read_records(log_file) == [{'message': "kept"}]
@@ -0,0 +1,46 @@
+from .ga4_hits import Ga4Hit, Ga4HitIndex
+from .tab_scheduler import Tab, TabScheduler
+
+HIRE_URL = "https://aem-qs4.np.roberthalf.com/us/en/c/hire"
+JOBS_URL = "https://aem-qs4.np.roberthalf.com/us/en/jobs"
+
+
+class FakeDriver:
+    current_window_handle = "main"
+
+
+def scheduler_with_tabs(*urls):
+    scheduler = TabScheduler(FakeDriver(), proxy=None, max_tabs=2)
+    for index, url in enumerate(urls):
+        tab = Tab(url, f"tab-{index}", recorder=None)
+        tab.loaded_url = url + "?loaded=1"
+        scheduler.tabs.append(tab)
+    return scheduler
+
+
+def hit(**params):
+    return Ga4Hit("https://www.google-analytics.com/g/collect", params)
+
+
+def test_batches_hold_distinct_urls_up_to_max_tabs():
+    scheduler = TabScheduler(FakeDriver(), proxy=None, max_tabs=2)
+    assert scheduler.batches(["a", "b", "c", "a", "a"]) == [["a", "b"], ["c", "a"], ["a"]]
+
+
+def test_hits_are_attributed_by_page_location_and_page_load_id():
+    scheduler = scheduler_with_tabs(HIRE_URL, JOBS_URL)
+    hire, jobs = scheduler.tabs
+    index = Ga4HitIndex()
+    # Both tabs share cookies, hence the session id
+    index.add_hit(hit(en="page_view", sid="1", _p="p1", dl=hire.loaded_url))
+    index.add_hit(hit(en="page_view", sid="1", _p="p2", dl=jobs.loaded_url))
+    index.add_hit(hit(en="scroll", sid="1", _p="p1", dl=HIRE_URL + "#apply"))  # in-page URL change
+    index.add_hit(hit(en="page_view", sid="1", _p="p3", dl="https://example.com/"))
+
+    unattributed = scheduler.attribute_hits(index)
+
+    assert [h.event_name for h in hire.hits] == ["page_view", "scroll"]
+    assert [h.event_name for h in jobs.hits] == ["page_view"]
+    assert hire.page_load_ids == ["p1"]
+    assert [h.get('_p') for h in unattributed] == ["p3"]
+    assert index.first("page_view", **jobs.hit_filters()) is jobs.hits[0]
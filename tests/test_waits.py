@@ -0,0 +1,49 @@
+from . import waits
+from .waits import wait_until
+
+
+class FakeClock:
+    """Stands in for time.monotonic and time.sleep in waits, recording every sleep."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+def use_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(waits.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(waits.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_satisfied_condition_returns_at_once(monkeypatch):
+    clock = use_clock(monkeypatch)
+    result = wait_until(lambda: "entry", timeout=15, description="entry")
+    assert (result.value, result.satisfied, result.polls, result.elapsed) == ("entry", True, 1, 0.0)
+    assert clock.sleeps == []
+
+
+def test_delay_backs_off_up_to_max_interval(monkeypatch):
+    clock = use_clock(monkeypatch)
+    values = iter([None, None, None, None, None, {'status': 200}])
+    result = wait_until(lambda: next(values), timeout=15, initial_interval=0.1, max_interval=0.5, backoff=2.0)
+    assert clock.sleeps == [0.1, 0.2, 0.4, 0.5, 0.5]
+    assert (result.satisfied, result.polls) == (True, 6)
+    assert result.as_dict() == {'description': "condition", 'satisfied': True, 'elapsed': 1.7, 'polls': 6}
+
+
+def test_unsatisfied_wait_stops_at_the_deadline(monkeypatch):
+    clock = use_clock(monkeypatch)
+    result = wait_until(list, timeout=1.0, description="hit", initial_interval=0.3, backoff=2.0)
+    # The last sleep is cut short so the final check happens right at the deadline
+    assert clock.sleeps == [0.3, 0.6, 0.1]
+    assert (result.value, result.satisfied, result.polls) == ([], False, 4)
+    assert result.elapsed == 1.0
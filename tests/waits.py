@@ -0,0 +1,59 @@
+import time
+
+from .profiler import step
+
+
+class WaitResult:
+    """Outcome of a wait_until call: the condition's value and how long it took to get it."""
+
+    def __init__(self, description, value, elapsed, polls):
+        self.description = description
+        self.value = value
+        self.elapsed = elapsed
+        self.polls = polls
+
+    @property
+    def satisfied(self):
+        return bool(self.value)
+
+    def as_dict(self):
+        return {
+            'description': self.description,
+            'satisfied': self.satisfied,
+            'elapsed': round(self.elapsed, 3),
+            'polls': self.polls,
+        }
+
+
+def wait_until(condition, timeout=15, description="condition", initial_interval=0.1, max_interval=2.0, backoff=2.0):
+    """Poll condition until it returns a truthy value or the deadline passes.
+
+    The first check happens immediately and the delay between checks grows
+    exponentially from initial_interval up to max_interval, so conditions that
+    already hold return at once while slow ones are not hammered.
+
+    Args:
+        condition: Callable with no arguments; its truthy return value ends the wait
+        timeout: Seconds before giving up
+        description: Human readable name used when reporting the wait
+        initial_interval: Delay after the first unsuccessful check, in seconds
+        max_interval: Upper bound for the delay between checks, in seconds
+        backoff: Factor applied to the delay after every unsuccessful check
+
+    Returns:
+        WaitResult; its value is the last value returned by condition (falsy on timeout)
+    """
+    start_time = time.monotonic()
+    deadline = start_time + timeout
+    interval = initial_interval
+    polls = 0
+
+    while True:
+        polls += 1
+        value = condition()
+        now = time.monotonic()
+        if value or now >= deadline:
+            return WaitResult(description, value, now - start_time, polls)
+        with step("sleep"):
+            time.sleep(min(interval, deadline - now))
+        interval = min(interval * backoff, max_interval)